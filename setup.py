@@ -26,6 +26,9 @@ extra_dependencies = {
     'pytest': [  # For the plugin
         'pytest'
     ],
+    'snapshot': [  # For the --snapshot-validations option
+        'lxml',
+    ],
     'dev': [
         'pre-commit',
         'types-setuptools',  # Adds typing stubs
@@ -70,6 +73,7 @@ setup(
         'msedge-selenium-tools',
         'pydeepmerge',
         'pillow',
+        'numpy',
         'azure-storage-blob',
     ],
     tests_require=extra_dependencies['tests'],
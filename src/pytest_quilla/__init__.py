@@ -1,10 +1,24 @@
+import os
 import uuid
+from argparse import ArgumentTypeError
+from datetime import date
+from typing import List
 
 import pytest
 from _pytest.config import Config
 from _pytest.config.argparsing import Parser
 
-from pytest_quilla.pytest_classes import collect_file
+from quilla.sharding import (
+    load_timings,
+    parse_shard,
+    select_shard,
+)
+from quilla.reports.report_summary import ReportSummary
+from pytest_quilla.pytest_classes import (
+    collect_file,
+    QuillaItem,
+    run_date_key,
+)
 
 
 def pytest_addoption(parser: Parser):
@@ -36,10 +50,147 @@ def pytest_load_initial_conftests(early_config: Config, parser: Parser):
         default='',
         help='Options to be passed through to the quilla runtime for the scenario tests'
     )
+    parser.addoption(
+        '--quilla-shard',
+        action='store',
+        default=None,
+        metavar='INDEX/TOTAL',
+        help='Only run the Quilla tests that belong to the given shard, i.e. "2/10" runs '
+        'the second of ten shards. Tests that are not Quilla tests are not affected'
+    )
+    parser.addoption(
+        '--quilla-shard-timings',
+        action='store',
+        default=None,
+        metavar='FILE',
+        help='A json file mapping Quilla test file paths or content hashes to their duration '
+        'in seconds, or a database written through the --timing-history Quilla option. '
+        'Used to split the Quilla tests into shards of similar duration'
+    )
+    parser.addoption(
+        '--quilla-shard-report',
+        action='store',
+        default=None,
+        metavar='FILE',
+        help='A file to write the merged report of all Quilla tests run by this session to'
+    )
+
+
+def pytest_collection_modifyitems(config: Config, items: List[pytest.Item]):
+    '''
+    Deselects the Quilla tests that do not belong to the shard selected with '--quilla-shard'
+    '''
+    shard = config.getoption('--quilla-shard')
+    if shard is None:
+        return
+
+    try:
+        shard_index, shard_total = parse_shard(shard)
+    except ArgumentTypeError as e:
+        raise pytest.UsageError(str(e))
+
+    timings = None
+    if config.getoption('--quilla-shard-timings') is not None:
+        timings = load_timings(config.getoption('--quilla-shard-timings'))
+
+    quilla_files = sorted({
+        _relative_path(config, item) for item in items if isinstance(item, QuillaItem)
+    })
+    selected_files = set(select_shard(
+        quilla_files,
+        shard_index,
+        shard_total,
+        timings,
+        root=str(config.rootpath),
+    ))
+
+    selected: List[pytest.Item] = []
+    deselected: List[pytest.Item] = []
+    for item in items:
+        if not isinstance(item, QuillaItem):
+            selected.append(item)
+            continue
+
+        if _relative_path(config, item) in selected_files:
+            selected.append(item)
+        else:
+            deselected.append(item)
+
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def _relative_path(config: Config, item: pytest.Item) -> str:
+    return os.path.relpath(str(item.fspath), str(config.rootpath))
+
+
+def pytest_configure(config: Config):
+    # Workers of pytest-xdist use the run ID and date of the controller, so that every
+    # Quilla test of the session shares the same run ID and stores its images together
+    workerinput = getattr(config, 'workerinput', {})
+    config.stash[run_id_key] = workerinput.get('quilla_run_id', run_id)
+    config.stash[run_date_key] = workerinput.get('quilla_run_date', date.today().isoformat())
+    config.stash[worker_reports_key] = []
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    '''
+    Sends the run ID and date of the controller to a pytest-xdist worker
+    '''
+    node.workerinput['quilla_run_id'] = node.config.stash[run_id_key]
+    node.workerinput['quilla_run_date'] = node.config.stash[run_date_key]
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    '''
+    Collects the merged report of the Quilla tests a pytest-xdist worker executed
+    '''
+    report = getattr(node, 'workeroutput', {}).get('quilla_report')
+    if report is not None:
+        node.config.stash[worker_reports_key].append(report)
+
+
+def pytest_sessionfinish(session: pytest.Session):
+    '''
+    Writes the merged report of every Quilla test executed by this session, if a file
+    was given through '--quilla-shard-report'. Workers of pytest-xdist send their reports
+    to the controller instead, which writes the reports of every worker to the file
+    '''
+    config = session.config
+    report_file = config.getoption('--quilla-shard-report', None)
+    if report_file is None:
+        return
+
+    summaries = [
+        item.results for item in getattr(session, 'items', [])
+        if isinstance(item, QuillaItem) and hasattr(item, 'results')
+    ]
+    summaries.extend(
+        ReportSummary.from_json(report) for report in config.stash[worker_reports_key]
+    )
+    summary = ReportSummary.merge(config.stash[run_id_key], summaries)
+
+    workeroutput = getattr(config, 'workeroutput', None)
+    if workeroutput is not None:
+        workeroutput['quilla_report'] = summary.to_json()
+        return
+
+    with open(report_file, 'w') as fp:
+        fp.write(summary.to_json())
 
 
 def pytest_collect_file(parent: pytest.Session, path):
-    return collect_file(parent, path, parent.config.getini('quilla-prefix'), run_id)
+    return collect_file(
+        parent,
+        path,
+        parent.config.getini('quilla-prefix'),
+        parent.config.stash[run_id_key],
+    )
 
 
 run_id = str(uuid.uuid4())
+run_id_key = pytest.StashKey[str]()
+worker_reports_key = pytest.StashKey[List[str]]()
@@ -10,6 +10,10 @@ from quilla import (
 from quilla.reports.report_summary import ReportSummary
 
 
+# The date the Quilla run started, which pytest-xdist workers receive from the controller
+run_date_key = pytest.StashKey[str]()
+
+
 def collect_file(parent: pytest.Session, path: LocalPath, prefix: str, run_id: str):
     '''
     Collects files if their path ends with .json and starts with the prefix
@@ -78,6 +82,7 @@ class QuillaItem(pytest.Item):
         ):
             ctx.run_id = self.quilla_run_id
 
+        ctx.run_date = self.config.stash.get(run_date_key, ctx.run_date)
         ctx.json = self.test_data
         results = execute(ctx)
         self.results = results
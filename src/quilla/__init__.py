@@ -5,11 +5,14 @@ the runtime context for the application, then executing the rest of the applicat
 import argparse
 import sys
 import json
+import time
 from typing import (
     List,
+    cast,
 )
 import logging
 from pkg_resources import get_distribution
+from pluggy import PluginManager
 
 from quilla.ui_validation import QuillaTest
 from quilla.ctx import (
@@ -17,7 +20,19 @@ from quilla.ctx import (
     get_default_context
 )
 from quilla.reports import ReportSummary
+from quilla.common.enums import TimingKind
+from quilla.steps.validations import DOMSnapshot
 from quilla.plugins import get_plugin_manager
+from quilla.batch import (
+    collect_test_files,
+    parse_workers,
+    run_batch,
+)
+from quilla.sharding import (
+    load_timings,
+    parse_shard,
+    select_shard,
+)
 
 
 def make_parser() -> argparse.ArgumentParser:  # pragma: no cover
@@ -48,10 +63,13 @@ def make_parser() -> argparse.ArgumentParser:  # pragma: no cover
     data_group.add_argument(
         '-f',
         '--file',
-        dest='file_name',
-        action='store',
-        help='A file containing a Quilla test',
-        default=None,
+        dest='file_names',
+        action='extend',
+        nargs='+',
+        metavar='PATH',
+        help='One or more Quilla test files to run. Directories will be searched '
+        'recursively for json files, and glob patterns will be expanded',
+        default=[],
     )
     data_group.add_argument(
         '-r',
@@ -60,6 +78,15 @@ def make_parser() -> argparse.ArgumentParser:  # pragma: no cover
         help='A Quilla test passed in as a raw string',
         default=None,
     )
+    data_group.add_argument(
+        '--merge-reports',
+        dest='merge_reports',
+        nargs='+',
+        metavar='REPORT_FILE',
+        help='Merges the reports written by multiple Quilla runs (for example, by each shard '
+        'of a sharded run) into a single report, instead of running any Quilla test',
+        default=None,
+    )
 
     config_group = parser.add_argument_group(title='Configuration options')
     config_group.add_argument(
@@ -115,6 +142,109 @@ def make_parser() -> argparse.ArgumentParser:  # pragma: no cover
         default='.',
         help='The directory where browser drivers are stored',
     )
+    config_group.add_argument(
+        '--browser-workers',
+        dest='browser_workers',
+        type=int,
+        metavar='N',
+        default=1,
+        help='The maximum number of target browsers of a single Quilla test that '
+        'are validated concurrently. Each browser runs with its own runtime state, and '
+        'reports are still produced in the order the browsers were specified. '
+        'Defaults to running browsers one at a time',
+    )
+    config_group.add_argument(
+        '--session-pool-size',
+        dest='session_pool_size',
+        type=int,
+        metavar='N',
+        default=0,
+        help='The maximum number of idle browser sessions kept warm for each browser target, '
+        'so that browsers can be reused between Quilla tests instead of being restarted. '
+        'Cookies, storage and extra windows are cleared before a session is reused. '
+        'Sessions are only matched by browser target and by the driver options Quilla '
+        'configures, so leave the pool disabled if plugins change the browser capabilities '
+        'between tests. Defaults to 0, which starts a new browser for every test',
+    )
+    config_group.add_argument(
+        '--session-max-reuse',
+        dest='session_max_reuse',
+        type=int,
+        metavar='N',
+        default=50,
+        help='The maximum number of tests a pooled browser session can run before it is '
+        'closed and replaced by a new one. Set to 0 to reuse sessions indefinitely',
+    )
+    config_group.add_argument(
+        '--batch-validations',
+        dest='batch_validations',
+        action='store_true',
+        help='Evaluates consecutive XPath validations together with a single script call '
+        'instead of with one or more WebDriver commands per validation. Element text is '
+        'still retrieved through the browser driver',
+    )
+    config_group.add_argument(
+        '--snapshot-validations',
+        dest='snapshot_validations',
+        action='store_true',
+        help='Evaluates XPath validations for the Exists, HasAttribute and AttributeHasValue '
+        'states (and their negations) against a snapshot of the page source instead of the '
+        'live browser. A new snapshot is taken after any step that can change the page. '
+        'Attributes that reflect the live state of the element, such as \'value\', '
+        '\'href\' and boolean attributes, are still retrieved through the browser driver. '
+        'Requires lxml, which can be installed with \'pip install quilla[snapshot]\'',
+    )
+    config_group.add_argument(
+        '--wait-engine',
+        dest='wait_engine',
+        choices=['poll', 'observer'],
+        default='poll',
+        help='How the WaitForExistence and WaitForVisibility actions wait for their target. '
+        '\'poll\' checks the target every --poll-frequency seconds, while \'observer\' '
+        'watches the page for changes and finishes as soon as the target is ready, '
+        'falling back to polling if the page cannot be observed. Defaults to \'poll\'',
+    )
+    config_group.add_argument(
+        '--poll-frequency',
+        dest='poll_frequency',
+        type=float,
+        metavar='SECONDS',
+        default=0.5,
+        help='How often the \'poll\' wait engine checks the target of a wait action. '
+        'Defaults to 0.5 seconds',
+    )
+    config_group.add_argument(
+        '--image-encoder-workers',
+        dest='image_encoder_workers',
+        type=int,
+        metavar='N',
+        default=0,
+        help='The number of background threads used to encode the treatment, baseline and '
+        'delta images of VisualParity validations that are stored. Images are only encoded '
+        'when they are stored. Defaults to 0, which encodes them on the thread running the step',
+    )
+    config_group.add_argument(
+        '--baseline-cache-size',
+        dest='baseline_cache_size',
+        type=int,
+        metavar='MB',
+        default=0,
+        help='The maximum memory, in megabytes, used to keep decoded VisualParity baseline '
+        'images for the rest of the run. Cached baselines are shared by every browser and '
+        'test in the same process, and are downloaded concurrently before the validations '
+        'start. Defaults to 0, which downloads the baseline for every validation',
+    )
+    config_group.add_argument(
+        '--image-upload-workers',
+        dest='image_upload_workers',
+        type=int,
+        metavar='N',
+        default=0,
+        help='The number of background threads used by the storage plugins to store '
+        'VisualParity images, so that validations do not wait for the images to be stored. '
+        'Every queued image is stored before the results of a test file are reported. '
+        'Defaults to 0, which stores every image before the validation finishes',
+    )
     config_group.add_argument(
         '--no-sandbox',
         dest='no_sandbox',
@@ -125,6 +255,35 @@ def make_parser() -> argparse.ArgumentParser:  # pragma: no cover
         '''
     )
 
+    config_group.add_argument(
+        '--workers',
+        type=parse_workers,
+        metavar='N',
+        default=1,
+        help='The number of worker processes used to run multiple Quilla test files. '
+        'Each worker sets up its own context once and reuses it for every test file it runs. '
+        'Use \'auto\' to have one worker per CPU. Defaults to running all test files '
+        'in the current process',
+    )
+    config_group.add_argument(
+        '--shard',
+        type=parse_shard,
+        metavar='INDEX/TOTAL',
+        default=None,
+        help='Only runs the share of the test files that belong to the given shard, '
+        'i.e. \'2/10\' runs the second of ten shards. Test files are assigned to shards by '
+        'the hash of their contents, unless a timing history is given with --shard-timings',
+    )
+    config_group.add_argument(
+        '--shard-timings',
+        dest='shard_timings',
+        metavar='FILE',
+        default=None,
+        help='A json file mapping test file paths or content hashes to their duration in '
+        'seconds, or a database written through --timing-history. When given, test files '
+        'are split so that every shard takes about the same time to run',
+    )
+
     output_group = parser.add_argument_group(title='Output Options')
     output_group.add_argument(
         '-P',
@@ -138,6 +297,14 @@ def make_parser() -> argparse.ArgumentParser:  # pragma: no cover
         default=4,
         help='How much space each indent level should have when pretty-printing the report'
     )
+    output_group.add_argument(
+        '--report-file',
+        dest='report_file',
+        metavar='FILE',
+        default=None,
+        help='A file to also write the report to, so that it can later be '
+        'merged with the reports of other runs through --merge-reports'
+    )
 
     debug_group = parser.add_argument_group(title='Debug Options')
     debug_group.add_argument(
@@ -246,6 +413,7 @@ def execute(ctx: Context) -> ReportSummary:
     Returns:
         A summary of all reports produced by Quilla
     '''
+    started = time.perf_counter()
 
     ctx.logger.debug('Building UIValidation object from JSON')
     quilla_test = QuillaTest.from_json(ctx, ctx.json)
@@ -256,6 +424,8 @@ def execute(ctx: Context) -> ReportSummary:
     ctx.logger.debug('Running all validations')
     reports = quilla_test.validate_all()
 
+    ctx.timings.record(TimingKind.TEST, ctx.test_hash, started)
+
     ctx.logger.info('Running "quilla_postvalidate" hooks')
     ctx.pm.hook.quilla_postvalidate(ctx=ctx, reports=reports)
 
@@ -305,12 +475,65 @@ def setup_context(
     if not parsed_args.definitions:
         parsed_args.definitions = []
 
-    if parsed_args.file_name is None:
+    if parsed_args.snapshot_validations and not DOMSnapshot.is_available():
+        parser.error(
+            '--snapshot-validations requires lxml, install it with \'pip install quilla[snapshot]\''
+        )
+
+    test_files = collect_test_files(parsed_args.file_names)
+
+    if parsed_args.file_names and not test_files:
+        parser.error('No Quilla test files found for %s' % parsed_args.file_names)
+
+    if parsed_args.shard is not None:
+        shard_index, shard_total = parsed_args.shard
+        timings = None
+        if parsed_args.shard_timings is not None:
+            timings = load_timings(parsed_args.shard_timings)
+
+        test_files = select_shard(test_files, shard_index, shard_total, timings)
+        logger.info(
+            'Running %s test files for shard %s/%s',
+            len(test_files),
+            shard_index,
+            shard_total,
+        )
+
+    if not test_files:
         json_data = parsed_args.raw
-    else:
-        with open(parsed_args.file_name) as f:
+    elif len(test_files) == 1:
+        with open(test_files[0]) as f:
             json_data = f.read()
+    else:
+        json_data = ''  # Each test file is read when it is executed by the batch runner
+
+    # Saved so that the batch runner can set up the contexts of its worker processes
+    parsed_args.test_files = test_files
+    parsed_args.plugin_root = plugin_root
+
+    return make_context(pm, logger, parsed_args, json_data, recreate_context)
+
+
+def make_context(
+    pm: PluginManager,
+    logger: logging.Logger,
+    parsed_args: argparse.Namespace,
+    json_data: str,
+    recreate_context: bool = False,
+) -> Context:
+    '''
+    Creates the application context from args that were already parsed and resolved by
+    ``setup_context``, and runs the configuration hook of the plugins on it
 
+    Args:
+        pm: The plugin manager to attach to the context
+        logger: The logger to attach to the context
+        parsed_args: The args parsed by ``setup_context``
+        json_data: The json data describing the validations
+        recreate_context: Whether the context should be recreated
+    Returns:
+        A runtime context configured by the hooks and the args
+    '''
     logger.debug('Initializing context object')
 
     ctx = get_default_context(
@@ -319,7 +542,7 @@ def setup_context(
         parsed_args.drivers_path,
         parsed_args.pretty,
         json_data,
-        parsed_args.file_name is not None,
+        len(parsed_args.test_files) > 0,
         parsed_args.no_sandbox,
         parsed_args.definitions,
         logger=logger,
@@ -328,6 +551,16 @@ def setup_context(
         update_all_baselines=parsed_args.update_all_baselines,
         update_baseline=parsed_args.update_baseline,
         create_baseline_if_none=parsed_args.create_baseline_if_none,
+        browser_workers=parsed_args.browser_workers,
+        session_pool_size=parsed_args.session_pool_size,
+        session_max_reuse=parsed_args.session_max_reuse,
+        batch_validations=parsed_args.batch_validations,
+        snapshot_validations=parsed_args.snapshot_validations,
+        wait_engine=parsed_args.wait_engine,
+        poll_frequency=parsed_args.poll_frequency,
+        image_encoder_workers=parsed_args.image_encoder_workers,
+        baseline_cache_size=parsed_args.baseline_cache_size,
+        image_upload_workers=parsed_args.image_upload_workers,
         args=parsed_args,
         recreate_context=recreate_context,
     )
@@ -341,17 +574,29 @@ def setup_context(
 def run(ctx: Context):
     '''
     Runs all reports and prints to stdout while providing the proper
-    exit code
+    exit code. If more (or less) than one test file was given, all of them are run through
+    the batch runner and their reports are merged into a single summary
 
     Args:
         ctx: The application context
     '''
-    reports = execute(ctx)
+    args = cast(argparse.Namespace, ctx.args)
+
+    if args.merge_reports:
+        reports = merge_report_files(args.merge_reports)
+    elif args.file_names and len(args.test_files) != 1:
+        reports = run_batch(ctx, args.test_files, args.workers)
+    else:
+        reports = execute(ctx)
 
     ctx.logger.debug('Finished generating reports')
 
     out = reports.to_dict()
 
+    if args.report_file is not None:
+        with open(args.report_file, 'w') as fp:
+            json.dump(out, fp)
+
     if ctx.pretty:
         print(json.dumps(
             out,
@@ -369,6 +614,26 @@ def run(ctx: Context):
     sys.exit(exit_code)
 
 
+def merge_report_files(report_files: List[str]) -> ReportSummary:
+    '''
+    Loads the reports written by multiple Quilla runs and merges them into a single summary
+
+    Args:
+        report_files: The paths of the files written through the '--report-file' option
+
+    Returns:
+        A summary with the reports of every file, in the order the files were given
+    '''
+    summaries = []
+    for report_file in report_files:
+        with open(report_file) as fp:
+            summaries.append(ReportSummary.from_json(fp.read()))
+
+    run_id = summaries[0].run_id if summaries else ''
+
+    return ReportSummary.merge(run_id, summaries)
+
+
 def main():
     '''
     Creates the context and parses all arguments, then runs the default handler function
@@ -0,0 +1,200 @@
+'''
+Module to run many Quilla tests in a single invocation of Quilla. Tests are either run one
+after the other in the current process, or spread over a pool of worker processes. Every
+worker process sets up its context from the args already resolved by the main process, so
+it only discovers plugins once, and then reuses the context for all the test files that
+it receives.
+'''
+
+import os
+import glob
+from argparse import (
+    ArgumentTypeError,
+    Namespace,
+)
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import (
+    List,
+    Optional,
+    Set,
+)
+
+import quilla
+from quilla.ctx import Context
+from quilla.common.enums import UITestActions
+from quilla.plugins import get_plugin_manager
+from quilla.plugins.base_storage import BaseStorage
+from quilla.reports import (
+    ReportSummary,
+    StepFailureReport,
+)
+
+
+_worker_ctx: Optional[Context] = None
+
+
+def parse_workers(value: str) -> int:
+    '''
+    Converts the value of the ``--workers`` CLI option into a number of workers
+
+    Args:
+        value: Either 'auto' or a positive integer
+
+    Returns:
+        The number of worker processes to use. 'auto' resolves to the number of CPUs
+
+    Raises:
+        ArgumentTypeError: if the value is neither 'auto' nor a positive integer
+    '''
+    if value == 'auto':
+        return os.cpu_count() or 1
+
+    try:
+        workers = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f'"{value}" is not a valid number of workers')
+
+    if workers < 1:
+        raise ArgumentTypeError('The number of workers must be at least 1')
+
+    return workers
+
+
+def collect_test_files(paths: List[str]) -> List[str]:
+    '''
+    Resolves a list of files, directories and glob patterns into the list of
+    Quilla test files they describe. Directories are searched recursively for
+    json files.
+
+    Args:
+        paths: The paths given to the CLI
+
+    Returns:
+        A sorted list of unique test file paths
+    '''
+    test_files: Set[str] = set()
+
+    for path in paths:
+        is_pattern = any(char in path for char in '*?[')
+        matches = glob.glob(path, recursive=True) if is_pattern else [path]
+
+        for match in matches:
+            match_path = Path(match)
+            if match_path.is_dir():
+                test_files.update(str(p) for p in match_path.rglob('*.json') if p.is_file())
+            elif match_path.is_file():
+                test_files.add(str(match_path))
+
+    return sorted(test_files)
+
+
+def execute_file(ctx: Context, test_file: str) -> ReportSummary:
+    '''
+    Executes a single Quilla test file on a forked copy of the given context, so that
+    the definitions and outputs of one test file never leak into the next one
+
+    Args:
+        ctx: The runtime context shared by all test files
+        test_file: The path to the Quilla test file
+
+    Returns:
+        A summary of all reports produced by the test file
+    '''
+    file_ctx = ctx.fork()
+
+    with open(test_file) as f:
+        file_ctx.json = f.read()
+    file_ctx.is_file = True
+
+    ctx.logger.info('Executing Quilla test file "%s"', test_file)
+
+    return quilla.execute(file_ctx)
+
+
+def _init_worker(parsed_args: Namespace, run_id: str, run_date: str):
+    '''
+    Initializer for the batch worker processes. Sets up the context that
+    will be shared by every test file executed by this worker from the args
+    resolved by the main process, so they are not parsed, globbed or sharded again
+    '''
+    global _worker_ctx
+
+    logger = quilla.make_default_logger(parsed_args)
+    pm = get_plugin_manager(parsed_args.plugin_root, logger)
+    pm.hook.quilla_configure_logger(logger=logger)
+
+    ctx = quilla.make_context(pm, logger, parsed_args, '', recreate_context=True)
+    ctx.run_id = run_id
+    ctx.run_date = run_date
+    ctx.is_worker = True
+
+    _worker_ctx = ctx
+
+
+def _execute_in_worker(test_file: str) -> ReportSummary:
+    '''
+    Executes a test file in a worker process. Any error is reported as a failure of the
+    test file, so that it does not prevent the results of the other test files from
+    being collected
+    '''
+    ctx: Context = _worker_ctx  # type: ignore
+
+    try:
+        return execute_file(ctx, test_file)
+    except Exception as e:
+        ctx.logger.error(
+            'Exception %s raised while executing Quilla test file "%s"',
+            e,
+            test_file,
+            exc_info=True,
+        )
+        report = StepFailureReport(
+            f'Test file "{test_file}" could not be executed: {e!r}',
+            '',
+            UITestActions.VALIDATE,
+            0,
+        )
+
+        return ReportSummary(ctx.run_id, {}, [report])
+
+
+def run_batch(ctx: Context, test_files: List[str], workers: int = 1) -> ReportSummary:
+    '''
+    Executes every given test file and merges the reports that they produce into a
+    single summary. The reports are merged in the same order as the test files, regardless
+    of the order in which the test files finish executing.
+
+    Args:
+        ctx: The runtime context. Its resolved args are also used to configure the
+            worker processes
+        test_files: The paths of all Quilla test files to execute
+        workers: The number of worker processes to use. If 1, all test files are
+            executed in the current process
+
+    Returns:
+        A summary of the reports produced by all the test files
+    '''
+    workers = min(workers, len(test_files))
+
+    if workers <= 1:
+        summaries = [execute_file(ctx, test_file) for test_file in test_files]
+    else:
+        ctx.logger.debug(
+            'Executing %s test files with %s worker processes',
+            len(test_files),
+            workers,
+        )
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,  # type: ignore
+            initargs=(ctx.args, ctx.run_id, ctx.run_date),  # type: ignore
+        ) as executor:
+            summaries = list(executor.map(_execute_in_worker, test_files))
+
+        # The worker processes leave the stored reports for this process to clean up
+        for plugin in ctx.pm.get_plugins():
+            if isinstance(plugin, BaseStorage):
+                plugin.cleanup_run(ctx)
+
+    return ReportSummary.merge(ctx.run_id, summaries)
@@ -1,7 +1,9 @@
+import time
 from typing import (
     Dict,
     List,
-    Optional
+    Optional,
+    Tuple,
 )
 
 # from selenium import webdriver
@@ -9,11 +11,18 @@ from selenium.webdriver.remote.webdriver import WebDriver
 
 from quilla.ctx import Context
 from quilla.browser import drivers
+from quilla.browser.command_counter import count_commands
+from quilla.browser.session_pool import (
+    SessionPool,
+    get_session_pool,
+)
 from quilla.common.enums import (
     BrowserTargets,
+    TimingKind,
 )
 from quilla.steps.steps_aggregator import StepsAggregator
 from quilla.reports.base_report import BaseReport
+from quilla.reports.step_timing import StepTiming
 from quilla.common.exceptions import InvalidBrowserStateException
 
 
@@ -65,18 +74,77 @@ class BrowserValidations:
             )
         self._target = v
 
+    @property
+    def session_pool(self) -> Optional[SessionPool]:
+        '''
+        The session pool that drivers are checked out of, or None if browser sessions
+        should not be reused. Sessions are never reused when the context is configured to
+        leave the browsers open, since the browser state could then be inspected
+        '''
+        if self.ctx.session_pool_size < 1 or not self.ctx.close_browser:
+            return None
+
+        return get_session_pool(
+            self.ctx.session_pool_size,
+            self.ctx.session_max_reuse,
+            self.ctx.logger,
+        )
+
+    @property
+    def session_key(self) -> Tuple:
+        '''
+        The key that identifies which pooled browser sessions this browser validation can use.
+
+        The key covers the driver class and the context options the drivers are configured
+        with. Sessions whose capabilities are changed in any other way, such as by a plugin
+        after the driver is created, are not told apart by the key, so the session pool
+        should be disabled when different tests need differently configured browsers
+        '''
+        return (
+            self._target,
+            self.driver_selector[self._target],
+            self.ctx.run_headless,
+            self.ctx.no_sandbox,
+            self.ctx.drivers_path,
+        )
+
+    def _create_driver(self) -> WebDriver:
+        return self.driver_selector[self._target](self.ctx)
+
     def init(self):
         '''
-        Creates the appropriate driver, sets the start URL to the specified root, and
-        sets all steps to have the appropriate driver
+        Creates the appropriate driver (or checks one out of the session pool), sets the
+        start URL to the specified root, and sets all steps to have the appropriate driver
         '''
         self.ctx.logger.debug('Initializing browser %s', self._target.value)
-        driver: WebDriver = self.driver_selector[self._target](self.ctx)
+        pool = self.session_pool
+        started = time.perf_counter()
+
+        if pool is None:
+            driver: WebDriver = self._create_driver()
+        else:
+            driver = pool.checkout(self.session_key, self._create_driver)
+
+        self.ctx.timings.record(
+            TimingKind.DRIVER_START,
+            self.ctx.test_hash,
+            started,
+            browser=self._target.value,
+        )
+
+        count_commands(driver)
         self._driver = driver
         driver.get(self._root)
         self._steps.driver = driver  # Set the driver for all the steps
         self.ctx.driver = driver
 
+    @property
+    def step_timings(self) -> List[StepTiming]:
+        '''
+        The timings of the steps performed during the last validation of this browser
+        '''
+        return self._steps.step_timings
+
     def run_steps(self) -> List[BaseReport]:
         '''
         Executes all stored steps. Pass through method for the steps run_steps method
@@ -84,14 +152,19 @@ class BrowserValidations:
         Returns:
             A list of reports generated by the steps
         '''
-        return self._steps.run_steps()
+        return self._steps.run_steps(browser=self._target.value)
 
     def clean(self):
         '''
-        Closes the browser instance and resets all the step drivers to None state
+        Closes the browser instance (or returns it to the session pool) and resets all
+        the step drivers to None state
         '''
         self.ctx.logger.debug('Cleaning up finished browser')
-        if self.ctx.close_browser:
+        pool = self.session_pool
+
+        if pool is not None:
+            pool.checkin(self.session_key, self._driver)
+        elif self.ctx.close_browser:
             try:
                 self._driver.close()
             except Exception as e:
@@ -112,6 +185,7 @@ class BrowserValidations:
         Raises:
             Exception: Any exception produced by the run_steps function
         '''
+        started = time.perf_counter()
         self.init()
         reports = []
         try:
@@ -128,5 +202,11 @@ class BrowserValidations:
             raise e
         finally:
             self.clean()
+            self.ctx.timings.record(
+                TimingKind.BROWSER,
+                self.ctx.test_hash,
+                started,
+                browser=self._target.value,
+            )
 
         return reports
@@ -0,0 +1,62 @@
+'''
+Module to count the WebDriver commands sent by a driver. Every WebDriver command is an
+HTTP round trip to the browser driver, so the number of commands a step sends is a good
+indication of why the step is slow.
+'''
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class CountingCommandExecutor:
+    '''
+    A proxy around the command executor of a driver that counts how many commands
+    are executed through it. Every other attribute is forwarded to the wrapped executor
+
+    Args:
+        executor: The original command executor of the driver
+
+    Attributes:
+        commands: The number of commands executed so far
+    '''
+    def __init__(self, executor):
+        self._executor = executor
+        self.commands = 0
+
+    def execute(self, command: str, params: dict):
+        self.commands += 1
+
+        return self._executor.execute(command, params)
+
+    def __getattr__(self, name: str):
+        return getattr(self._executor, name)
+
+
+def count_commands(driver: WebDriver):
+    '''
+    Wraps the command executor of the driver so that its commands are counted. Drivers that
+    are already counting their commands, such as reused browser sessions, are left unchanged
+
+    Args:
+        driver: The driver to count the commands of
+    '''
+    if not isinstance(driver.command_executor, CountingCommandExecutor):
+        driver.command_executor = CountingCommandExecutor(driver.command_executor)
+
+
+def command_count(driver: WebDriver) -> int:
+    '''
+    Retrieves the number of commands sent by a driver
+
+    Args:
+        driver: A driver whose commands are counted through ``count_commands``
+
+    Returns:
+        The number of commands sent by the driver, or 0 if its commands are not counted or
+        if it has no command executor at all
+    '''
+    executor = getattr(driver, 'command_executor', None)
+
+    if isinstance(executor, CountingCommandExecutor):
+        return executor.commands
+
+    return 0
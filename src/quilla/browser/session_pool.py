@@ -0,0 +1,234 @@
+'''
+Module for a pool of warm browser sessions, allowing the same browser session to be reused
+by multiple Quilla tests instead of starting a new browser for every test.
+
+Sessions are keyed by the browser target and the options the driver was created with,
+and their state is reset whenever they are returned to the pool. Since browsers only allow
+clearing storage for the origin that is currently loaded, the reset happens before leaving
+the page used by the last test.
+'''
+
+import threading
+from multiprocessing.util import Finalize
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+)
+from logging import (
+    Logger,
+    getLogger,
+)
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+_clear_storage_script = '''
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+'''
+
+
+class PooledSession:
+    '''
+    A browser session that is managed by the session pool
+
+    Args:
+        driver: The driver for the browser session
+
+    Attributes:
+        driver: The driver for the browser session
+        uses: How many times the session has been checked out of the pool
+        window_size: The window size of the browser when it was first created
+    '''
+    def __init__(self, driver: WebDriver):
+        self.driver = driver
+        self.uses = 0
+        self.window_size = driver.get_window_size()
+
+    def is_healthy(self) -> bool:
+        '''
+        Checks that the browser is still responding to commands
+
+        Returns:
+            True if the browser responded, False if it crashed or was closed
+        '''
+        try:
+            return len(self.driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def reset(self):
+        '''
+        Clears the storage and cookies of the current page, closes every window but the first
+        one, restores the original window size and navigates to a blank page
+        '''
+        driver = self.driver
+        driver.execute_script(_clear_storage_script)
+        driver.delete_all_cookies()
+
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        driver.set_window_size(self.window_size['width'], self.window_size['height'])
+        driver.get('about:blank')
+
+    def quit(self):
+        '''
+        Ends the browser session, ignoring any errors since the browser might
+        have already crashed
+        '''
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class SessionPool:
+    '''
+    A thread-safe pool of browser sessions
+
+    Args:
+        size: The maximum number of idle sessions kept for each key
+        max_reuse: The maximum number of times a session can be checked out before it
+            is recycled. Set to 0 to reuse sessions indefinitely
+        logger: An optional logger instance
+
+    Attributes:
+        size: The maximum number of idle sessions kept for each key
+        max_reuse: The maximum number of times a session can be checked out before it
+            is recycled
+    '''
+    def __init__(self, size: int, max_reuse: int = 0, logger: Optional[Logger] = None):
+        self.size = size
+        self.max_reuse = max_reuse
+        self._logger = logger if logger is not None else getLogger('quilla')
+        self._idle: Dict[Hashable, List[PooledSession]] = {}
+        self._in_use: Dict[int, PooledSession] = {}
+        self._lock = threading.Lock()
+
+    def checkout(self, key: Hashable, factory: Callable[[], WebDriver]) -> WebDriver:
+        '''
+        Retrieves a healthy idle session for the given key, or creates a new one if there
+        are none available. Idle sessions that no longer respond are discarded.
+
+        Args:
+            key: A hashable value describing the browser target and its driver options
+            factory: A function that creates a new driver for the key
+
+        Returns:
+            A driver that is exclusively owned by the caller until it is checked back in
+        '''
+        session = self._pop_healthy_session(key)
+
+        if session is None:
+            self._logger.debug('No idle browser session for %s, starting a new one', key)
+            session = PooledSession(factory())
+
+        session.uses += 1
+
+        with self._lock:
+            self._in_use[id(session.driver)] = session
+
+        return session.driver
+
+    def checkin(self, key: Hashable, driver: WebDriver):
+        '''
+        Returns a driver to the pool, resetting its state. Sessions that have reached their
+        maximum reuse count, that cannot be reset, or that do not fit in the pool are ended.
+
+        Args:
+            key: The same key used to check the driver out of the pool
+            driver: The driver returned by ``checkout``
+        '''
+        with self._lock:
+            session = self._in_use.pop(id(driver), None)
+
+        if session is None:
+            # The driver was not created by this pool, so it cannot be reused
+            driver.quit()
+            return
+
+        if self.max_reuse > 0 and session.uses >= self.max_reuse:
+            self._logger.debug('Browser session reached %s uses, recycling it', session.uses)
+            session.quit()
+            return
+
+        try:
+            session.reset()
+        except Exception as e:
+            self._logger.debug('Could not reset browser session due to %s', e, exc_info=True)
+            session.quit()
+            return
+
+        with self._lock:
+            idle_sessions = self._idle.setdefault(key, [])
+            if len(idle_sessions) < self.size:
+                idle_sessions.append(session)
+                return
+
+        session.quit()
+
+    def close(self):
+        '''
+        Ends every idle session in the pool
+        '''
+        with self._lock:
+            idle_sessions = [session for sessions in self._idle.values() for session in sessions]
+            self._idle.clear()
+
+        for session in idle_sessions:
+            session.quit()
+
+    def _pop_healthy_session(self, key: Hashable) -> Optional[PooledSession]:
+        while True:
+            with self._lock:
+                idle_sessions = self._idle.get(key, [])
+                if not idle_sessions:
+                    return None
+                session = idle_sessions.pop()
+
+            if session.is_healthy():
+                return session
+
+            self._logger.debug('Discarding unresponsive browser session for %s', key)
+            session.quit()
+
+
+_session_pool: Optional[SessionPool] = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool(size: int, max_reuse: int = 0, logger: Optional[Logger] = None) -> SessionPool:
+    '''
+    Gets the session pool for the current process, creating a new one if necessary.
+    The pool is shared by every context of the process, so that sessions can be reused
+    by every Quilla test it runs.
+
+    Args:
+        size: The maximum number of idle sessions kept for each key
+        max_reuse: The maximum number of times a session can be checked out before it
+            is recycled
+        logger: An optional logger instance
+
+    Returns:
+        The session pool of the current process
+    '''
+    global _session_pool
+
+    with _session_pool_lock:
+        if _session_pool is None:
+            _session_pool = pool = SessionPool(size, max_reuse, logger)
+            # Unlike atexit handlers, multiprocessing finalizers also run when the
+            # worker processes of the batch runner exit
+            Finalize(pool, pool.close, exitpriority=10)
+
+        _session_pool.size = size
+        _session_pool.max_reuse = max_reuse
+
+        return _session_pool
@@ -110,3 +110,14 @@ class VisualParityImageType(Enum):
 
     BASELINE = 'Baseline'
     TREATMENT = 'Treatment'
+    DELTA = 'Delta'
+
+
+class TimingKind(Enum):
+    '''
+    The phases of a Quilla run whose durations are recorded
+    '''
+    TEST = 'Test'
+    BROWSER = 'Browser'
+    DRIVER_START = 'DriverStart'
+    STEP = 'Step'
@@ -0,0 +1,242 @@
+'''
+Module for compiling context expressions. Any text that supports context expressions is
+parsed once into a template of literal text and of the context objects the expressions refer
+to, so that resolving the same text again only requires looking up the values of its
+context objects.
+
+The text is scanned in a single pass for the ``${{`` and ``}}`` delimiters. Expressions can
+be nested, in which case the inner expressions are resolved first and the result is parsed
+for context objects, e.g. ``${{ Definitions.${{ Validation.env }}.url }}``. Delimiters that
+are not balanced are kept as literal text.
+'''
+
+import re
+from functools import lru_cache
+from typing import (
+    Any,
+    List,
+    Tuple,
+    Union,
+    cast,
+)
+
+
+_delimiter_regex = re.compile(r'\${{|}}')
+_context_obj_expression = re.compile(
+    # Used on the inside of a context expression to
+    # find context objects embedded into it
+    r'([a-zA-Z][a-zA-Z0-9_]+)(\.[a-zA-Z_][a-zA-Z0-9_]+)+'
+)
+_open_delimiter = '${{'
+
+
+class ContextObject:
+    '''
+    A reference to a value of a context object, such as ``Validation.my.output``
+
+    Args:
+        expression: The text of the reference
+
+    Attributes:
+        expression: The text of the reference
+        root: The name of the context object, such as 'Validation' or 'Environment'
+        path: The names used to find the value inside of the context object
+    '''
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.root, *path = expression.split('.')
+        self.path: Tuple[str, ...] = tuple(path)
+
+    def __repr__(self) -> str:
+        return f'ContextObject({self.expression!r})'
+
+
+class ContextExpression:
+    '''
+    The contents of a single ``${{ }}`` context expression
+
+    Args:
+        parts: The literal text, context objects and nested expressions that make up
+            the expression, in order
+
+    Attributes:
+        parts: The literal text, context objects and nested expressions that make up
+            the expression, in order. If the expression is nested, the literal text
+            has not been searched for context objects, since the nested expressions
+            can be part of a context object
+        is_nested: Whether the expression contains other expressions
+    '''
+    def __init__(self, parts: List[Union[str, ContextObject, 'ContextExpression']]):
+        self.parts = parts
+        self.is_nested = any(isinstance(part, ContextExpression) for part in parts)
+
+    @property
+    def objects(self) -> List[ContextObject]:
+        '''
+        The context objects referenced by the expression. Objects that are only known
+        once the nested expressions are resolved are not included
+        '''
+        objects: List[ContextObject] = []
+
+        for part in self.parts:
+            if isinstance(part, ContextObject):
+                objects.append(part)
+            elif isinstance(part, ContextExpression):
+                objects.extend(part.objects)
+
+        return objects
+
+
+class ContextTemplate:
+    '''
+    A compiled representation of a text that can contain context expressions
+
+    Args:
+        text: The original text
+        segments: The literal text and the context expressions that make up the text, in order
+
+    Attributes:
+        text: The original text
+        segments: The literal text and the context expressions that make up the text, in order
+    '''
+    def __init__(self, text: str, segments: List[Union[str, ContextExpression]]):
+        self.text = text
+        self.segments = segments
+
+    @property
+    def objects(self) -> List[ContextObject]:
+        '''
+        The context objects referenced by every expression in the text
+        '''
+        return [
+            obj
+            for segment in self.segments
+            if isinstance(segment, ContextExpression)
+            for obj in segment.objects
+        ]
+
+    @property
+    def is_static(self) -> bool:
+        '''
+        Whether the text does not contain any context expressions
+        '''
+        return all(isinstance(segment, str) for segment in self.segments)
+
+
+def _append_text(parts: list, text: str):
+    if not text:
+        return
+
+    if parts and isinstance(parts[-1], str):
+        parts[-1] += text
+    else:
+        parts.append(text)
+
+
+def _build_expression(parts: List[Union[str, ContextExpression]]) -> ContextExpression:
+    # Whitespace around the contents of an expression is not significant
+    if parts and isinstance(parts[0], str):
+        parts[0] = parts[0].lstrip()
+    if parts and isinstance(parts[-1], str):
+        parts[-1] = parts[-1].rstrip()
+    parts = [part for part in parts if part != '']
+
+    if any(isinstance(part, ContextExpression) for part in parts):
+        return ContextExpression(list(parts))
+
+    return parse_expression(''.join(cast(List[str], parts)))
+
+
+@lru_cache(maxsize=4096)
+def parse_expression(expression: str) -> ContextExpression:
+    '''
+    Splits the contents of a context expression that has no nested expressions into literal
+    text and context objects
+
+    Args:
+        expression: The text between the ``${{`` and ``}}`` delimiters
+
+    Returns:
+        The parsed expression
+    '''
+    parts: List[Union[str, ContextObject, ContextExpression]] = []
+    position = 0
+
+    for object_match in _context_obj_expression.finditer(expression):
+        _append_text(parts, expression[position:object_match.start()])
+        parts.append(ContextObject(object_match.group(0)))
+        position = object_match.end()
+
+    _append_text(parts, expression[position:])
+
+    return ContextExpression(parts)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text: str) -> ContextTemplate:
+    '''
+    Parses a text into a template in a single pass. Templates are cached by their text,
+    so any text is only compiled once per process
+
+    Args:
+        text: Any string that supports context expressions
+
+    Returns:
+        The compiled template for the text
+    '''
+    segments: list = []
+    # The parts of every expression that has been opened but not closed yet, along with
+    # the parts of the enclosing expression (or the segments of the template)
+    open_expressions: List[Tuple[list, list]] = []
+    current = segments
+    position = 0
+
+    for delimiter in _delimiter_regex.finditer(text):
+        if delimiter.group(0) == _open_delimiter:
+            _append_text(current, text[position:delimiter.start()])
+            open_expressions.append((current, []))
+            current = open_expressions[-1][1]
+        elif open_expressions:
+            _append_text(current, text[position:delimiter.start()])
+            current, parts = open_expressions.pop()
+            current.append(_build_expression(parts))
+        else:
+            # A closing delimiter without an expression is just text
+            continue
+
+        position = delimiter.end()
+
+    _append_text(current, text[position:])
+
+    # Expressions that were never closed are kept as text
+    while open_expressions:
+        parent, parts = open_expressions.pop()
+        _append_text(parent, _open_delimiter)
+        for part in parts:
+            if isinstance(part, str):
+                _append_text(parent, part)
+            else:
+                parent.append(part)
+
+    return ContextTemplate(text, segments)
+
+
+def compile_templates(value: Any) -> List[ContextTemplate]:
+    '''
+    Compiles every string found in a value ahead of time, so that the templates are
+    already cached when the value is first resolved
+
+    Args:
+        value: A string, or a dictionary or list that can contain strings
+
+    Returns:
+        The templates of every string in the value
+    '''
+    if isinstance(value, str):
+        return [compile_template(value)]
+    elif isinstance(value, dict):
+        return [template for item in value.values() for template in compile_templates(item)]
+    elif isinstance(value, list):
+        return [template for item in value for template in compile_templates(item)]
+
+    return []
@@ -0,0 +1,308 @@
+'''
+Module for recording how long the different phases of a Quilla run take. The recorded
+timings are kept in memory until a plugin (such as the bundled TimingHistory plugin)
+collects them, usually in the ``quilla_postvalidate`` hook.
+
+The timings can be stored in a SQLite database, which is read back to balance test
+shards by duration.
+'''
+
+import sqlite3
+import time
+import threading
+from contextlib import contextmanager
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    cast,
+)
+
+from quilla.common.enums import TimingKind
+
+
+class TimingRecord:
+    '''
+    A single measured duration
+
+    Args:
+        kind: The phase of the run that was measured
+        test_hash: The content hash of the Quilla test that was running
+        duration: The duration of the phase, in seconds
+        recorded_at: The unix timestamp of when the phase finished
+        browser: The name of the browser, if the phase is specific to a browser
+        step_index: The index of the step, if the phase is a step
+        action: The action of the step, if the phase is a step
+    '''
+    def __init__(
+        self,
+        kind: TimingKind,
+        test_hash: str,
+        duration: float,
+        recorded_at: float,
+        browser: str = '',
+        step_index: Optional[int] = None,
+        action: str = '',
+    ):
+        self.kind = kind
+        self.test_hash = test_hash
+        self.duration = duration
+        self.recorded_at = recorded_at
+        self.browser = browser
+        self.step_index = step_index
+        self.action = action
+
+
+class TimingRecorder:
+    '''
+    A thread-safe collector of timing records. Recording is a no-op unless the
+    recorder is enabled, so that timings are only kept when something will consume them
+
+    Args:
+        enabled: Whether timings should be recorded
+
+    Attributes:
+        enabled: Whether timings should be recorded
+    '''
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._records: List[TimingRecord] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        kind: TimingKind,
+        test_hash: str,
+        started: float,
+        browser: str = '',
+        step_index: Optional[int] = None,
+        action: str = '',
+    ):
+        '''
+        Records the duration of a phase that started at the given time and just finished
+
+        Args:
+            kind: The phase of the run that was measured
+            test_hash: The content hash of the Quilla test that was running
+            started: The value of ``time.perf_counter()`` when the phase started
+            browser: The name of the browser, if the phase is specific to a browser
+            step_index: The index of the step, if the phase is a step
+            action: The action of the step, if the phase is a step
+        '''
+        if not self.enabled:
+            return
+
+        duration = time.perf_counter() - started
+        record = TimingRecord(
+            kind,
+            test_hash,
+            duration,
+            time.time(),
+            browser,
+            step_index,
+            action,
+        )
+
+        with self._lock:
+            self._records.append(record)
+
+    def drain(self) -> List[TimingRecord]:
+        '''
+        Removes all the timings recorded so far from the recorder
+
+        Returns:
+            The removed timing records, in the order in which they were recorded
+        '''
+        with self._lock:
+            records, self._records = self._records, []
+
+        return records
+
+
+_schema = '''
+CREATE TABLE IF NOT EXISTS timings (
+    run_id TEXT NOT NULL,
+    test_hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    browser TEXT NOT NULL,
+    step_index INTEGER,
+    action TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timings_by_test ON timings (kind, test_hash);
+'''
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    '''
+    Computes a percentile of some values, interpolating linearly between the closest ranks
+
+    Args:
+        values: The values to compute the percentile of
+        q: The percentile to compute, between 0 and 100
+
+    Returns:
+        The percentile of the values, or None if there are no values
+    '''
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class TimingDatabase:
+    '''
+    A SQLite database of the timings recorded during Quilla runs
+
+    Args:
+        db_path: The path to the SQLite database. If None, the database is disabled
+            until it is configured
+
+    Attributes:
+        db_path: The path to the SQLite database
+    '''
+    db_path: Optional[str]
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = None
+
+        if db_path is not None:
+            self.configure(db_path)
+
+    def configure(self, db_path: str):
+        '''
+        Sets the database file, creating its tables if necessary
+
+        Args:
+            db_path: The path to the SQLite database
+        '''
+        self.db_path = db_path
+
+        with self._connect() as conn:
+            conn.executescript(_schema)
+
+    @property
+    def is_enabled(self) -> bool:
+        return self.db_path is not None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Batch worker processes can write to the same database, so wait on locks
+        conn = sqlite3.connect(cast(str, self.db_path), timeout=30)
+        try:
+            with conn:  # Commits the transaction, or rolls it back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def durations(
+        self,
+        kind: TimingKind,
+        test_hash: Optional[str] = None,
+        browser: Optional[str] = None,
+        step_index: Optional[int] = None,
+    ) -> List[float]:
+        '''
+        Retrieves all the recorded durations that match the given filters
+
+        Args:
+            kind: The phase of the run to retrieve durations for
+            test_hash: Only retrieve durations for the test with this content hash
+            browser: Only retrieve durations for this browser
+            step_index: Only retrieve durations for the step at this index
+
+        Returns:
+            The matching durations in seconds
+        '''
+        query = 'SELECT duration FROM timings WHERE kind = ?'
+        params: list = [kind.value]
+
+        filters = {
+            'test_hash': test_hash,
+            'browser': browser,
+            'step_index': step_index,
+        }
+        for column, value in filters.items():
+            if value is not None:
+                query += f' AND {column} = ?'
+                params.append(value)
+
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(query, params)]
+
+    def percentile(
+        self,
+        kind: TimingKind,
+        q: float,
+        test_hash: Optional[str] = None,
+        browser: Optional[str] = None,
+        step_index: Optional[int] = None,
+    ) -> Optional[float]:
+        '''
+        Computes a percentile of the recorded durations that match the given filters
+
+        Args:
+            kind: The phase of the run to compute the percentile for
+            q: The percentile to compute, between 0 and 100
+            test_hash: Only consider durations for the test with this content hash
+            browser: Only consider durations for this browser
+            step_index: Only consider durations for the step at this index
+
+        Returns:
+            The percentile in seconds, or None if there is no matching history
+        '''
+        return percentile(self.durations(kind, test_hash, browser, step_index), q)
+
+    def test_percentiles(self, q: float = 50) -> Dict[str, float]:
+        '''
+        Computes a percentile of the wall time of every test in the history
+
+        Args:
+            q: The percentile to compute, between 0 and 100
+
+        Returns:
+            A dictionary mapping the content hash of each test to the percentile of its duration
+        '''
+        query = 'SELECT test_hash, duration FROM timings WHERE kind = ?'
+        test_durations: Dict[str, List[float]] = {}
+
+        with self._connect() as conn:
+            for test_hash, duration in conn.execute(query, (TimingKind.TEST.value,)):
+                test_durations.setdefault(test_hash, []).append(duration)
+
+        return {
+            test_hash: cast(float, percentile(durations, q))
+            for test_hash, durations in test_durations.items()
+        }
+
+    def insert(self, run_id: str, records: List[TimingRecord]):
+        '''
+        Writes timing records into the database
+
+        Args:
+            run_id: The ID of the run the records were recorded in
+            records: The timing records to write
+        '''
+        rows = [
+            (
+                run_id,
+                record.test_hash,
+                record.kind.value,
+                record.browser,
+                record.step_index,
+                record.action,
+                record.recorded_at,
+                record.duration,
+            )
+            for record in records
+        ]
+
+        with self._connect() as conn:
+            conn.executemany('INSERT INTO timings VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
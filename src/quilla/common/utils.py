@@ -6,7 +6,12 @@ or alternatively attempting to resolve a valid enum given its type and the value
 '''
 
 
+import hashlib
+from weakref import WeakKeyDictionary
 from typing import (
+    Any,
+    Dict,
+    Tuple,
     Type,
     Optional,
     TypeVar
@@ -55,7 +60,15 @@ class EnumResolver:
     '''
     Utility class to define shared behaviour for classes that need to
     resolve string values into appropriate enums
+
+    The values of every enum are indexed the first time the enum is used, and the names
+    resolved by plugins are remembered for each plugin manager until the plugins that
+    implement the ``quilla_resolve_enum_from_name`` hook change
     '''
+    _enum_values: Dict[Type[Enum], Dict[Any, Enum]] = {}
+    _plugin_names: 'WeakKeyDictionary[Any, Tuple[tuple, Dict[Tuple[Type[Enum], str], Any]]]' = (
+        WeakKeyDictionary()
+    )
 
     # ctx type omitted due to circular import
     @classmethod
@@ -74,14 +87,66 @@ class EnumResolver:
             EnumValueNotFoundException: if this resolver fails to resolve an appropriate
                 enum value
         '''
-        for enum_obj in enum:
-            if enum_obj.value == name:
-                return enum_obj
+        enum_values = cls._enum_values.get(enum)
+        if enum_values is None:
+            enum_values = {enum_obj.value: enum_obj for enum_obj in enum}
+            cls._enum_values[enum] = enum_values
+
+        try:
+            enum_obj = enum_values.get(name)
+        except TypeError:  # Unhashable names can't match any value
+            enum_obj = None
+
+        if enum_obj is not None:
+            return enum_obj  # type: ignore
 
         if ctx is not None:
-            resolved_plugin_value = ctx.pm.hook.quilla_resolve_enum_from_name(name=name, enum=enum)
+            resolved_plugin_value = cls._plugin_name_to_enum(ctx.pm, name, enum)
 
             if resolved_plugin_value is not None:
                 return resolved_plugin_value
 
         raise EnumValueNotFoundException(name, enum)
+
+    @classmethod
+    def _plugin_name_to_enum(cls, pm, name: str, enum: Type[T]) -> Optional[T]:
+        '''
+        Resolves a name through the ``quilla_resolve_enum_from_name`` hook, reusing the
+        result of previous calls with the same name and enum if no plugin implementing
+        the hook has been registered or unregistered since
+        '''
+        hook = pm.hook.quilla_resolve_enum_from_name
+        hook_impls = tuple(impl.function for impl in hook.get_hookimpls())
+
+        cached = cls._plugin_names.get(pm)
+        if cached is None or cached[0] != hook_impls:
+            cached = (hook_impls, {})
+            cls._plugin_names[pm] = cached
+
+        resolved_names = cached[1]
+        key = (enum, name)
+
+        try:
+            return resolved_names[key]
+        except KeyError:
+            pass
+        except TypeError:  # Unhashable names can't be remembered
+            return hook(name=name, enum=enum)
+
+        resolved_names[key] = hook(name=name, enum=enum)
+
+        return resolved_names[key]
+
+
+def content_hash(data: str) -> str:
+    '''
+    Produces a stable hash of some text data, such as the contents of a Quilla test file.
+    Used to identify a test file regardless of where it is stored
+
+    Args:
+        data: The text to hash
+
+    Returns:
+        The hex digest of the SHA-256 hash of the data
+    '''
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
@@ -1,10 +1,11 @@
 import os
-import re
-from functools import lru_cache
+import copy
 from typing import (
+    Any,
     Optional,
     List,
     Dict,
+    Tuple,
     cast,
     TYPE_CHECKING,
 )
@@ -17,6 +18,7 @@ from logging import (
 import json
 import uuid
 from argparse import Namespace
+from datetime import date
 
 from pluggy import PluginManager
 import pydeepmerge as pdm
@@ -25,7 +27,18 @@ from quilla.common.exceptions import (
     InvalidContextExpressionException,
     InvalidOutputName,
 )
-from quilla.common.utils import DriverHolder
+from quilla.common.utils import (
+    DriverHolder,
+    content_hash,
+)
+from quilla.common.timing import TimingRecorder
+from quilla.common.expressions import (
+    ContextExpression,
+    ContextObject,
+    compile_template,
+    compile_templates,
+    parse_expression,
+)
 
 if TYPE_CHECKING:
     from quilla.steps.base_steps import BaseStep
@@ -51,6 +64,26 @@ class Context(DriverHolder):
         update_baseline: A list of baseline IDs to update during this run
         create_baseline_if_none: If true, instructs the storage plugin to create a new
             baseline image if none can be found for the given baseline ID
+        browser_workers: The maximum number of browsers of a single Quilla test that
+            are allowed to run concurrently
+        session_pool_size: The maximum number of idle browser sessions kept for reuse
+            for each browser target. Set to 0 to start a new browser for every test
+        session_max_reuse: The maximum number of tests a pooled browser session can be
+            used for before it is recycled. Set to 0 to reuse sessions indefinitely
+        batch_validations: Whether consecutive XPath validations should be evaluated
+            together with a single script call
+        snapshot_validations: Whether XPath validations that do not need the live browser
+            should be evaluated against a parsed snapshot of the page
+        wait_engine: How the wait actions wait for their targets. Either 'poll', to check the
+            condition at a fixed frequency, or 'observer', to have the browser report when the
+            condition is met
+        poll_frequency: How often the 'poll' wait engine checks its condition, in seconds
+        image_encoder_workers: The number of background threads used to encode the
+            VisualParity images that are stored. Set to 0 to encode them on the step thread
+        baseline_cache_size: The maximum memory, in megabytes, used to cache the decoded
+            VisualParity baseline images during the run. Set to 0 to disable the cache
+        image_upload_workers: The number of background threads used by the storage plugins
+            to store VisualParity images. Set to 0 to store them before the step finishes
 
 
     Attributes:
@@ -67,6 +100,10 @@ class Context(DriverHolder):
         logger: A logger instance. If None was passed in for the 'logger' argument, will create
             one with the default logger.
         run_id: A string that uniquely identifies the run of Quilla.
+        run_date: The date the run started, in ISO format. The worker processes of the batch
+            runner use the date of the main process
+        is_worker: Whether the context belongs to a worker process of the batch runner. Tasks
+            done once per run, such as cleaning up stored reports, are left to the main process
         pretty_print_indent: How many spaces to use for indentation when pretty-printing the output
         args: The Namespace object that parsed related arguments, if applicable
         update_all_baselines: Whether the VisualParity baselines should be updated or not
@@ -74,16 +111,34 @@ class Context(DriverHolder):
         current_step: The current step
         create_baseline_if_none: If true, instructs the storage plugin to create a new
             baseline image if none can be found for the given baseline ID
+        browser_workers: The maximum number of browsers of a single Quilla test that
+            are allowed to run concurrently
+        session_pool_size: The maximum number of idle browser sessions kept for reuse
+            for each browser target. Set to 0 to start a new browser for every test
+        session_max_reuse: The maximum number of tests a pooled browser session can be
+            used for before it is recycled. Set to 0 to reuse sessions indefinitely
+        batch_validations: Whether consecutive XPath validations should be evaluated
+            together with a single script call
+        snapshot_validations: Whether XPath validations that do not need the live browser
+            should be evaluated against a parsed snapshot of the page
+        wait_engine: How the wait actions wait for their targets. Either 'poll', to check the
+            condition at a fixed frequency, or 'observer', to have the browser report when the
+            condition is met
+        poll_frequency: How often the 'poll' wait engine checks its condition, in seconds
+        image_encoder_workers: The number of background threads used to encode the
+            VisualParity images that are stored. Set to 0 to encode them on the step thread
+        baseline_cache_size: The maximum memory, in megabytes, used to cache the decoded
+            VisualParity baseline images during the run. Set to 0 to disable the cache
+        image_upload_workers: The number of background threads used by the storage plugins
+            to store VisualParity images. Set to 0 to store them before the step finishes
+        timings: A recorder for the durations of the tests, browsers and steps. It is
+            shared by every context forked from this one
+        data_version: A counter that is incremented whenever the Validation, Outputs or
+            Definitions data stores change
     '''
     default_context: Optional['Context'] = None
     _drivers_path: str
-    _expression_regex = re.compile(r'\${{(.*)}}')
-    _context_obj_expression = re.compile(
-        # Used on the inside of the _expession_regex to
-        # find context objects embedded into the
-        # context expression regex
-        r'([a-zA-Z][a-zA-Z0-9_]+)(\.[a-zA-Z_][a-zA-Z0-9_]+)+'
-    )
+    _cached_roots = {'Validation', 'Definitions'}
     _output_browser: str = 'Firefox'
     current_step: Optional['BaseStep'] = None
     logger: Logger
@@ -105,6 +160,16 @@ class Context(DriverHolder):
         update_all_baselines: bool = False,
         update_baseline: List[str] = [],
         create_baseline_if_none: bool = False,
+        browser_workers: int = 1,
+        session_pool_size: int = 0,
+        session_max_reuse: int = 50,
+        batch_validations: bool = False,
+        snapshot_validations: bool = False,
+        wait_engine: str = 'poll',
+        poll_frequency: float = 0.5,
+        image_encoder_workers: int = 0,
+        baseline_cache_size: int = 0,
+        image_upload_workers: int = 0,
     ):
         super().__init__()
         self.pm = plugin_manager
@@ -118,6 +183,17 @@ class Context(DriverHolder):
         self.args = args
         path = Path(drivers_path)
         self.create_baseline_if_none = create_baseline_if_none
+        self.browser_workers = browser_workers
+        self.session_pool_size = session_pool_size
+        self.session_max_reuse = session_max_reuse
+        self.batch_validations = batch_validations
+        self.snapshot_validations = snapshot_validations
+        self.wait_engine = wait_engine
+        self.poll_frequency = poll_frequency
+        self.image_encoder_workers = image_encoder_workers
+        self.baseline_cache_size = baseline_cache_size
+        self.image_upload_workers = image_upload_workers
+        self.timings = TimingRecorder()
 
         if logger is None:
             self.logger = getLogger('quilla')
@@ -130,11 +206,16 @@ class Context(DriverHolder):
         else:
             self.run_id = run_id
 
+        self.run_date = date.today().isoformat()
+        self.is_worker = False
         self.update_all_baselines = update_all_baselines
         self.update_baseline = update_baseline
 
         self.drivers_path = str(path.resolve())
         self._context_data: Dict[str, dict] = {'Validation': {}, 'Outputs': {}, 'Definitions': {}}
+        self.data_version = 0
+        self._replacements: Dict[str, str] = {}
+        self._replacements_version = 0
         self._load_definition_files(definitions)
 
     def run(self):
@@ -148,6 +229,67 @@ class Context(DriverHolder):
         if self.args is not None:
             self.args.handler(self)
 
+    def fork(self) -> 'Context':
+        '''
+        Creates a copy of the context that shares the configurations, the plugin manager
+        and the definitions with this context, but has its own driver, current step, and
+        Validation/Outputs data stores. This allows multiple browsers to execute at the
+        same time without overwriting each other's runtime state.
+
+        Returns:
+            A new context object, with a copy of the current Validation data
+        '''
+        forked = copy.copy(self)
+        forked._driver = None
+        forked.current_step = None
+        forked._context_data = {
+            'Validation': copy.deepcopy(self._context_data['Validation']),
+            'Outputs': {},
+            'Definitions': self._context_data['Definitions'],
+        }
+        forked._replacements = {}
+
+        return forked
+
+    def merge_forked(self, forked: 'Context'):
+        '''
+        Merges the Validation and Outputs data stores of a context created through
+        ``fork`` back into this context, preferring the values of the forked context
+        wherever there is a conflict
+
+        Args:
+            forked: A context object created by calling ``fork`` on this context
+        '''
+        for data_store in ('Validation', 'Outputs'):
+            self._context_data[data_store] = pdm.deep_merge(
+                self._context_data[data_store],
+                forked._context_data[data_store],
+            )
+        self.data_version += 1
+
+    @property
+    def json(self) -> str:
+        '''
+        The json describing the validations of the current Quilla test
+        '''
+        return self._json
+
+    @json.setter
+    def json(self, v: str):
+        self._json = v
+        self._test_hash: Optional[str] = None
+
+    @property
+    def test_hash(self) -> str:
+        '''
+        The content hash of the current Quilla test, used to identify the test
+        regardless of where it is stored
+        '''
+        if self._test_hash is None:
+            self._test_hash = content_hash(self._json)
+
+        return self._test_hash
+
     @property
     def outputs(self) -> dict:
         '''
@@ -193,12 +335,15 @@ class Context(DriverHolder):
     def _set_path(self):
         os.environ['PATH'] = f'{self._path}:{self._drivers_path}'
 
-    @lru_cache
     def perform_replacements(self, text: str) -> str:
         '''
         Extracts any relevant context expressions from the text and attempts to
         making suitable replacements for the context objects
 
+        The text is compiled once into a template, and the result is cached until the
+        data stores change. Results that depend on the Environment or on context objects
+        provided by plugins are never cached, since their values can change at any time
+
         Args:
             text: Any string that supports context expressions
 
@@ -211,81 +356,149 @@ class Context(DriverHolder):
             >>> ctx.perform_replacements('/api/${{ Validation.name }}/get')
             '/api/examplesvc/get'
         '''
-        self.logger.debug('Performing replacement function on %s', text)
-        while (expression_match := self._expression_regex.search(text)) is not None:
-            expression = expression_match.group(1).strip()
-            self.logger.debug('Found expression match: %s', expression)
-            processed = self._process_objects(expression)
+        if '${{' not in text:
+            return text
 
-            self.logger.debug('Post-processing, expression value is: %s', processed)
+        if self._replacements_version != self.data_version:
+            self._replacements = {}
+            self._replacements_version = self.data_version
 
-            text = (
-                text[:expression_match.start()] +
-                f'{processed}' +
-                text[expression_match.end():]
-            )
-        return text
+        result = self._replacements.get(text)
+        if result is not None:
+            return result
 
-    def _escape_quotes(self, text: str) -> str:
-        return text.replace("'", "\\'")
+        self.logger.debug('Performing replacement function on %s', text)
+        result, is_cacheable = self._render(text)
 
-    def _process_objects(self, expression: str) -> str:
+        if is_cacheable:
+            self._replacements[text] = result
+
+        return result
+
+    def _render(self, text: str) -> Tuple[str, bool]:
         '''
-        Performs context object replacement to ensure that the returned string is ready for
-        the eval that will occur in perform_replacements
+        Resolves every context expression in the text. Values that themselves contain
+        context expressions, such as definitions that refer to other definitions, are
+        resolved as well
 
         Args:
-            expression: a string that matches the _expression_regex regular expression
+            text: Any string that supports context expressions
 
         Returns:
-            an eval-ready string wherein all the valid context objects have been replaced
-            with the appropriate values from their respective sources
+            The resulting string, and whether it only depends on the data stores
         '''
-        while (object_match := self._context_obj_expression.search(expression)) is not None:
-            object_expression = object_match.group(0)  # Grab the full expression
+        template = compile_template(text)
+        if template.is_static:
+            return text, True
 
-            root, *path = object_expression.split('.')
-            repl_value = ''
+        chunks: List[str] = []
+        is_cacheable = True
 
-            if root == 'Environment':
-                repl_value = self._escape_quotes(os.environ.get('.'.join(path), ''))
-            elif root == 'Validation' or root == 'Definitions':
-                data = self._context_data[root]
-                data = self._walk_data_tree(data, path, object_expression)
+        for segment in template.segments:
+            if isinstance(segment, str):
+                chunks.append(segment)
+                continue
 
-                repl_value = cast(str, data)
-            elif self.pm is not None:
-                # Pass it to the defined hooks
+            value, is_value_cacheable = self._render_expression(segment)
+            is_cacheable = is_cacheable and is_value_cacheable
+            chunks.append(value)
 
-                self.logger.debug(
-                    'Context object "%s" does not match known options, forwarding to plugins',
-                    root
-                )
+        result = ''.join(chunks)
+        self.logger.debug('Post-processing, text value is: %s', result)
 
-                hook_results = self.pm.hook.quilla_context_obj(
-                    ctx=self,
-                    root=root,
-                    path=tuple(path)
-                )  # type: ignore
+        return result, is_cacheable
 
-                # Hook results will always be either size 1 or 0
-                if hook_results is None:
-                    repl_value = ''
+    def _render_expression(self, expression: ContextExpression) -> Tuple[str, bool]:
+        '''
+        Resolves a single context expression. Nested expressions are resolved first, and
+        their results are then searched for context objects along with the rest of the
+        expression
+
+        Args:
+            expression: A context expression compiled from a text
+
+        Returns:
+            The value of the expression, and whether it only depends on the data stores
+        '''
+        is_cacheable = True
+
+        if expression.is_nested:
+            chunks: List[str] = []
+            for part in expression.parts:
+                if isinstance(part, ContextExpression):
+                    value, is_value_cacheable = self._render_expression(part)
+                    is_cacheable = is_cacheable and is_value_cacheable
+                    chunks.append(value)
                 else:
-                    repl_value = hook_results
+                    chunks.append(cast(str, part))
 
-            if repl_value == '':
-                self.logger.info(
-                    'Context expression "%s" does not resolve to any value',
-                    object_expression
-                )
+            expression = parse_expression(''.join(chunks).strip())
+
+        chunks = []
+        for part in expression.parts:
+            if isinstance(part, ContextObject):
+                chunks.append(f'{self._resolve_object(part)}')
+                is_cacheable = is_cacheable and part.root in self._cached_roots
+            else:
+                chunks.append(cast(str, part))
+
+        result = ''.join(chunks)
+
+        if '${{' in result:
+            # The value refers to other context objects, such as a definition that
+            # is built from other definitions
+            result, is_expansion_cacheable = self._render(result)
+            is_cacheable = is_cacheable and is_expansion_cacheable
+
+        return result, is_cacheable
+
+    def _escape_quotes(self, text: str) -> str:
+        return text.replace("'", "\\'")
+
+    def _resolve_object(self, context_object: ContextObject) -> Any:
+        '''
+        Retrieves the value of a single context object from its respective source
 
-            expression = (
-                expression[:object_match.start()] +
-                f'{repl_value}' +
-                expression[object_match.end():]
+        Args:
+            context_object: A context object compiled from a context expression
+
+        Returns:
+            The value of the context object, or an empty string if it could not be resolved
+        '''
+        root = context_object.root
+        path = context_object.path
+        repl_value: Any = ''
+
+        if root == 'Environment':
+            repl_value = self._escape_quotes(os.environ.get('.'.join(path), ''))
+        elif root in self._cached_roots:
+            data = self._context_data[root]
+            repl_value = self._walk_data_tree(data, path, context_object.expression)
+        elif self.pm is not None:
+            # Pass it to the defined hooks
+
+            self.logger.debug(
+                'Context object "%s" does not match known options, forwarding to plugins',
+                root
+            )
+
+            hook_results = self.pm.hook.quilla_context_obj(
+                ctx=self,
+                root=root,
+                path=path
+            )  # type: ignore
+
+            # Hook results will always be either size 1 or 0
+            if hook_results is not None:
+                repl_value = hook_results
+
+        if repl_value == '':
+            self.logger.info(
+                'Context expression "%s" does not resolve to any value',
+                context_object.expression
             )
-        return expression
+
+        return repl_value
 
     def _walk_data_tree(self, data, exp, object_expression):
         for entry in exp:
@@ -342,6 +555,7 @@ class Context(DriverHolder):
             )
 
         store[name] = value  # type: ignore
+        self.data_version += 1
 
     def _load_definition_files(self, definition_files: List[str]):
         '''
@@ -358,6 +572,32 @@ class Context(DriverHolder):
 
         self.logger.debug('Final Definition object: "%s"', self._context_data['Definitions'])
 
+    def verify_definitions(self, value: Any):
+        '''
+        Checks that every definition referenced by the context expressions of a value
+        exists, so that a missing definition is reported when a test is loaded instead of
+        when the step that uses it is performed. Definitions that are only known once a
+        nested expression is resolved are not checked
+
+        Args:
+            value: A string, or a dictionary or list that can contain strings
+
+        Raises:
+            InvalidContextExpressionException: if a referenced definition does not exist
+        '''
+        for template in compile_templates(value):
+            for context_object in template.objects:
+                if context_object.root != 'Definitions':
+                    continue
+
+                data: Any = self._context_data['Definitions']
+                for entry in context_object.path:
+                    if not isinstance(data, dict) or entry not in data:
+                        raise InvalidContextExpressionException(
+                            f'\'{context_object.expression}\' does not exist'
+                        )
+                    data = data[entry]
+
     def load_definitions(self, definitions_dict: dict):
         '''
         Loads the given dictionary into the context data, merging the dictionaries and preferring
@@ -373,6 +613,7 @@ class Context(DriverHolder):
             self._context_data['Definitions'],
             definitions_dict
         )
+        self.data_version += 1
 
 
 def get_default_context(
@@ -392,6 +633,16 @@ def get_default_context(
         update_all_baselines: bool = False,
         update_baseline: List[str] = [],
         create_baseline_if_none: bool = False,
+        browser_workers: int = 1,
+        session_pool_size: int = 0,
+        session_max_reuse: int = 50,
+        batch_validations: bool = False,
+        snapshot_validations: bool = False,
+        wait_engine: str = 'poll',
+        poll_frequency: float = 0.5,
+        image_encoder_workers: int = 0,
+        baseline_cache_size: int = 0,
+        image_upload_workers: int = 0,
 ) -> Context:
     '''
     Gets the default context, creating a new one if necessary.
@@ -416,6 +667,26 @@ def get_default_context(
         update_all_baselines: Whether the VisualParity baselines should be updated or not
         create_baseline_if_none: If true, instructs the storage plugin to create a new
             baseline image if none can be found for the given baseline ID
+        browser_workers: The maximum number of browsers of a single Quilla test that
+            are allowed to run concurrently
+        session_pool_size: The maximum number of idle browser sessions kept for reuse
+            for each browser target. Set to 0 to start a new browser for every test
+        session_max_reuse: The maximum number of tests a pooled browser session can be
+            used for before it is recycled. Set to 0 to reuse sessions indefinitely
+        batch_validations: Whether consecutive XPath validations should be evaluated
+            together with a single script call
+        snapshot_validations: Whether XPath validations that do not need the live browser
+            should be evaluated against a parsed snapshot of the page
+        wait_engine: How the wait actions wait for their targets. Either 'poll', to check the
+            condition at a fixed frequency, or 'observer', to have the browser report when the
+            condition is met
+        poll_frequency: How often the 'poll' wait engine checks its condition, in seconds
+        image_encoder_workers: The number of background threads used to encode the
+            VisualParity images that are stored. Set to 0 to encode them on the step thread
+        baseline_cache_size: The maximum memory, in megabytes, used to cache the decoded
+            VisualParity baseline images during the run. Set to 0 to disable the cache
+        image_upload_workers: The number of background threads used by the storage plugins
+            to store VisualParity images. Set to 0 to store them before the step finishes
 
     Returns
         Application context shared for the entire application
@@ -440,5 +711,15 @@ def get_default_context(
             update_all_baselines,
             update_baseline,
             create_baseline_if_none,
+            browser_workers,
+            session_pool_size,
+            session_max_reuse,
+            batch_validations,
+            snapshot_validations,
+            wait_engine,
+            poll_frequency,
+            image_encoder_workers,
+            baseline_cache_size,
+            image_upload_workers,
         )
     return Context.default_context
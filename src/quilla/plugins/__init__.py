@@ -9,6 +9,8 @@ from quilla import hookspecs
 
 from .local_storage import LocalStorage
 from .blob_storage import BlobStorage
+from .timing_history import TimingHistory
+from .baseline_prefetch import BaselinePrefetch
 
 
 _hookimpl = pluggy.HookimplMarker('quilla')
@@ -122,6 +124,8 @@ def _load_bundled_plugins(pm: pluggy.PluginManager, logger: Logger):
     bundled_plugins = [
         LocalStorage,
         BlobStorage,
+        TimingHistory,
+        BaselinePrefetch,
     ]
 
     for plugin in bundled_plugins:
@@ -9,15 +9,26 @@ from abc import (
     abstractproperty,
     abstractmethod
 )
+import threading
 from typing import (
     Optional
 )
 
 from quilla.ctx import Context
 from quilla.common.enums import VisualParityImageType
+from quilla.reports import (
+    ReportSummary,
+    VisualParityReport,
+)
+
+from .upload_queue import UploadQueue
 
 
 class BaseStorage(ABC):
+    _cleaned_up_run_id: Optional[str] = None
+    _upload_queue: Optional[UploadQueue] = None
+    _upload_queue_lock = threading.Lock()
+
     @abstractproperty
     def is_enabled(self) -> bool:
         '''
@@ -49,6 +60,9 @@ class BaseStorage(ABC):
         Searches for reports that match some cleanup criteria, and deletes them
         if necessary. Not every storage plugin will implement logic for this function,
         choosing instead to have all images exist indefinitely.
+
+        This is called at most once per run, after the first Quilla test of the run
+        has been validated
         '''
 
     @abstractmethod
@@ -96,6 +110,28 @@ class BaseStorage(ABC):
             A URI for the new baseline image
         '''
 
+    def store_delta_image(
+        self,
+        run_id: str,
+        baseline_id: str,
+        delta: bytes,
+    ) -> str:
+        '''
+        Stores an image that highlights the differences between the baseline and treatment
+        images of a failed VisualParity validation. Storing delta images is optional, so the
+        default implementation does not store anything
+
+        Args:
+            run_id: The run ID of the current Quilla run, to version the delta images
+            baseline_id: The ID of the baseline that this delta image is associated with
+            delta: The image data in bytes
+
+        Returns:
+            An identifier that can locate the newly stored delta image, or the empty
+            string if delta images are not supported
+        '''
+        return ''
+
     @abstractmethod
     def make_baseline_uri(
         self,
@@ -118,6 +154,28 @@ class BaseStorage(ABC):
             A URI that can locate the baseline image used for the given run
         '''
 
+    def image_uri(
+        self,
+        run_id: str,
+        baseline_id: str,
+        image_type: VisualParityImageType,
+    ) -> Optional[str]:
+        '''
+        Determines the URI an image will have once it is stored, without storing it. Plugins
+        that know the URI in advance allow their images to be stored in the background when
+        the '--image-upload-workers' option is used. The default implementation does not know
+        any URI in advance, so images are always stored before the validation continues
+
+        Args:
+            run_id: The ID of the current run of Quilla
+            baseline_id: The unique identifier for the image
+            image_type: The kind of image that will be stored
+
+        Returns:
+            The URI of the image, or None if it is only known once the image is stored
+        '''
+        return None
+
     def get_image(self, baseline_id: str) -> Optional[bytes]:
         '''
         Determines if the plugin should run, and if so searches for the image
@@ -183,18 +241,29 @@ class BaseStorage(ABC):
         function_selector = {
             VisualParityImageType.TREATMENT: self.store_treatment_image,
             VisualParityImageType.BASELINE: self.store_baseline_image,
+            VisualParityImageType.DELTA: self.store_delta_image,
         }
 
         store_image_function = function_selector[image_type]
 
+        if ctx.image_upload_workers > 0:
+            queued_uri = self.image_uri(run_id, baseline_id, image_type)
+
+            if queued_uri is not None:
+                return self._get_upload_queue(ctx.image_upload_workers).submit(
+                    queued_uri,
+                    store_image_function,
+                    run_id,
+                    baseline_id,
+                    image_bytes,
+                )
+
         image_uri = store_image_function(
             run_id,
             baseline_id,
             image_bytes
         )
 
-        self.cleanup_reports()
-
         return image_uri
 
     def quilla_get_baseline_uri(self, run_id: str, baseline_id: str) -> Optional[str]:
@@ -202,3 +271,77 @@ class BaseStorage(ABC):
 
     def quilla_get_visualparity_baseline(self, baseline_id: str) -> Optional[bytes]:
         return self.get_image(baseline_id)
+
+    def _get_upload_queue(self, workers: int) -> UploadQueue:
+        with self._upload_queue_lock:
+            if self._upload_queue is None:
+                self._upload_queue = UploadQueue(workers)
+
+            return self._upload_queue
+
+    def flush_uploads(self, reports: ReportSummary):
+        '''
+        Waits until every image queued by this plugin has been stored. The reports that
+        refer to an image that could not be stored fail, and their message describes
+        the error
+
+        Args:
+            reports: The reports of the Quilla test that was just validated
+        '''
+        if self._upload_queue is None:
+            return
+
+        errors = dict(self._upload_queue.flush())
+
+        if not errors:
+            return
+
+        for report in reports.reports:
+            if not isinstance(report, VisualParityReport):
+                continue
+
+            for attribute in ('baseline_image_uri', 'treatment_image_uri', 'delta_image_uri'):
+                uri = getattr(report, attribute)
+
+                if uri not in errors:
+                    continue
+
+                if report.success:
+                    report.success = False
+                    reports.successes -= 1
+                    reports.fails += 1
+
+                setattr(report, attribute, '')
+                report.msg = '%s%sUnable to store image %s: %s' % (
+                    report.msg,
+                    '. ' if report.msg else '',
+                    uri,
+                    errors[uri],
+                )
+
+    def quilla_postvalidate(self, ctx: Context, reports: ReportSummary):
+        '''
+        Waits for the queued images to be stored, then cleans up the stored reports
+        once per run
+
+        Args:
+            ctx: The runtime context for Quilla
+            reports: The reports of the Quilla test that was just validated
+        '''
+        self.flush_uploads(reports)
+        self.cleanup_run(ctx)
+
+    def cleanup_run(self, ctx: Context):
+        '''
+        Cleans up the stored reports, unless they were already cleaned up during the current
+        run. Worker processes of the batch runner never clean up the stored reports, since
+        the main process does it once for the whole run
+
+        Args:
+            ctx: The runtime context for Quilla
+        '''
+        if not self.is_enabled or ctx.is_worker or self._cleaned_up_run_id == ctx.run_id:
+            return
+
+        self._cleaned_up_run_id = ctx.run_id
+        self.cleanup_reports()
@@ -0,0 +1,76 @@
+'''
+A plugin that downloads the VisualParity baseline images of a Quilla test concurrently
+before its validations start, so that the browsers find them in the baseline cache instead
+of waiting for each download in turn.
+
+The plugin only runs when the baseline cache is enabled through ``--baseline-cache-size``.
+'''
+
+from typing import List
+
+from quilla.common.enums import (
+    UITestActions,
+    XPathValidationStates,
+)
+from quilla.steps.validations.baseline_cache import get_baseline_cache
+from quilla.ui_validation import QuillaTest
+
+
+class BaselinePrefetch:
+    '''
+    Prefetches the baseline images used by the VisualParity validations of every Quilla test
+    '''
+
+    def baseline_ids(self, validation: QuillaTest) -> List[str]:
+        '''
+        Finds the baseline IDs of every VisualParity validation in a Quilla test that needs
+        to be compared against its baseline. Baselines that are being updated, and baseline
+        IDs that depend on context expressions, are skipped
+
+        Args:
+            validation: The Quilla test to search
+
+        Returns:
+            The baseline IDs, in the order they are first used
+        '''
+        ctx = validation.ctx
+
+        if ctx.update_all_baselines:
+            return []
+
+        baseline_ids: List[str] = []
+
+        for planned_step in validation.plan:
+            step = planned_step.definition
+
+            if step['action'] != UITestActions.VALIDATE or \
+                    step.get('state') != XPathValidationStates.VISUAL_PARITY:
+                continue
+
+            baseline_id = step.get('parameters', {}).get('baselineID')
+
+            if not isinstance(baseline_id, str) or '${{' in baseline_id:
+                continue
+
+            if baseline_id not in ctx.update_baseline and baseline_id not in baseline_ids:
+                baseline_ids.append(baseline_id)
+
+        return baseline_ids
+
+    def quilla_prevalidate(self, validation: QuillaTest):
+        '''
+        Starts downloading the baseline images of the Quilla test in the background
+
+        Args:
+            validation: The Quilla test about to be validated
+        '''
+        baseline_cache = get_baseline_cache(validation.ctx)
+
+        if baseline_cache is None:
+            return
+
+        baseline_ids = self.baseline_ids(validation)
+
+        if baseline_ids:
+            validation.ctx.logger.debug('Prefetching baselines %s', baseline_ids)
+            baseline_cache.prefetch(validation.ctx, baseline_ids)
@@ -1,4 +1,9 @@
+from hashlib import md5
+from pathlib import Path
 from typing import (
+    Dict,
+    Iterator,
+    List,
     Optional,
     cast,
 )
@@ -6,19 +11,52 @@ from argparse import (
     ArgumentParser,
     Namespace
 )
-from datetime import datetime
+from datetime import (
+    date,
+    datetime,
+)
+
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceNotFoundError,
+    ResourceNotModifiedError,
+)
+from azure.storage.blob import (
+    BlobClient,
+    ContainerClient,
+    ContentSettings,
+)
 
-from azure.storage.blob import ContainerClient
+from quilla.common.enums import VisualParityImageType
+from quilla.ui_validation import QuillaTest
 
 from .base_storage import BaseStorage
+from .disk_cache import (
+    BaselineDiskCache,
+    default_cache_dir,
+)
+
+
+# Maximum number of blobs deleted by a single batch request
+_delete_batch_size = 256
 
 
 class BlobStorage(BaseStorage):
+    '''
+    Stores the VisualParity images in an Azure Blob Storage container.
+
+    Baselines are stored under 'baselines/', and the images of each run under
+    'runs/{date}/{run_id}/', partitioned by the date the run started so that the runs of
+    whole days can be cleaned up together
+    '''
     _container_client: Optional[ContainerClient]
+    _disk_cache: Optional[BaselineDiskCache]
     max_retention_days: int
 
     def __init__(self):
         self._container_client = None
+        self._disk_cache = None
+        self._run_prefixes: Dict[str, str] = {}
 
     def quilla_addopts(self, parser: ArgumentParser):
         '''
@@ -57,11 +95,46 @@ class BlobStorage(BaseStorage):
             'reports be kept indefinitely.'
         )
 
+        az_group.add_argument(
+            '--blob-cache-dir',
+            dest='blob_cache_dir',
+            nargs='?',
+            const=str(default_cache_dir),
+            default=None,
+            metavar='PATH',
+            help='Caches the downloaded baseline images on disk, so that baselines that did '
+            'not change are not downloaded again. Cached baselines are revalidated with their '
+            f'ETag. If no path is given, the cache is kept in {default_cache_dir}'
+        )
+
+        az_group.add_argument(
+            '--blob-cache-ttl',
+            dest='blob_cache_ttl',
+            type=int,
+            default=0,
+            metavar='SECONDS',
+            help='How long a baseline cached with --blob-cache-dir is used without checking '
+            'whether it changed. Defaults to 0, which checks every baseline once per download'
+        )
+
+        az_group.add_argument(
+            '--blob-cache-size',
+            dest='blob_cache_size',
+            type=int,
+            default=1024,
+            metavar='MB',
+            help='The maximum size of the baselines cached with --blob-cache-dir, in megabytes. '
+            'The least recently used baselines are evicted first. Defaults to 1024'
+        )
+
     def configure(
         self,
         connection_string: str,
         container_name: str,
         retention_days: int,
+        cache_dir: Optional[str] = None,
+        cache_ttl: int = 0,
+        cache_size: int = 1024,
     ):
         '''
         Configure the container client and other necessary data, such as the max cleanup time.
@@ -73,6 +146,10 @@ class BlobStorage(BaseStorage):
             container_name: The name of the container that should be used to store all images
             retention_days: The maximum number of days a report should be allowed to have before
                 being cleaned up
+            cache_dir: An optional directory to cache the downloaded baselines in
+            cache_ttl: How many seconds a cached baseline is used without checking whether
+                it changed
+            cache_size: The maximum size of the cached baselines, in megabytes
         '''
         self._container_client = client = ContainerClient.from_connection_string(
             connection_string,
@@ -80,6 +157,14 @@ class BlobStorage(BaseStorage):
         )
 
         self.max_retention_days = retention_days
+
+        if cache_dir is not None:
+            self._disk_cache = BaselineDiskCache(
+                Path(cache_dir),
+                max_age=cache_ttl,
+                max_bytes=cache_size * 1024 * 1024,
+            )
+
         try:
             if not client.exists():
                 client.create_container()
@@ -113,6 +198,9 @@ class BlobStorage(BaseStorage):
             args.connection_string,
             args.container_name,
             args.retention_days,
+            args.blob_cache_dir,
+            args.blob_cache_ttl,
+            args.blob_cache_size,
         )
 
     @property
@@ -122,6 +210,9 @@ class BlobStorage(BaseStorage):
     def find_image_by_baseline(self, baseline_id: str) -> bytes:
         blob = self.container_client.get_blob_client(f'baselines/{baseline_id}.png')
 
+        if self._disk_cache is not None:
+            return self._find_cached_image(blob)
+
         if not blob.exists():
             return b''
 
@@ -131,39 +222,243 @@ class BlobStorage(BaseStorage):
 
         return blob_data
 
+    def _find_cached_image(self, blob: BlobClient) -> bytes:
+        '''
+        Retrieves a baseline through the disk cache. A cached baseline is only downloaded
+        again if its ETag changed
+
+        Args:
+            blob: The client of the baseline blob
+
+        Returns:
+            The image data, or an empty bytes object if the baseline does not exist
+        '''
+        disk_cache = cast(BaselineDiskCache, self._disk_cache)
+        cached_data, etag, fresh = disk_cache.lookup(blob.url)
+
+        if cached_data is not None and fresh:
+            return cached_data
+
+        try:
+            if cached_data is not None:
+                downloader = blob.download_blob(
+                    etag=etag,
+                    match_condition=MatchConditions.IfModified,
+                )
+            else:
+                downloader = blob.download_blob()
+        except ResourceNotModifiedError:
+            disk_cache.touch(blob.url)
+            return cast(bytes, cached_data)
+        except ResourceNotFoundError:
+            disk_cache.discard(blob.url)
+            return b''
+
+        blob_data = downloader.readall()
+        disk_cache.store(blob.url, blob_data, downloader.properties.etag)
+
+        return blob_data
+
+    def _content_md5(self, blob: BlobClient) -> Optional[bytes]:
+        '''
+        Retrieves the MD5 hash of the contents of a blob
+
+        Args:
+            blob: The client of the blob
+
+        Returns:
+            The MD5 hash, or None if the blob does not exist or has no stored hash
+        '''
+        try:
+            content_md5 = blob.get_blob_properties().content_settings.content_md5
+        except ResourceNotFoundError:
+            return None
+
+        return bytes(content_md5) if content_md5 else None
+
+    def _copy_blob(self, source: BlobClient, destination: BlobClient) -> bool:
+        '''
+        Copies a blob within the container without downloading it, using a server-side
+        copy. The copy is skipped if the destination already has the same contents
+
+        Args:
+            source: The client of the blob to copy
+            destination: The client of the blob to copy it to
+
+        Returns:
+            True if the source blob exists, False otherwise
+        '''
+        source_md5 = self._content_md5(source)
+
+        if source_md5 is None and not source.exists():
+            return False
+
+        if source_md5 is None or self._content_md5(destination) != source_md5:
+            destination.start_copy_from_url(source.url)
+
+        return True
+
     def store_baseline_image(self, run_id: str, baseline_id: str, baseline: bytes) -> str:
-        blob = self.container_client.get_blob_client(f'baselines/{baseline_id}.png')
+        blob = self.container_client.get_blob_client(
+            self.image_blob_name(run_id, baseline_id, VisualParityImageType.BASELINE)
+        )
         snapshot = self.container_client.get_blob_client(
             f'baselines/snapshots/{run_id}/{baseline_id}.png'
         )
 
-        blob.upload_blob(baseline, overwrite=True)
-        snapshot.upload_blob(baseline)
+        baseline_md5 = md5(baseline).digest()
+
+        # Baselines that did not change are not uploaded again
+        if self._content_md5(blob) != baseline_md5:
+            result = blob.upload_blob(
+                baseline,
+                overwrite=True,
+                content_settings=ContentSettings(
+                    content_type='image/png',
+                    content_md5=bytearray(baseline_md5),
+                ),
+            )
+
+            if self._disk_cache is not None:
+                self._disk_cache.store(blob.url, baseline, result['etag'])
+
+        self._copy_blob(blob, snapshot)
 
         return blob.url
 
+    def quilla_prevalidate(self, validation: QuillaTest):
+        '''
+        Records the prefix of the blobs stored for the run of the Quilla test, using the date
+        the run started. Every image of the run, including those stored by the worker
+        processes of the batch runner, is then stored under the same date
+
+        Args:
+            validation: The Quilla test about to be validated
+        '''
+        ctx = validation.ctx
+        self._run_prefixes.setdefault(ctx.run_id, f'runs/{ctx.run_date}/{ctx.run_id}/')
+
+    def run_prefix(self, run_id: str) -> str:
+        '''
+        Gets the prefix of the blobs stored for a run. The date of the prefix is the date
+        the run started, or the date the run first stored an image if the run was never
+        recorded, so runs that span midnight are kept together
+
+        Args:
+            run_id: The unique ID for the run
+
+        Returns:
+            The prefix, in the form 'runs/{date}/{run_id}/'
+        '''
+        if run_id not in self._run_prefixes:
+            self._run_prefixes[run_id] = f'runs/{date.today().isoformat()}/{run_id}/'
+
+        return self._run_prefixes[run_id]
+
+    def image_blob_name(
+        self,
+        run_id: str,
+        baseline_id: str,
+        image_type: VisualParityImageType,
+    ) -> str:
+        '''
+        Gets the name of the blob an image is stored in
+
+        Args:
+            run_id: The unique ID for the run
+            baseline_id: The unique identifier for the image
+            image_type: The kind of image
+
+        Returns:
+            The name of the blob
+        '''
+        if image_type == VisualParityImageType.BASELINE:
+            return f'baselines/{baseline_id}.png'
+
+        suffix = {
+            VisualParityImageType.TREATMENT: 'treatment',
+            VisualParityImageType.DELTA: 'delta',
+        }[image_type]
+
+        return f'{self.run_prefix(run_id)}{baseline_id}_{suffix}.png'
+
+    def image_uri(
+        self,
+        run_id: str,
+        baseline_id: str,
+        image_type: VisualParityImageType,
+    ) -> Optional[str]:
+        return self.container_client.get_blob_client(
+            self.image_blob_name(run_id, baseline_id, image_type)
+        ).url
+
     def store_treatment_image(self, run_id: str, baseline_id: str, treatment: bytes) -> str:
-        blob = self.container_client.get_blob_client(f'runs/{run_id}/{baseline_id}_treatment.png')
+        blob = self.container_client.get_blob_client(
+            self.image_blob_name(run_id, baseline_id, VisualParityImageType.TREATMENT)
+        )
         blob.upload_blob(treatment)
 
         return blob.url
 
+    def store_delta_image(self, run_id: str, baseline_id: str, delta: bytes) -> str:
+        blob = self.container_client.get_blob_client(
+            self.image_blob_name(run_id, baseline_id, VisualParityImageType.DELTA)
+        )
+        blob.upload_blob(delta)
+
+        return blob.url
+
     def make_baseline_uri(self, run_id: str, baseline_id: str) -> str:
-        baseline_data = self.find_image_by_baseline(baseline_id)
-        blob = self.container_client.get_blob_client(f'runs/{run_id}/{baseline_id}.png')
+        baseline = self.container_client.get_blob_client(f'baselines/{baseline_id}.png')
+        blob = self.container_client.get_blob_client(f'{self.run_prefix(run_id)}{baseline_id}.png')
 
-        blob.upload_blob(baseline_data)
+        if not self._copy_blob(baseline, blob):
+            return ''
 
         return blob.url
 
-    def cleanup_reports(self):
-        blobs = self.container_client.list_blobs()
+    def _expired_blobs(self) -> Iterator[str]:
+        '''
+        Finds the names of every blob stored for a run that is older than the retention period.
+        Runs are listed by their date prefix, so the blobs of days that are still retained are
+        never listed. Runs stored before the images were partitioned by date are checked blob
+        by blob
+        '''
+        today = date.today()
         current_time = datetime.now()
 
-        for blob in filter(lambda x: 'runs' in x.name, blobs):
-            time_created: datetime = datetime.fromtimestamp(blob.creation_time.timestamp())
+        for item in self.container_client.walk_blobs(name_starts_with='runs/', delimiter='/'):
+            prefix = item.name
+
+            try:
+                run_date: Optional[date] = date.fromisoformat(prefix[len('runs/'):].rstrip('/'))
+            except ValueError:
+                run_date = None
+
+            if run_date is not None:
+                if (today - run_date).days > self.max_retention_days:
+                    blobs = self.container_client.list_blobs(name_starts_with=prefix)
+                    yield from (blob.name for blob in blobs)
+                continue
+
+            for blob in self.container_client.list_blobs(name_starts_with=prefix):
+                time_created = datetime.fromtimestamp(blob.creation_time.timestamp())
+
+                if (current_time - time_created).days > self.max_retention_days:
+                    yield blob.name
+
+    def cleanup_reports(self):
+        if self.max_retention_days < 0:
+            return
+
+        batch: List[str] = []
+
+        for blob_name in self._expired_blobs():
+            batch.append(blob_name)
+
+            if len(batch) == _delete_batch_size:
+                self.container_client.delete_blobs(*batch, raise_on_any_failure=False)
+                batch = []
 
-            delta = current_time - time_created
-            if self.max_retention_days > -1 and delta.days > self.max_retention_days:
-                blob_client = self.container_client.get_blob_client(blob)
-                blob_client.delete_blob()
+        if batch:
+            self.container_client.delete_blobs(*batch, raise_on_any_failure=False)
@@ -0,0 +1,173 @@
+'''
+This module contains an on-disk cache of baseline images downloaded from remote storage.
+
+Images are stored once by the SHA-256 hash of their contents, and each cached blob keeps a
+small reference file with the hash and the ETag of the version that was downloaded. A cached
+baseline is revalidated with a conditional request, so an unchanged baseline only costs a
+metadata round trip, or nothing at all while the reference is still fresh. Every file is
+written atomically, so the cache can be shared by multiple Quilla processes.
+'''
+
+import json
+import os
+import tempfile
+import time
+from hashlib import sha256
+from pathlib import Path
+from typing import (
+    Optional,
+    Tuple,
+)
+
+
+default_cache_dir = Path.home() / '.cache' / 'quilla' / 'baselines'
+
+
+def write_atomically(path: Path, data: bytes):
+    '''
+    Writes a file by writing a temporary file in the same directory and then renaming it,
+    so that other processes never read a partially written file
+    '''
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class BaselineDiskCache:
+    '''
+    A content-addressed disk cache of baseline images, with a size cap and LRU eviction
+
+    Args:
+        directory: The directory of the cache. It is created if it does not exist
+        max_age: How many seconds a cached baseline is used without checking whether it
+            changed. Set to 0 to always check
+        max_bytes: The maximum size of the cached images. The least recently used images
+            are evicted first
+
+    Attributes:
+        directory: The directory of the cache
+        max_age: How many seconds a cached baseline is used without checking whether it changed
+        max_bytes: The maximum size of the cached images
+    '''
+    def __init__(self, directory: Path, max_age: int = 0, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._objects = directory / 'objects'
+        self._refs = directory / 'refs'
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._refs.mkdir(parents=True, exist_ok=True)
+
+    def _ref_path(self, key: str) -> Path:
+        return self._refs / f'{sha256(key.encode()).hexdigest()}.json'
+
+    def _object_path(self, digest: str) -> Path:
+        return self._objects / f'{digest}.png'
+
+    def lookup(self, key: str) -> Tuple[Optional[bytes], Optional[str], bool]:
+        '''
+        Looks up a cached image
+
+        Args:
+            key: The key of the image, such as the URL of the blob
+
+        Returns:
+            The cached data, the ETag it was downloaded with, and whether it is still fresh
+            enough to be used without being revalidated. The data and ETag are None if the
+            image is not cached
+        '''
+        try:
+            ref = json.loads(self._ref_path(key).read_text())
+            object_path = self._object_path(ref['sha256'])
+            data = object_path.read_bytes()
+            # The modification time of an object is the last time it was used
+            os.utime(object_path)
+        except (OSError, ValueError, KeyError):
+            return None, None, False
+
+        fresh = time.time() - ref['checked_at'] < self.max_age
+
+        return data, ref['etag'], fresh
+
+    def store(self, key: str, data: bytes, etag: str):
+        '''
+        Adds an image to the cache, or replaces the cached version of it
+
+        Args:
+            key: The key of the image, such as the URL of the blob
+            data: The image data
+            etag: The ETag of the version of the image
+        '''
+        digest = sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+
+        if object_path.exists():
+            os.utime(object_path)
+        else:
+            write_atomically(object_path, data)
+
+        self._write_ref(key, digest, etag)
+        self.evict()
+
+    def touch(self, key: str):
+        '''
+        Records that a cached image was just revalidated, so that it is fresh again
+
+        Args:
+            key: The key of the image
+        '''
+        try:
+            ref = json.loads(self._ref_path(key).read_text())
+        except (OSError, ValueError):
+            return
+
+        self._write_ref(key, ref['sha256'], ref['etag'])
+
+    def discard(self, key: str):
+        '''
+        Forgets the cached version of an image. The image data is left for eviction, since
+        other keys can share it
+
+        Args:
+            key: The key of the image
+        '''
+        try:
+            self._ref_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _write_ref(self, key: str, digest: str, etag: str):
+        ref = {'sha256': digest, 'etag': etag, 'checked_at': time.time()}
+        write_atomically(self._ref_path(key), json.dumps(ref).encode())
+
+    def evict(self):
+        '''
+        Deletes the least recently used images until the cache fits within its size cap
+        '''
+        objects = []
+
+        for object_path in self._objects.glob('*.png'):
+            try:
+                stat = object_path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            objects.append((stat.st_mtime, stat.st_size, object_path))
+
+        total_size = sum(size for _, size, _ in objects)
+
+        for _, size, object_path in sorted(objects):
+            if total_size <= self.max_bytes:
+                break
+
+            try:
+                object_path.unlink()
+            except FileNotFoundError:
+                pass
+
+            total_size -= size
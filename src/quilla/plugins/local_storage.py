@@ -1,24 +1,38 @@
 '''
 A plugin to add LocalStorage functionality for the VisualParity plugin.
-'''
 
+The contents of every image are written once into an object store, named by their SHA-256
+hash. Baseline snapshots and the images of each run are hardlinks to those read-only
+objects, so identical images only take up space once while keeping their usual paths.
+The baselines themselves are managed by the users, so they are always plain copies that
+can be edited without affecting any stored object.
+'''
 
+import os
+import shutil
+import stat
+import uuid
 from argparse import (
     ArgumentParser,
     Namespace,
 )
+from hashlib import sha256
 from pathlib import Path
 from typing import (
     Optional,
     cast
 )
 
+from quilla.common.enums import VisualParityImageType
+
 from .base_storage import BaseStorage
+from .disk_cache import write_atomically
 
 
 class LocalStorage(BaseStorage):
     baseline_directory: Optional[Path]
     runs_directory: Optional[Path]
+    objects_directory: Optional[Path]
 
     def __init__(
         self,
@@ -27,6 +41,7 @@ class LocalStorage(BaseStorage):
         if storage_directory is None:
             self.baseline_directory = None
             self.runs_directory = None
+            self.objects_directory = None
             return
 
         self.configure(storage_directory)
@@ -38,8 +53,10 @@ class LocalStorage(BaseStorage):
         baseline_path = Path(storage_directory)
         self.baseline_directory = baseline_path / 'baselines'
         self.runs_directory = baseline_path / 'runs'
+        self.objects_directory = baseline_path / 'objects'
         self.runs_directory.mkdir(exist_ok=True)
         self.baseline_directory.mkdir(exist_ok=True)
+        self.objects_directory.mkdir(exist_ok=True)
 
     @property
     def is_enabled(self) -> bool:
@@ -52,19 +69,112 @@ class LocalStorage(BaseStorage):
 
         return path
 
+    def image_path(
+        self,
+        run_id: str,
+        baseline_id: str,
+        image_type: VisualParityImageType,
+    ) -> Path:
+        '''
+        Gets the path an image is stored at
+
+        Args:
+            run_id: The unique ID for the run
+            baseline_id: The unique identifier for the image
+            image_type: The kind of image
+
+        Returns:
+            The path of the image
+        '''
+        if image_type == VisualParityImageType.BASELINE:
+            return cast(Path, self.baseline_directory) / f'{baseline_id}.png'
+
+        suffix = {
+            VisualParityImageType.TREATMENT: 'treatment',
+            VisualParityImageType.DELTA: 'delta',
+        }[image_type]
+
+        return self.run_path(run_id) / f'{baseline_id}_{suffix}.png'
+
+    def image_uri(
+        self,
+        run_id: str,
+        baseline_id: str,
+        image_type: VisualParityImageType,
+    ) -> Optional[str]:
+        return self.image_path(run_id, baseline_id, image_type).absolute().as_uri()
+
+    def store_object(self, data: bytes) -> Path:
+        '''
+        Writes image data into the object store, unless identical data was already stored.
+        Objects are made read-only, and an existing object is only reused after checking
+        that its contents still match its name
+
+        Args:
+            data: The image data
+
+        Returns:
+            The path of the stored object
+        '''
+        digest = sha256(data).hexdigest()
+        object_path = cast(Path, self.objects_directory) / digest[:2] / f'{digest}.png'
+
+        if self._is_intact(object_path, digest, len(data)):
+            return object_path
+
+        object_path.parent.mkdir(exist_ok=True)
+        write_atomically(object_path, data)
+        os.chmod(object_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+        return object_path
+
+    def _is_intact(self, object_path: Path, digest: str, size: int) -> bool:
+        try:
+            if object_path.stat().st_size != size:
+                return False
+
+            return sha256(object_path.read_bytes()).hexdigest() == digest
+        except FileNotFoundError:
+            return False
+
+    def link_object(self, object_path: Path, image_path: Path):
+        '''
+        Makes an image path refer to a stored object with a hardlink, replacing any previous
+        image atomically. Images are never written in place, since that would change every
+        other image that links to the same object. If hardlinks are not supported, the
+        object is copied instead
+
+        Args:
+            object_path: The path of the stored object
+            image_path: The path the image should be found at
+        '''
+        if image_path.exists() and image_path.samefile(object_path):
+            return
+
+        temp_path = image_path.with_name(f'.{image_path.name}.{uuid.uuid4().hex}')
+
+        try:
+            os.link(object_path, temp_path)
+        except OSError:
+            shutil.copyfile(object_path, temp_path)
+
+        os.replace(temp_path, image_path)
+
+    def _store_image(self, image_path: Path, data: bytes) -> str:
+        self.link_object(self.store_object(data), image_path)
+
+        return image_path.absolute().as_uri()
+
     def store_baseline_image(self, run_id: str, baseline_id: str, baseline: bytes) -> str:
-        baseline_path = cast(Path, self.baseline_directory) / f'{baseline_id}.png'
+        baseline_path = self.image_path(run_id, baseline_id, VisualParityImageType.BASELINE)
 
         snapshot_path = baseline_path.parent / 'snapshots' / f'{baseline_id}_{run_id}.png'
 
         snapshot_path.parent.mkdir(exist_ok=True)
 
-        baseline_path.touch()
-
-        baseline_path.write_bytes(baseline)
-
-        snapshot_path.touch()
-        snapshot_path.write_bytes(baseline)
+        # The baseline is a copy, so that editing it never changes the snapshots
+        write_atomically(baseline_path, baseline)
+        self.link_object(self.store_object(baseline), snapshot_path)
 
         return baseline_path.absolute().as_uri()
 
@@ -75,13 +185,14 @@ class LocalStorage(BaseStorage):
         treatment: bytes
     ) -> str:
 
-        run_path = self.run_path(run_id)
+        image_path = self.image_path(run_id, baseline_id, VisualParityImageType.TREATMENT)
 
-        image_path = run_path / f'{baseline_id}_treatment.png'
+        return self._store_image(image_path, treatment)
 
-        image_path.write_bytes(treatment)
+    def store_delta_image(self, run_id: str, baseline_id: str, delta: bytes) -> str:
+        image_path = self.image_path(run_id, baseline_id, VisualParityImageType.DELTA)
 
-        return image_path.absolute().as_uri()
+        return self._store_image(image_path, delta)
 
     def find_image_by_baseline(self, baseline_id: str) -> bytes:
         image_path = cast(Path, self.baseline_directory) / f'{baseline_id}.png'
@@ -94,13 +205,14 @@ class LocalStorage(BaseStorage):
     def make_baseline_uri(self, run_id: str, baseline_id: str) -> str:
         image_data = self.find_image_by_baseline(baseline_id)
 
-        run_path = self.run_path(run_id)
-
-        image_path = run_path / f'{baseline_id}.png'
+        if image_data == b'':
+            return ''
 
-        image_path.touch()
+        image_path = self.run_path(run_id) / f'{baseline_id}.png'
 
-        image_path.write_bytes(image_data)
+        # The run keeps its own object of the baseline, so editing the baseline afterwards
+        # does not change the image the run was compared against
+        self.link_object(self.store_object(image_data), image_path)
 
         return image_path.absolute().as_uri()
 
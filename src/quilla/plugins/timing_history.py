@@ -0,0 +1,58 @@
+'''
+A plugin that keeps a persistent history of how long Quilla tests, browsers and steps
+take to run, stored in a local SQLite database.
+
+Timings are collected while the tests run and are written to the database once
+per Quilla test through the ``quilla_postvalidate`` hook. The history can then be
+queried for percentiles, for example to balance test shards by duration.
+'''
+
+from argparse import (
+    ArgumentParser,
+    Namespace,
+)
+
+from quilla.ctx import Context
+from quilla.common.timing import TimingDatabase
+from quilla.reports.report_summary import ReportSummary
+
+
+class TimingHistory(TimingDatabase):
+    '''
+    Stores the timings recorded during Quilla runs in a SQLite database
+
+    Args:
+        db_path: The path to the SQLite database. If None, the plugin is disabled
+            until it is configured through the CLI
+
+    Attributes:
+        db_path: The path to the SQLite database
+    '''
+    def quilla_addopts(self, parser: ArgumentParser):
+        '''
+        Using the Quilla hook to add a new group of CLI args to the parser
+        '''
+        th_group = parser.add_argument_group(title='Timing History Options')
+
+        th_group.add_argument(
+            '--timing-history',
+            dest='timing_history',
+            metavar='DB',
+            default=None,
+            help='A SQLite database to record the duration of every test, browser, driver '
+            'start and step in. The database can also be given to --shard-timings'
+        )
+
+    def quilla_configure(self, ctx: Context, args: Namespace):
+        if args.timing_history is not None:
+            self.configure(args.timing_history)
+            ctx.timings.enabled = True
+
+    def quilla_postvalidate(self, ctx: Context, reports: ReportSummary):
+        '''
+        Writes the timings recorded for the Quilla test into the database
+        '''
+        if not self.is_enabled:
+            return
+
+        self.insert(ctx.run_id, ctx.timings.drain())
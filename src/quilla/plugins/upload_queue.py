@@ -0,0 +1,84 @@
+'''
+This module contains a queue that stores VisualParity images in the background, so that
+the validations do not have to wait for the images to be written or uploaded before the
+next step can start.
+'''
+
+import threading
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import (
+    Callable,
+    List,
+    Tuple,
+)
+
+
+class UploadQueue:
+    '''
+    A bounded pool of threads that stores images in the background. Submitting an image
+    blocks if too many images are already waiting to be stored, so the memory used by the
+    queued images stays bounded
+
+    Args:
+        workers: The number of threads storing images
+        max_pending: The maximum number of images that can be waiting to be stored. Defaults
+            to four times the number of workers
+
+    Attributes:
+        workers: The number of threads storing images
+    '''
+    def __init__(self, workers: int, max_pending: int = 0):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='quilla-image-upload',
+        )
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self._pending: List[Tuple[str, Future]] = []
+        self._lock = threading.Lock()
+
+    def submit(self, uri: str, store: Callable[..., str], *args) -> str:
+        '''
+        Queues an image to be stored
+
+        Args:
+            uri: The URI the image will be found at once it is stored
+            store: The function that stores the image
+            *args: The arguments for the store function
+
+        Returns:
+            The URI of the image
+        '''
+        self._slots.acquire()
+
+        future = self._executor.submit(store, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+
+        with self._lock:
+            self._pending.append((uri, future))
+
+        return uri
+
+    def flush(self) -> List[Tuple[str, BaseException]]:
+        '''
+        Waits until every queued image has been stored
+
+        Returns:
+            The URI of every image that could not be stored, along with the error that
+            prevented it from being stored
+        '''
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        errors = []
+
+        for uri, future in pending:
+            error = future.exception()
+
+            if error is not None:
+                errors.append((uri, error))
+
+        return errors
@@ -4,6 +4,7 @@ All report generation and summary classes
 '''
 
 
+from .step_timing import StepTiming
 from .base_report import BaseReport
 from .validation_report import ValidationReport
 from .step_failure_report import StepFailureReport
@@ -2,13 +2,17 @@ import json
 from abc import (
     abstractmethod,
 )
-from typing import Dict
+from typing import (
+    Dict,
+    Optional,
+)
 
 from quilla.common.utils import EnumResolver
 from quilla.common.enums import (
     ReportType,
     UITestActions,
 )
+from quilla.reports.step_timing import StepTiming
 
 
 class BaseReport(EnumResolver):
@@ -20,6 +24,9 @@ class BaseReport(EnumResolver):
         browser: The name of the browser
         action: An enum specifying the kind of action that was taken
         msg: A string giving further context to the report
+
+    Attributes:
+        timing: How long the step that produced the report took, if it was measured
     '''
 
     def __init__(self, report_type: ReportType, browser: str, action: UITestActions, msg: str = ''):
@@ -27,6 +34,7 @@ class BaseReport(EnumResolver):
         self.action: UITestActions = action
         self.msg: str = msg
         self.report_type: ReportType = report_type
+        self.timing: Optional[StepTiming] = None
 
     @classmethod
     @abstractmethod
@@ -44,6 +52,22 @@ class BaseReport(EnumResolver):
         Converts the Report object into a dictionary representation
         '''
 
+    def _dump_timing(self, report_data: dict):
+        '''
+        Adds the timing of the step to the dictionary representation of the report, if
+        the timing was measured
+        '''
+        if self.timing is not None:
+            report_data['timing'] = self.timing.to_dict()
+
+    def _load_timing(self, report_data: dict):
+        '''
+        Loads the timing of the step from the dictionary representation of the report, if
+        it contains one
+        '''
+        if 'timing' in report_data:
+            self.timing = StepTiming.from_dict(report_data['timing'])
+
     def to_json(self) -> str:
         '''
         Returns:
@@ -3,14 +3,18 @@ from typing import (
     Dict,
     Type,
     List,
-    Callable
+    Callable,
+    Optional,
 )
 
+import pydeepmerge as pdm
+
 from quilla.common.enums import ReportType
 from quilla.reports.base_report import BaseReport
 from quilla.reports.validation_report import ValidationReport
 from quilla.reports.step_failure_report import StepFailureReport
 from quilla.reports.visual_parity_report import VisualParityReport
+from quilla.reports.step_timing import StepTiming
 
 
 class ReportSummary:
@@ -21,6 +25,8 @@ class ReportSummary:
         run_id: A string that uniquely identifies the run
         outputs: The outputs generated by various steps
         reports: A list of reports to produce a summary of
+        step_timings: The timings of the steps that were performed. If None, the
+            timings attached to the reports are used
 
     Attributes:
         run_id: A string that uniquely identifies the run
@@ -31,17 +37,30 @@ class ReportSummary:
         critical_failures: The number of reports representing critical (i.e. unrecoverable)
             failures. This will be produced at any step if it causes an exception.
         filter_by: A declarative way to filter through the various reports
+        step_timings: The timings of the steps that were performed, including the
+            steps that did not produce a report
+        slowest_steps_count: How many of the slowest steps are listed in the summary
     '''
     selector: Dict[str, Type[BaseReport]] = {
         'validationReport': ValidationReport,
         'stepFailureReport': StepFailureReport,
         'visualParityReport': VisualParityReport,
     }
+    slowest_steps_count: int = 10
 
-    def __init__(self, run_id: str, outputs: dict, reports: List[BaseReport] = []):
+    def __init__(
+        self,
+        run_id: str,
+        outputs: dict,
+        reports: List[BaseReport] = [],
+        step_timings: Optional[List[StepTiming]] = None,
+    ):
         self.run_id = run_id
         self.outputs = outputs
         self.reports = reports
+        if step_timings is None:
+            step_timings = [report.timing for report in reports if report.timing is not None]
+        self.step_timings = step_timings
         self.successes = 0
         self.fails = 0
         self.critical_failures = 0
@@ -61,12 +80,26 @@ class ReportSummary:
                 'critical_failures': self.critical_failures,
                 'reports': [
                     report.to_dict() for report in self.reports
-                ]
+                ],
+                'slowestSteps': [
+                    step_timing.to_dict() for step_timing in self.slowest_steps()
+                ],
             },
             'outputs': self.outputs,
             'run_id': self.run_id,
         }
 
+    def slowest_steps(self) -> List[StepTiming]:
+        '''
+        Returns:
+            the timings of the slowest steps performed, from slowest to fastest
+        '''
+        return sorted(
+            self.step_timings,
+            key=lambda x: x.duration,
+            reverse=True,
+        )[:self.slowest_steps_count]
+
     def to_json(self) -> str:
         '''
         Returns:
@@ -89,8 +122,42 @@ class ReportSummary:
             report_type = list(report.keys())[0]
             report_object = cls.selector[report_type]
             obj_reports.append(report_object.from_dict(report))
-        obj_reports = [ValidationReport.from_dict(report) for report in reports]
-        return ReportSummary(run_id, outputs, obj_reports)
+
+        # Only the slowest steps are kept in the summary, which is still enough to find
+        # the slowest steps of multiple merged summaries
+        step_timings = None
+        if 'slowestSteps' in summary_dict['reportSummary']:
+            step_timings = [
+                StepTiming.from_dict(step_timing)
+                for step_timing in summary_dict['reportSummary']['slowestSteps']
+            ]
+
+        return ReportSummary(run_id, outputs, obj_reports, step_timings)
+
+    @classmethod
+    def merge(cls, run_id: str, summaries: List['ReportSummary']) -> 'ReportSummary':
+        '''
+        Merges multiple summaries into a single one, keeping the reports in the order
+        of the given summaries. Outputs are deep merged, preferring the outputs of the later
+        summaries wherever there is a conflict
+
+        Args:
+            run_id: The run ID for the merged summary
+            summaries: The summaries to merge
+
+        Returns:
+            A new summary containing the reports and outputs of every summary
+        '''
+        reports: List[BaseReport] = []
+        step_timings: List[StepTiming] = []
+        outputs: dict = {}
+
+        for summary in summaries:
+            reports.extend(summary.reports)
+            step_timings.extend(summary.step_timings)
+            outputs = pdm.deep_merge(outputs, summary.outputs)
+
+        return ReportSummary(run_id, outputs, reports, step_timings)
 
     @classmethod
     def from_json(cls, summary_json):
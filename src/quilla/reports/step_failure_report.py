@@ -27,7 +27,8 @@ class StepFailureReport(BaseReport):
         action: UITestActions,
         step_index: int
     ):
-        super().__init__(ReportType.STEP_FAILURE, browser, action, repr(exception))
+        msg = exception if isinstance(exception, str) else repr(exception)
+        super().__init__(ReportType.STEP_FAILURE, browser, action, msg)
         self.index = step_index
 
     def to_dict(self):
@@ -37,7 +38,7 @@ class StepFailureReport(BaseReport):
         Returns:
             a dictionary containing the representation of this object
         '''
-        return {
+        report = {
             'stepFailureReport': {
                 'action': self.action.value,
                 'targetBrowser': self.browser,
@@ -47,6 +48,10 @@ class StepFailureReport(BaseReport):
             }
         }
 
+        self._dump_timing(report['stepFailureReport'])
+
+        return report
+
     @classmethod
     def from_dict(cls, report_dict):
         '''
@@ -56,9 +61,12 @@ class StepFailureReport(BaseReport):
             the appropriate StepFailureReport object
         '''
         report = report_dict['stepFailureReport']
-        return StepFailureReport(
+        step_failure_report = StepFailureReport(
             report['msg'],
             report['targetBrowser'],
             cls._name_to_enum(report['action'], UITestActions),
             report['stepIndex']
         )
+        step_failure_report._load_timing(report)
+
+        return step_failure_report
@@ -0,0 +1,77 @@
+from typing import Dict
+
+from quilla.common.utils import EnumResolver
+from quilla.common.enums import UITestActions
+
+
+class StepTiming(EnumResolver):
+    '''
+    Data class describing how long a single step took to perform
+
+    Args:
+        browser: The name of the browser the step was performed on
+        action: An enum describing the action of the step
+        step_index: The index of the step
+        start: The monotonic clock time when the step started, in seconds
+        end: The monotonic clock time when the step finished, in seconds
+        webdriver_commands: The number of WebDriver commands sent while performing the step
+
+    Attributes:
+        browser: The name of the browser the step was performed on
+        action: An enum describing the action of the step
+        step_index: The index of the step
+        start: The monotonic clock time when the step started, in seconds
+        end: The monotonic clock time when the step finished, in seconds
+        webdriver_commands: The number of WebDriver commands sent while performing the step
+    '''
+    def __init__(
+        self,
+        browser: str,
+        action: UITestActions,
+        step_index: int,
+        start: float,
+        end: float,
+        webdriver_commands: int,
+    ):
+        self.browser = browser
+        self.action = action
+        self.step_index = step_index
+        self.start = start
+        self.end = end
+        self.webdriver_commands = webdriver_commands
+
+    @property
+    def duration(self) -> float:
+        '''
+        How long the step took to perform, in seconds
+        '''
+        return self.end - self.start
+
+    def to_dict(self) -> Dict:
+        '''
+        Returns:
+            a dictionary representation of the step timing
+        '''
+        return {
+            'action': self.action.value,
+            'targetBrowser': self.browser,
+            'stepIndex': self.step_index,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration,
+            'webdriverCommands': self.webdriver_commands,
+        }
+
+    @classmethod
+    def from_dict(cls, timing: Dict) -> 'StepTiming':
+        '''
+        Converts a dictionary representing a step timing into a StepTiming object
+        '''
+        return StepTiming(
+            timing['targetBrowser'],
+            cls._name_to_enum(timing['action'], UITestActions),
+            timing['stepIndex'],
+            timing['start'],
+            timing['end'],
+            timing['webdriverCommands'],
+        )
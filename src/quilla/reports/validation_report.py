@@ -57,7 +57,7 @@ class ValidationReport(BaseReport):
         msg = ''
         if 'msg' in params:
             msg = params['msg']
-        return ValidationReport(
+        validation_report = ValidationReport(
             validation_type=params['type'],
             target=params['target'],
             state=params['state'],
@@ -65,6 +65,9 @@ class ValidationReport(BaseReport):
             success=params['passed'],
             msg=msg
         )
+        validation_report._load_timing(params)
+
+        return validation_report
 
     def to_dict(self):
         '''
@@ -84,4 +87,6 @@ class ValidationReport(BaseReport):
         if self.msg:
             report['validationReport']['msg'] = self.msg
 
+        self._dump_timing(report['validationReport'])
+
         return report
@@ -1,5 +1,6 @@
 from typing import (
     Dict,
+    Optional,
     cast
 )
 from quilla.common.enums import (
@@ -22,6 +23,8 @@ class VisualParityReport(ValidationReport):
         baseline_image_uri: A URI that allows locating the baseline image (i.e. path, link, etc)
         treatment_image_uri: A URI that allows locating the treatment image (i.e. path, link, etc)
         delta_image_uri: A URI that allows locating the delta image (i.e. path, link, etc)
+        diff_ratio: The ratio of pixels that differ between the baseline and treatment images,
+            if the images were compared
 
     Attributes:
         validation_type: The string representation of the type of validation performed
@@ -33,6 +36,8 @@ class VisualParityReport(ValidationReport):
         baseline_image_uri: A URI that allows locating the baseline image (i.e. path, link, etc)
         treatment_image_uri: A URI that allows locating the treatment image (i.e. path, link, etc)
         delta_image_uri: A URI that allows locating the delta image (i.e. path, link, etc)
+        diff_ratio: The ratio of pixels that differ between the baseline and treatment images,
+            if the images were compared
     '''
 
     def __init__(
@@ -45,6 +50,7 @@ class VisualParityReport(ValidationReport):
         baseline_image_uri: str = '',
         treatment_image_uri: str = '',
         delta_image_uri: str = '',
+        diff_ratio: Optional[float] = None,
     ):
         super().__init__(
             validation_type=ValidationTypes.XPATH.value,
@@ -58,6 +64,7 @@ class VisualParityReport(ValidationReport):
         self.baseline_image_uri = baseline_image_uri
         self.treatment_image_uri = treatment_image_uri
         self.delta_image_uri = delta_image_uri
+        self.diff_ratio = diff_ratio
 
     def to_dict(self):
         report = super().to_dict()
@@ -75,13 +82,16 @@ class VisualParityReport(ValidationReport):
         if self.delta_image_uri:
             report_data['deltaImageUri'] = self.delta_image_uri
 
+        if self.diff_ratio is not None:
+            report_data['diffRatio'] = self.diff_ratio
+
         return {
             'visualParityReport': report_data
         }
 
     @classmethod
     def from_dict(cls, report) -> 'VisualParityReport':
-        params: Dict[str, str] = report['visualParityReport']
+        params: Dict = report['visualParityReport']
         msg = params.get('msg', '')
         baseline_id = params['baselineId']
         baseline_uri = params.get('baselineImageUri', '')
@@ -89,7 +99,7 @@ class VisualParityReport(ValidationReport):
         delta_uri = params.get('deltaImageUri', '')
         success = cast(bool, params['passed'])
 
-        return VisualParityReport(
+        visual_parity_report = VisualParityReport(
             target=params['target'],
             browser_name=params['targetBrowser'],
             success=success,
@@ -98,4 +108,8 @@ class VisualParityReport(ValidationReport):
             baseline_image_uri=baseline_uri,
             treatment_image_uri=treatment_uri,
             delta_image_uri=delta_uri,
+            diff_ratio=params.get('diffRatio'),
         )
+        visual_parity_report._load_timing(params)
+
+        return visual_parity_report
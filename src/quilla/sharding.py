@@ -0,0 +1,163 @@
+'''
+Module to split Quilla test files into shards, so that a suite of Quilla tests can be
+divided between multiple CI nodes. Every node must be given the same list of test files,
+and each node then deterministically selects its own share of the tests.
+
+By default, test files are assigned to shards by the hash of their contents. If a timing
+history from previous runs is available, test files are instead split by greedily assigning
+the longest test to the shard with the least total duration, which keeps the duration of all
+the shards roughly equal.
+'''
+
+import os
+import json
+from argparse import ArgumentTypeError
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from quilla.common.utils import content_hash
+from quilla.common.timing import TimingDatabase
+
+
+_sqlite_header = b'SQLite format 3\x00'
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    '''
+    Converts a shard specification in the form of INDEX/TOTAL into a tuple. The index
+    is 1-based, so that '1/4' is the first of four shards.
+
+    Args:
+        value: The shard specification
+
+    Returns:
+        An (index, total) tuple
+
+    Raises:
+        ArgumentTypeError: if the value is not a valid shard specification
+    '''
+    try:
+        index_str, total_str = value.split('/')
+        index, total = int(index_str), int(total_str)
+    except ValueError:
+        raise ArgumentTypeError(f'"{value}" is not in the form of INDEX/TOTAL')
+
+    if total < 1 or not 1 <= index <= total:
+        raise ArgumentTypeError(f'"{value}" is not a valid shard, expected 1 <= INDEX <= TOTAL')
+
+    return index, total
+
+
+def load_timings(path: str) -> Dict[str, float]:
+    '''
+    Loads a timing history file. The file must either be a timing database, such as the one
+    written by the TimingHistory plugin, in which case the median duration of each test is
+    used, or contain a json object that maps either the path or the content hash of a test
+    file to its duration in seconds.
+
+    Args:
+        path: The path to the timing history file
+
+    Returns:
+        A dictionary mapping test file paths or hashes to their duration
+    '''
+    with open(path, 'rb') as fp:
+        is_sqlite = fp.read(len(_sqlite_header)) == _sqlite_header
+
+    if is_sqlite:
+        return TimingDatabase(path).test_percentiles(50)
+
+    with open(path) as fp:
+        return {key: float(duration) for key, duration in json.load(fp).items()}
+
+
+def select_shard(
+    test_files: List[str],
+    index: int,
+    total: int,
+    timings: Optional[Dict[str, float]] = None,
+    root: str = '.',
+) -> List[str]:
+    '''
+    Selects the test files that belong to a given shard
+
+    Args:
+        test_files: Every test file of the suite
+        index: The 1-based index of the shard
+        total: The total number of shards
+        timings: An optional timing history. If given, the test files are
+            balanced between the shards based on their durations
+        root: The directory that relative test file paths are resolved from
+
+    Returns:
+        The test files that belong to the shard, in the same order that they were given
+    '''
+    hashes = {
+        test_file: _file_hash(os.path.join(root, test_file)) for test_file in test_files
+    }
+
+    if timings:
+        shards = _split_by_duration(test_files, total, hashes, timings)
+    else:
+        shards = _split_by_hash(test_files, total, hashes)
+
+    selected = set(shards[index - 1])
+
+    return [test_file for test_file in test_files if test_file in selected]
+
+
+def _file_hash(test_file: str) -> str:
+    with open(test_file) as fp:
+        return content_hash(fp.read())
+
+
+def _split_by_hash(
+    test_files: List[str],
+    total: int,
+    hashes: Dict[str, str],
+) -> List[List[str]]:
+    shards: List[List[str]] = [[] for _ in range(total)]
+
+    for test_file in test_files:
+        shards[int(hashes[test_file], 16) % total].append(test_file)
+
+    return shards
+
+
+def _split_by_duration(
+    test_files: List[str],
+    total: int,
+    hashes: Dict[str, str],
+    timings: Dict[str, float],
+) -> List[List[str]]:
+    durations: Dict[str, Optional[float]] = {}
+    for test_file in test_files:
+        durations[test_file] = timings.get(hashes[test_file], timings.get(test_file))
+
+    known_durations = [duration for duration in durations.values() if duration is not None]
+    # Tests without any history are assumed to take as long as the average test
+    default_duration = sum(known_durations) / len(known_durations) if known_durations else 1.0
+    resolved_durations = {
+        test_file: duration if duration is not None else default_duration
+        for test_file, duration in durations.items()
+    }
+
+    shards: List[List[str]] = [[] for _ in range(total)]
+    loads = [0.0] * total
+
+    # Longest tests first, ties broken by path so that every node computes the same split
+    ordered_files = sorted(
+        test_files,
+        key=lambda x: (-resolved_durations[x], x)
+    )
+
+    for test_file in ordered_files:
+        shard = min(range(total), key=lambda x: (loads[x], x))
+        shards[shard].append(test_file)
+        loads[shard] += resolved_durations[test_file]
+
+    return shards
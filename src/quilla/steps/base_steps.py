@@ -3,6 +3,7 @@ from typing import (
     Callable,
     Dict,
     Any,
+    Tuple,
     TYPE_CHECKING,
 )
 from abc import abstractclassmethod, abstractmethod
@@ -25,6 +26,7 @@ from quilla.common.enums import (
     ValidationStates,
 )
 from quilla.common.exceptions import FailedStepException
+from quilla.common.expressions import compile_templates
 
 if TYPE_CHECKING:
     from quilla.ctx import Context
@@ -67,6 +69,8 @@ class BaseStep(DriverHolder, EnumResolver):
         self.ctx = ctx
         self.target = target
         self.parameters = parameters
+        self._element_cache: Dict[str, WebElement] = {}
+        self._resolved_parameters: Optional[Tuple[int, dict]] = None
         super().__init__(driver)
 
     @abstractmethod
@@ -86,6 +90,15 @@ class BaseStep(DriverHolder, EnumResolver):
         Returns a copy of the current Step object
         '''
 
+    @property
+    def read_only(self) -> bool:
+        '''
+        Whether performing the step only reads the state of the browser. Read-only steps
+        can safely be performed again, such as when one of their elements becomes stale,
+        while steps that interact with the page must never be repeated
+        '''
+        return False
+
     @property
     def target(self):
         '''
@@ -98,29 +111,56 @@ class BaseStep(DriverHolder, EnumResolver):
     @target.setter
     def target(self, val: str) -> str:
         self._target = val
+        compile_templates(val)
         return val
 
     @property
     def parameters(self):
         '''
         Parameters for an action, if applicable. Will resolve all context
-        expressions before being returned
+        expressions before being returned. The parameters are resolved once every time the
+        step is performed, and again whenever the context data changes. Every resolution
+        creates a new copy of the parameters, so modifying them never changes the
+        parameters that the step was created with
         '''
-        if self._parameters is not None:
-            return self._deep_replace(self.ctx, self._parameters.copy())
+        if self._parameters is None:
+            return None
+
+        data_version = self.ctx.data_version
+        if self._resolved_parameters is None or self._resolved_parameters[0] != data_version:
+            self._resolved_parameters = (
+                data_version,
+                self._deep_replace(self.ctx, self._parameters),
+            )
+
+        return self._resolved_parameters[1]
 
     @parameters.setter
     def parameters(self, val: dict) -> dict:
         self._parameters = val
+        self._resolved_parameters = None
+        compile_templates(val)
         return val
 
-    def _deep_replace(self, ctx: 'Context', params: Dict[str, Any]):
-        for key, value in params.items():
-            if isinstance(value, str):
-                params[key] = ctx.perform_replacements(value)
-            elif isinstance(value, Dict):
-                params[key] = self._deep_replace(ctx, value)
-            # (TODO): Add list support to deep replacement
+    def _deep_replace(self, ctx: 'Context', params: Any) -> Any:
+        '''
+        Resolves the context expressions of every string in the parameters, without
+        modifying the original parameters
+
+        Args:
+            ctx: The runtime context used to resolve the context expressions
+            params: A value from the parameters, including dictionaries and lists
+
+        Returns:
+            A copy of the value with all context expressions resolved
+        '''
+        if isinstance(params, str):
+            return ctx.perform_replacements(params)
+        elif isinstance(params, dict):
+            return {key: self._deep_replace(ctx, value) for key, value in params.items()}
+        elif isinstance(params, list):
+            return [self._deep_replace(ctx, value) for value in params]
+
         return params
 
     def _verify_parameters(self, *parameters: str):
@@ -142,9 +182,48 @@ class BaseStep(DriverHolder, EnumResolver):
     @property
     def element(self) -> WebElement:
         '''
-        Located WebElement instance
+        Located WebElement instance. The element is only located once until the
+        element cache is cleared
         '''
-        return self.driver.find_element(*self.locator)
+        return self.find_element(self.target)
+
+    def find_element(self, xpath: str) -> WebElement:
+        '''
+        Locates the first element matching an XPath, reusing the element found by a
+        previous call with the same XPath since the element cache was last cleared. Since
+        targets are keyed after resolving their context expressions, a target that resolves
+        to a different XPath is always located again
+
+        Args:
+            xpath: The resolved XPath of the element
+
+        Returns:
+            The located WebElement instance
+        '''
+        element = self._element_cache.get(xpath)
+
+        if element is None:
+            element = self.driver.find_element(By.XPATH, xpath)
+            self._element_cache[xpath] = element
+
+        return element
+
+    def clear_cache(self):
+        '''
+        Forgets all the elements located by this step, so that they will be located
+        again the next time they are needed, as well as the resolved parameters. Called
+        after every time the step is performed, and whenever one of the located elements
+        becomes stale
+        '''
+        self._element_cache.clear()
+        self.clear_parameters()
+
+    def clear_parameters(self):
+        '''
+        Forgets the resolved parameters, so that they will be resolved again the next
+        time they are needed
+        '''
+        self._resolved_parameters = None
 
     @property
     def locator(self):
@@ -218,6 +297,10 @@ class BaseValidation(BaseStep):
             self._driver  # type: ignore
         )
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     def perform(self) -> ValidationReport:
         '''
         Performs the correct action based on what is defined within the selector,
@@ -18,6 +18,11 @@ from quilla.steps.base_steps import (
 
 
 class OutputValueStep(BaseStep, BaseStepFactory):
+    selector: Dict[OutputSources, str] = {
+        OutputSources.LITERAL: '_output_literal',
+        OutputSources.XPATH_TEXT: '_output_xpath_text',
+        OutputSources.XPATH_PROPERTY: '_output_xpath_property',
+    }
     required_params = [
         'target',
         'parameters'
@@ -55,11 +60,9 @@ class OutputValueStep(BaseStep, BaseStepFactory):
         self._verify_target()
         self._verify_parameters('source', 'outputName')
 
-        self.selector = {
-            OutputSources.LITERAL: self._output_literal,
-            OutputSources.XPATH_TEXT: self._output_xpath_text,
-            OutputSources.XPATH_PROPERTY: self._output_xpath_property,
-        }
+    @property
+    def read_only(self) -> bool:
+        return True
 
     def perform(self):
         self.ctx.logger.debug(
@@ -67,7 +70,7 @@ class OutputValueStep(BaseStep, BaseStepFactory):
             self._parameters['source'],
             self._target,
         )
-        value_producer = self.selector[self.parameters['source']]
+        value_producer = getattr(self, self.selector[self.parameters['source']])
 
         output_value = value_producer()
         self._create_output(output_value)
@@ -0,0 +1,169 @@
+'''
+Module for compiling the step definitions of a Quilla test into a step plan. The plan is
+created once per Quilla test and is shared read-only by every browser, which then only
+needs to create its own step objects from it. This keeps the per-browser state (the driver,
+the context and the caches of each step) separate from the definition of the steps.
+'''
+
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from quilla.ctx import Context
+from quilla.common.enums import UITestActions
+from quilla.common.exceptions import InvalidContextExpressionException
+from quilla.steps.base_steps import (
+    BaseStep,
+    BaseStepFactory,
+)
+from quilla.steps.steps import TestStep
+from quilla.steps.validations import Validation
+from quilla.steps.outputs import OutputValueStep
+
+
+def _freeze(value: Any) -> Any:
+    '''
+    Copies a value into read-only containers, turning dictionaries into mapping proxies
+    and lists into tuples
+    '''
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    elif isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    '''
+    Copies a value that was frozen with ``_freeze`` back into dictionaries and lists
+    '''
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    elif isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+
+    return value
+
+
+class PlannedStep:
+    '''
+    A single step definition along with the factory that creates its step objects.
+    Planned steps cannot be modified once they are created, and neither can any of the
+    dictionaries or lists of their definition
+
+    Args:
+        factory: The step factory selected for the step definition
+        definition: The step definition, as given in the Quilla test
+
+    Attributes:
+        factory: The step factory selected for the step definition
+        definition: A read-only copy of the step definition
+    '''
+    __slots__ = ('factory', 'definition')
+
+    factory: Type[BaseStepFactory]
+    definition: Mapping
+
+    def __init__(self, factory: Type[BaseStepFactory], definition: Dict):
+        object.__setattr__(self, 'factory', factory)
+        object.__setattr__(self, 'definition', _freeze(definition))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'Cannot set "{name}" on a planned step')
+
+    def create(self, ctx: Context, driver: Optional[WebDriver] = None) -> BaseStep:
+        '''
+        Creates a new step object from a mutable copy of the definition, so that the
+        step owns its parameters
+
+        Args:
+            ctx: The context to bind the step to
+            driver: An optional driver to bind the step to
+
+        Returns:
+            The new step object
+        '''
+        return self.factory.from_dict(ctx, _thaw(self.definition), driver=driver)  # type: ignore
+
+
+class StepPlan:
+    '''
+    An immutable sequence of planned steps
+
+    Args:
+        steps: The planned steps, in the order they should be performed
+    '''
+    __slots__ = ('_steps',)
+
+    _steps: Tuple[PlannedStep, ...]
+
+    def __init__(self, steps: Tuple[PlannedStep, ...] = ()):
+        object.__setattr__(self, '_steps', tuple(steps))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'Cannot set "{name}" on a step plan')
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def __iter__(self) -> Iterator[PlannedStep]:
+        return iter(self._steps)
+
+    @classmethod
+    def compile(cls, ctx: Context, steps: List[Dict]) -> 'StepPlan':
+        '''
+        Selects the factory for every step definition. The ``quilla_step_factory_selector``
+        hook is only called once per plan. Definitions referenced by the steps that do not
+        exist yet are logged as warnings, since plugins can still add them before the
+        steps are performed, which is when missing definitions are reported
+
+        Args:
+            ctx: The runtime context for the application
+            steps: The step definitions, with their enum values already resolved
+
+        Returns:
+            The compiled step plan
+        '''
+        step_factory_selector: Dict[UITestActions, Type[BaseStepFactory]] = {
+            UITestActions.VALIDATE: Validation,
+            UITestActions.OUTPUT_VALUE: OutputValueStep,
+        }
+
+        # Allow plugins to add selectors
+        ctx.logger.info('Running "quilla_step_factory_selector" hook')
+        ctx.pm.hook.quilla_step_factory_selector(selector=step_factory_selector)
+
+        planned_steps = []
+        for step in steps:
+            try:
+                ctx.verify_definitions([step.get('target'), step.get('parameters')])
+            except InvalidContextExpressionException as e:
+                ctx.logger.warning('Step %s references a missing definition: %s', step, e)
+            step_factory = step_factory_selector.get(step['action'], TestStep)
+            planned_steps.append(PlannedStep(step_factory, step))
+
+        return cls(tuple(planned_steps))
+
+    def create_steps(self, ctx: Context, driver: Optional[WebDriver] = None) -> List[BaseStep]:
+        '''
+        Creates a new step object for every planned step
+
+        Args:
+            ctx: The context to bind the steps to
+            driver: An optional driver to bind the steps to
+
+        Returns:
+            The step objects, in the order they should be performed
+        '''
+        return [planned_step.create(ctx, driver) for planned_step in self._steps]
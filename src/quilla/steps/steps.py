@@ -9,7 +9,7 @@ requires three steps:
 
 1. Add an entry for the action on the ``enums`` module
 2. Create a function to perform the actual step under the ``TestStep`` class
-3. Add an entry to the selector with the enum as a key and the function as a value
+3. Add an entry to the selector with the enum as a key and the name of the function as a value
 
 Keep in mind that the step function should also validate any required data, and that
 updating the schema for proper json validation is essential.
@@ -19,12 +19,17 @@ for converting the parameter from string to enum in the ``UIValidation`` class.
 '''
 
 
+import time
 from typing import (
     Optional,
     Dict,
     Any,
 )
 
+from selenium.common.exceptions import (
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -38,6 +43,7 @@ from quilla.steps.base_steps import (
     BaseStepFactory,
     BaseStep
 )
+from quilla.steps.waits import wait_for_xpath
 
 
 # Steps classes
@@ -55,8 +61,31 @@ class TestStep(BaseStep, BaseStepFactory):
         driver: The browser driver
 
     Attributes:
-        selector: A dictionary that maps action enums to the action function
+        selector: A dictionary that maps action enums to the name of the action function.
+            It is shared by every instance of the class
+        read_only_actions: The actions that only read the state of the browser
     '''
+    selector: Dict[UITestActions, str] = {
+        UITestActions.CLICK: '_click',
+        UITestActions.CLEAR: '_clear',
+        UITestActions.SEND_KEYS: '_send_keys',
+        UITestActions.NAVIGATE_TO: '_navigate_to',
+        UITestActions.WAIT_FOR_VISIBILITY: '_wait_for_visibility',
+        UITestActions.WAIT_FOR_EXISTENCE: '_wait_for_existence',
+        UITestActions.NAVIGATE_BACK: '_navigate_back',
+        UITestActions.NAVIGATE_FORWARD: '_navigate_forward',
+        UITestActions.HOVER: '_hover',
+        UITestActions.REFRESH: '_refresh',
+        UITestActions.SET_BROWSER_SIZE: '_set_browser_size',
+        UITestActions.ADD_COOKIES: '_add_cookies',
+        UITestActions.SET_COOKIES: '_set_cookies',
+        UITestActions.CLEAR_COOKIES: '_clear_cookies',
+        UITestActions.REMOVE_COOKIE: '_remove_cookie',
+    }
+    read_only_actions = {
+        UITestActions.WAIT_FOR_VISIBILITY,
+        UITestActions.WAIT_FOR_EXISTENCE,
+    }
     required_params = [
         'action',
     ]
@@ -99,23 +128,6 @@ class TestStep(BaseStep, BaseStepFactory):
         driver: Optional[WebDriver] = None,
     ):
         super().__init__(ctx, action, target=target, parameters=parameters, driver=driver)
-        self.selector = {
-            UITestActions.CLICK: self._click,
-            UITestActions.CLEAR: self._clear,
-            UITestActions.SEND_KEYS: self._send_keys,
-            UITestActions.NAVIGATE_TO: self._navigate_to,
-            UITestActions.WAIT_FOR_VISIBILITY: self._wait_for_visibility,
-            UITestActions.WAIT_FOR_EXISTENCE: self._wait_for_existence,
-            UITestActions.NAVIGATE_BACK: self._navigate_back,
-            UITestActions.NAVIGATE_FORWARD: self._navigate_forward,
-            UITestActions.HOVER: self._hover,
-            UITestActions.REFRESH: self._refresh,
-            UITestActions.SET_BROWSER_SIZE: self._set_browser_size,
-            UITestActions.ADD_COOKIES: self._add_cookies,
-            UITestActions.SET_COOKIES: self._set_cookies,
-            UITestActions.CLEAR_COOKIES: self._clear_cookies,
-            UITestActions.REMOVE_COOKIE: self._remove_cookie,
-        }
 
     def copy(self) -> 'TestStep':
         '''
@@ -133,11 +145,15 @@ class TestStep(BaseStep, BaseStepFactory):
             self._driver
         )
 
+    @property
+    def read_only(self) -> bool:
+        return self.action in self.read_only_actions
+
     def perform(self):
         '''
         Runs the specified action. Wrapper for selecting proper inner method
         '''
-        perform_action = self.selector[self.action]
+        perform_action = getattr(self, self.selector[self.action])
 
         return perform_action()
 
@@ -157,17 +173,44 @@ class TestStep(BaseStep, BaseStepFactory):
         self._verify_target()
         self.driver.get(self.target)
 
-    def _wait_for(self, condition):
+    def _wait_for(self, condition, visible: bool):
+        '''
+        Waits for the target to exist, or to be visible. With the 'observer' wait engine,
+        the browser notifies Quilla as soon as the condition is met. If the observer
+        cannot run, or with the 'poll' wait engine, the condition is polled instead
+        '''
         self._verify_parameters('timeoutInSeconds')
-        WebDriverWait(self.driver, self.parameters['timeoutInSeconds']).until(condition)
+        timeout = self.parameters['timeoutInSeconds']
+
+        if self.ctx.wait_engine == 'observer':
+            deadline = time.monotonic() + timeout
+            try:
+                wait_for_xpath(self.driver, self.target, visible, timeout)
+                return
+            except TimeoutException:
+                raise
+            except WebDriverException as e:
+                self.ctx.logger.debug(
+                    'Could not wait for "%s" with an observer due to %s, polling instead',
+                    self.target,
+                    e,
+                    exc_info=True,
+                )
+                timeout = max(deadline - time.monotonic(), 0)
+
+        WebDriverWait(
+            self.driver,
+            timeout,
+            poll_frequency=self.ctx.poll_frequency,
+        ).until(condition)
 
     def _wait_for_visibility(self):
         self._verify_target()
-        self._wait_for(EC.visibility_of_element_located(self.locator))
+        self._wait_for(EC.visibility_of_element_located(self.locator), visible=True)
 
     def _wait_for_existence(self):
         self._verify_target()
-        self._wait_for(EC.presence_of_element_located(self.locator))
+        self._wait_for(EC.presence_of_element_located(self.locator), visible=False)
 
     def _navigate_back(self):
         self.driver.back()
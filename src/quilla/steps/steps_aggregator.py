@@ -1,27 +1,28 @@
+import time
 from typing import (
     List,
     Optional,
     Dict,
-    Type,
+    Union,
 )
 
 from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.common.exceptions import StaleElementReferenceException
 
 from quilla.ctx import Context
 from quilla.common.utils import DriverHolder
-from quilla.common.enums import (
-    UITestActions
+from quilla.common.enums import TimingKind
+from quilla.steps.base_steps import BaseStep
+from quilla.steps.step_plan import StepPlan
+from quilla.steps.validations import (
+    XPathValidationBatch,
+    DOMSnapshot,
 )
-from quilla.steps.base_steps import (
-    BaseStep,
-    BaseStepFactory,
-)
-from quilla.steps.steps import TestStep
-from quilla.steps.validations import Validation
-from quilla.steps.outputs import OutputValueStep
+from quilla.browser.command_counter import command_count
 from quilla.reports import (
     BaseReport,
-    StepFailureReport
+    StepFailureReport,
+    StepTiming,
 )
 
 
@@ -29,34 +30,30 @@ class StepsAggregator(DriverHolder):
     '''
     Test step aggregator interface. Useful for abstracting operations
     done on all the steps.
+
+    Attributes:
+        plan: The step plan that the steps of this aggregator were created from
+        step_timings: The timings of the steps performed during the last call to ``run_steps``
     '''
     def __init__(
         self,
         ctx: Context,
-        steps: List[Dict] = [],
+        steps: Union[List[Dict], StepPlan] = [],
         driver: Optional[WebDriver] = None
     ):
         '''
-        Turns an array of dictionaries into appropriate step objects, and saves them in a list
+        Turns an array of dictionaries, or a step plan that was already compiled from them,
+        into appropriate step objects, and saves them in a list
         '''
+        if not isinstance(steps, StepPlan):
+            steps = StepPlan.compile(ctx, steps)
 
-        self._steps: List[BaseStep] = []
+        self.plan = steps
         self._driver = driver
         self.ctx = ctx
-
-        step_factory_selector: Dict[UITestActions, Type[BaseStepFactory]] = {
-            UITestActions.VALIDATE: Validation,
-            UITestActions.OUTPUT_VALUE: OutputValueStep,
-        }
-
-        # Allow plugins to add selectors
-        ctx.logger.info('Running "quilla_step_factory_selector" hook')
-        ctx.pm.hook.quilla_step_factory_selector(selector=step_factory_selector)
-
-        for step in steps:
-            step_factory = step_factory_selector.get(step['action'], TestStep)
-
-            self._steps.append(step_factory.from_dict(ctx, step, driver=driver))  # type: ignore
+        self.step_timings: List[StepTiming] = []
+        self._snapshot: Optional[DOMSnapshot] = None
+        self._steps: List[BaseStep] = steps.create_steps(ctx, driver=driver)
 
     @property
     def driver(self) -> WebDriver:
@@ -77,19 +74,37 @@ class StepsAggregator(DriverHolder):
 
         self._driver = new_driver
 
-    def run_steps(self) -> List[BaseReport]:
+    def run_steps(self, browser: str = '') -> List[BaseReport]:
         '''
-        Performs all bound steps, collecting generated reports and errors
+        Performs all bound steps, collecting generated reports and errors. The duration
+        and the number of WebDriver commands of every step are attached to its report, and
+        are also kept in ``step_timings``
+
+        Args:
+            browser: The name of the browser target, used to label the step timings
 
         Returns:
             A list of reports generated
         '''
         reports: List[BaseReport] = []
+        timings = self.ctx.timings
+        driver = self.driver
+        browser = browser or driver.name
+        self.step_timings = []
+        self._snapshot = None
+        batch_end = 0
         for i, step in enumerate(self._steps):
+            report: Optional[BaseReport] = None
+            started = time.perf_counter()
+            commands = command_count(driver)
             try:
                 self.ctx.logger.debug('Running step %s', step.action.value)
                 self.ctx.current_step = step
-                report = step.perform()
+                if self.ctx.snapshot_validations:
+                    self._attach_snapshot(step)
+                if self.ctx.batch_validations and i >= batch_end:
+                    batch_end = self._prefetch_validations(i)
+                report = self._perform(step)
             except Exception as e:
                 if not self.ctx.suppress_exceptions:
                     # If debugging, don't produce reports since a stack trace will be better
@@ -105,6 +120,30 @@ class StepsAggregator(DriverHolder):
                 reports.append(report)
                 # Exit early, since steps producing exception can prevent future steps from working
                 return reports
+            finally:
+                if not DOMSnapshot.preserves(step):
+                    self._snapshot = None
+
+                step_timing = StepTiming(
+                    browser,
+                    step.action,
+                    i,
+                    started,
+                    time.perf_counter(),
+                    command_count(driver) - commands,
+                )
+                self.step_timings.append(step_timing)
+                if report is not None:
+                    report.timing = step_timing
+
+                timings.record(
+                    TimingKind.STEP,
+                    self.ctx.test_hash,
+                    started,
+                    browser=browser,
+                    step_index=i,
+                    action=step.action.value,
+                )
 
             if report is not None:
                 reports.append(report)
@@ -113,20 +152,105 @@ class StepsAggregator(DriverHolder):
 
         return reports
 
-    def copy(self) -> 'StepsAggregator':
+    def _can_batch(self, step: BaseStep) -> bool:
+        if self.ctx.snapshot_validations and DOMSnapshot.can_use(step):
+            return False  # The step will be validated against the snapshot instead
+
+        return XPathValidationBatch.can_batch(step)
+
+    def _attach_snapshot(self, step: BaseStep):
+        '''
+        Hands a snapshot of the page to a step that can be validated against it, taking
+        a new snapshot if the page could have changed since the last one was taken
+
+        Args:
+            step: The step that is about to be performed
+        '''
+        if not DOMSnapshot.can_use(step):
+            return
+
+        if self._snapshot is None:
+            self.ctx.logger.debug('Taking a new snapshot of the page')
+            self._snapshot = DOMSnapshot.from_driver(self.driver)
+
+        step.snapshot = self._snapshot  # type: ignore
+
+    def _prefetch_validations(self, start: int) -> int:
+        '''
+        Finds the consecutive XPath validations that begin at the given step, and if there
+        is more than one of them, evaluates all of them with a single script call
+
+        Args:
+            start: The index of the first step of the batch
+
+        Returns:
+            The index of the first step after the batch
+        '''
+        end = start
+        while end < len(self._steps) and self._can_batch(self._steps[end]):
+            end += 1
+
+        if end - start > 1:
+            validations = self._steps[start:end]
+            XPathValidationBatch(self.ctx, self.driver, validations).prefetch()  # type: ignore
+
+        return max(end, start + 1)
+
+    def _perform(self, step: BaseStep) -> Optional[BaseReport]:
+        '''
+        Performs a single step. The parameters of the step are resolved again every time it
+        is performed, and elements located by the step are cached while the step is
+        performed, so if one of them becomes stale a read-only step is performed once more
+        with freshly located elements. Steps that interact with the page are never repeated,
+        since part of their interaction could already have happened
+
+        Args:
+            step: The step to perform
+
+        Returns:
+            The report produced by the step, if any
+        '''
+        step.clear_parameters()
+
+        try:
+            return step.perform()
+        except StaleElementReferenceException:
+            if not step.read_only:
+                raise
+
+            self.ctx.logger.debug(
+                'Element became stale while performing step %s, retrying',
+                step.action.value,
+            )
+            step.clear_cache()
+            return step.perform()
+        finally:
+            step.clear_cache()
+
+    def copy(self, ctx: Optional[Context] = None) -> 'StepsAggregator':
         '''
         Creates a copy of the StepsAggregator object
 
         This is used so that each browser can have an independent copy of
         the steps, in case any script would want to edit individual browser
         steps
+
+        Args:
+            ctx: An optional context to bind the copied steps to. If None, the
+                copy will share the context of this aggregator
         '''
+        if ctx is None:
+            ctx = self.ctx
+
         steps = []
 
         for step in self._steps:
-            steps.append(step.copy())
+            step_copy = step.copy()
+            step_copy.ctx = ctx
+            steps.append(step_copy)
 
-        duplicate = StepsAggregator(self.ctx)
+        duplicate = StepsAggregator(ctx, StepPlan())
+        duplicate.plan = self.plan
         duplicate._steps = steps
         duplicate._driver = self._driver
 
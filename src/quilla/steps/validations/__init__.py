@@ -3,3 +3,5 @@
 from .validation_factory import Validation
 from .url import URLValidation
 from .xpath import XPathValidation
+from .xpath_batch import XPathValidationBatch
+from .dom_snapshot import DOMSnapshot
@@ -0,0 +1,233 @@
+'''
+This module contains a cache of decoded VisualParity baseline images. The cache is shared by
+every browser and every Quilla test that runs in the same process, and only lives for a
+single run, so a baseline is downloaded and decoded at most once per run regardless of how
+many validations compare against it.
+
+Baselines can be prefetched concurrently before the validations start, so that they are
+usually already available by the time the browsers reach their VisualParity validations.
+'''
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from io import BytesIO
+from typing import (
+    Dict,
+    Iterable,
+    Optional,
+)
+
+from PIL import Image
+
+from quilla.ctx import Context
+
+
+# Number of baselines that are downloaded at the same time when prefetching
+_prefetch_workers = 8
+
+
+def _image_size(image: Image.Image) -> int:
+    '''
+    Estimates how many bytes of memory a decoded image uses
+    '''
+    return image.width * image.height * len(image.getbands())
+
+
+class BaselineCache:
+    '''
+    A thread-safe LRU cache of decoded baseline images, keyed by baseline ID
+
+    Args:
+        run_id: The ID of the run the cache belongs to
+        max_bytes: The maximum amount of memory the decoded images are allowed to use.
+            The least recently used images are evicted first
+
+    Attributes:
+        run_id: The ID of the run the cache belongs to
+        max_bytes: The maximum amount of memory the decoded images are allowed to use
+    '''
+    def __init__(self, run_id: str, max_bytes: int):
+        self.run_id = run_id
+        self.max_bytes = max_bytes
+        self._images: 'OrderedDict[str, Image.Image]' = OrderedDict()
+        self._size = 0
+        self._pending: Dict[str, Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def get(self, baseline_id: str) -> Optional[Image.Image]:
+        '''
+        Retrieves a cached baseline image, waiting for it first if it is being prefetched
+
+        Args:
+            baseline_id: The ID of the baseline image
+
+        Returns:
+            The decoded baseline image, or None if it is not cached
+        '''
+        with self._lock:
+            pending = self._pending.get(baseline_id)
+
+        if pending is not None:
+            # Errors are logged by the prefetch, the image is then simply not cached
+            pending.exception()
+
+        with self._lock:
+            image = self._images.get(baseline_id)
+            if image is not None:
+                self._images.move_to_end(baseline_id)
+
+            return image
+
+    def put(self, baseline_id: str, image: Image.Image):
+        '''
+        Adds a decoded baseline image to the cache, evicting the least recently used
+        images if necessary. Images larger than the whole cache are not stored
+
+        Args:
+            baseline_id: The ID of the baseline image
+            image: The decoded baseline image. It must not be modified afterwards, since it
+                is shared by every validation that uses the same baseline
+        '''
+        with self._lock:
+            self._put(baseline_id, image)
+
+    def _put(self, baseline_id: str, image: Image.Image):
+        size = _image_size(image)
+        self._discard(baseline_id)
+
+        if size > self.max_bytes:
+            return
+
+        self._images[baseline_id] = image
+        self._size += size
+
+        while self._size > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self._size -= _image_size(evicted)
+
+    def discard(self, baseline_id: str):
+        '''
+        Removes a baseline image from the cache, such as when the baseline is updated.
+        Prefetches of the baseline that are still in progress will not add their image
+        to the cache, since it could be the image that was just replaced
+
+        Args:
+            baseline_id: The ID of the baseline image
+        '''
+        with self._lock:
+            self._generations[baseline_id] = self._generations.get(baseline_id, 0) + 1
+            self._discard(baseline_id)
+
+    def _discard(self, baseline_id: str):
+        image = self._images.pop(baseline_id, None)
+
+        if image is not None:
+            self._size -= _image_size(image)
+
+    def prefetch(self, ctx: Context, baseline_ids: Iterable[str]):
+        '''
+        Starts downloading and decoding baseline images in the background. Baselines that
+        are already cached or being downloaded are skipped
+
+        Args:
+            ctx: The runtime context for the application
+            baseline_ids: The IDs of the baseline images to prefetch
+        '''
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=_prefetch_workers,
+                    thread_name_prefix='quilla-baseline-prefetch',
+                )
+
+            for baseline_id in baseline_ids:
+                if baseline_id in self._images or baseline_id in self._pending:
+                    continue
+
+                self._pending[baseline_id] = self._executor.submit(
+                    self._fetch,
+                    ctx,
+                    baseline_id,
+                    self._generations.get(baseline_id, 0),
+                )
+
+    def _fetch(self, ctx: Context, baseline_id: str, generation: int):
+        try:
+            baseline_bytes = ctx.pm.hook.quilla_get_visualparity_baseline(
+                ctx=ctx,
+                baseline_id=baseline_id,
+            )
+
+            # Missing baselines are left for the validation to report
+            if baseline_bytes:
+                image = decode_baseline(baseline_bytes)
+
+                with self._lock:
+                    # The baseline was discarded while it was being fetched
+                    if self._generations.get(baseline_id, 0) == generation:
+                        self._put(baseline_id, image)
+        except Exception as e:
+            ctx.logger.debug(
+                'Could not prefetch baseline %s due to %s',
+                baseline_id,
+                e,
+                exc_info=True,
+            )
+        finally:
+            with self._lock:
+                self._pending.pop(baseline_id, None)
+
+
+def decode_baseline(baseline_bytes: bytes) -> Image.Image:
+    '''
+    Decodes a baseline image into the RGBA image used for comparisons
+
+    Args:
+        baseline_bytes: The image data of the baseline
+
+    Returns:
+        The fully loaded RGBA image
+    '''
+    image: Image.Image = Image.open(BytesIO(baseline_bytes))
+    image.load()  # Make sure the image is actually loaded
+
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+
+    return image
+
+
+_baseline_cache: Optional[BaselineCache] = None
+_baseline_cache_lock = threading.Lock()
+
+
+def get_baseline_cache(ctx: Context) -> Optional[BaselineCache]:
+    '''
+    Gets the baseline cache for the current run, creating a new one if necessary. The cache
+    is shared by every context of the process, and is replaced whenever the run ID changes
+
+    Args:
+        ctx: The runtime context for the application
+
+    Returns:
+        The baseline cache, or None if the cache is disabled
+    '''
+    global _baseline_cache
+
+    if ctx.baseline_cache_size <= 0:
+        return None
+
+    with _baseline_cache_lock:
+        if _baseline_cache is None or _baseline_cache.run_id != ctx.run_id:
+            _baseline_cache = BaselineCache(ctx.run_id, ctx.baseline_cache_size * 1024 * 1024)
+
+        return _baseline_cache
@@ -0,0 +1,166 @@
+'''
+This module contains the logic for validating XPaths against a snapshot of the page
+instead of the live browser. The page source is retrieved once and parsed with lxml, and
+every following XPath validation that does not need the live browser is evaluated
+in-process until a step that could change the page is performed.
+
+Element text and the attributes that Selenium reads from the live state of the element,
+such as ``value``, ``href`` and boolean attributes, cannot be told from the page source
+alone, so they are always retrieved through the driver.
+
+Snapshots require the optional ``lxml`` dependency, which can be installed with the
+``snapshot`` extra of Quilla.
+'''
+
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+try:
+    from lxml import html as lxml_html
+    from lxml.etree import (
+        ParserError,
+        XPathError,
+    )
+except ImportError:  # pragma: no cover
+    lxml_html = None
+
+from quilla.common.enums import XPathValidationStates
+from quilla.steps.base_steps import (
+    BaseStep,
+    BaseValidation,
+)
+from quilla.steps.outputs import OutputValueStep
+from quilla.steps.validations.xpath import XPathValidation
+
+
+# Attributes that the getAttribute atom of Selenium resolves from the live state of the
+# element (e.g. the current value of an input, or the absolute URL of a link) instead of
+# from the markup
+_live_attributes = frozenset('''
+    value href src style spellcheck allowfullscreen allowpaymentrequest allowusermedia async
+    autofocus autoplay checked compact complete controls declare default defaultchecked
+    defaultselected defer disabled ended formnovalidate hidden indeterminate
+    iscontenteditable ismap itemscope loop multiple muted nohref nomodule noresize noshade
+    novalidate nowrap open paused playsinline pubdate readonly required reversed scoped
+    seamless seeking selected truespeed typemustmatch willvalidate
+'''.split())
+
+
+class DOMSnapshot:
+    '''
+    A parsed snapshot of the page that XPath validations can be evaluated against
+
+    Args:
+        page_source: The serialized DOM of the page
+    '''
+    supported_states = {
+        XPathValidationStates.EXISTS,
+        XPathValidationStates.NOT_EXISTS,
+        XPathValidationStates.HAS_ATTRIBUTE,
+        XPathValidationStates.NOT_HAS_ATTRIBUTE,
+        XPathValidationStates.ATTRIBUTE_HAS_VALUE,
+        XPathValidationStates.NOT_ATTRIBUTE_HAS_VALUE,
+    }
+
+    def __init__(self, page_source: str):
+        self._tree = lxml_html.document_fromstring(page_source)
+        self._results: Dict[str, Optional[List]] = {}
+
+    @classmethod
+    def from_driver(cls, driver: WebDriver) -> 'DOMSnapshot':
+        '''
+        Takes a snapshot of the page currently loaded by the driver
+
+        Args:
+            driver: The driver to take the snapshot with
+
+        Returns:
+            A snapshot of the current page
+        '''
+        return cls(driver.page_source)
+
+    @staticmethod
+    def is_available() -> bool:
+        '''
+        Returns:
+            True if the optional dependencies for snapshots are installed
+        '''
+        return lxml_html is not None
+
+    @classmethod
+    def can_use(cls, step: BaseStep) -> bool:
+        '''
+        Determines if a step can be validated against a snapshot
+
+        Args:
+            step: Any step
+
+        Returns:
+            True if the step is an XPath validation with a state that does not require
+            the live browser
+        '''
+        return isinstance(step, XPathValidation) and step._state in cls.supported_states
+
+    @staticmethod
+    def preserves(step: BaseStep) -> bool:
+        '''
+        Determines if a snapshot is still valid after a step is performed. Only validations
+        and outputs are known to leave the page unchanged, so any other step, including
+        those added by plugins, invalidates the snapshot
+
+        Args:
+            step: The step that was just performed
+
+        Returns:
+            True if the step does not change the page
+        '''
+        return isinstance(step, (BaseValidation, OutputValueStep))
+
+    @staticmethod
+    def has_attribute_value(name: str) -> bool:
+        '''
+        Determines if the value of an attribute can be read from the snapshot, and would
+        match the value retrieved through the driver
+
+        Args:
+            name: The name of the attribute
+
+        Returns:
+            False if the attribute must be retrieved through the driver
+        '''
+        return name.lower() not in _live_attributes
+
+    def find_all(self, xpath: str) -> Optional[List]:
+        '''
+        Finds all the elements matching an XPath in the snapshot
+
+        Args:
+            xpath: The resolved XPath to search for
+
+        Returns:
+            The matching elements, or None if the XPath cannot be evaluated against the
+            snapshot, in which case it should be evaluated by the browser instead
+        '''
+        if xpath not in self._results:
+            self._results[xpath] = self._evaluate(xpath)
+
+        return self._results[xpath]
+
+    def _evaluate(self, xpath: str) -> Optional[List]:
+        try:
+            result = self._tree.xpath(xpath)
+        except (XPathError, ParserError):
+            return None
+
+        # Only node sets made of elements mean the same thing to the browser
+        if not isinstance(result, list) or not all(
+            isinstance(node, lxml_html.HtmlElement) for node in result
+        ):
+            return None
+
+        return result
@@ -0,0 +1,306 @@
+'''
+This module contains the pixel comparison engine used by the VisualParity validation state.
+
+Images are compared as NumPy arrays, one band of rows at a time, so that the memory used
+by the intermediate arrays is bounded regardless of the size of the screenshots, and so that
+the comparison can stop as soon as more pixels differ than the validation allows. Delta
+images, which highlight the differing pixels over a dimmed copy of the baseline, are
+generated one band at a time as well.
+'''
+
+from math import floor
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# Number of image rows compared at a time
+_rows_per_band = 256
+
+# Color of the differing pixels in delta images
+_changed_color = (255, 0, 0)
+
+# How much of the original contrast of the baseline is kept in delta images
+_dimmed_contrast = 0.3
+
+# Offsets of the neighbours of a pixel, as (row, column) offsets into an array padded by 1
+_neighbour_offsets = [
+    (row, column)
+    for row in range(3)
+    for column in range(3)
+    if (row, column) != (1, 1)
+]
+
+
+class ImageDiff:
+    '''
+    The result of comparing a treatment image against a baseline image
+
+    Args:
+        differing_pixels: How many pixels were found to differ
+        total_pixels: How many pixels the images have
+        max_differing_pixels: How many pixels are allowed to differ for the comparison to pass
+        same_size: Whether both images have the same size
+        complete: Whether every pixel was compared. The comparison stops early once more
+            pixels differ than allowed, in which case ``differing_pixels`` is a lower bound
+
+    Attributes:
+        differing_pixels: How many pixels were found to differ
+        total_pixels: How many pixels the images have
+        max_differing_pixels: How many pixels are allowed to differ for the comparison to pass
+        same_size: Whether both images have the same size
+        complete: Whether every pixel was compared
+    '''
+    def __init__(
+        self,
+        differing_pixels: int,
+        total_pixels: int,
+        max_differing_pixels: int,
+        same_size: bool = True,
+        complete: bool = True,
+    ):
+        self.differing_pixels = differing_pixels
+        self.total_pixels = total_pixels
+        self.max_differing_pixels = max_differing_pixels
+        self.same_size = same_size
+        self.complete = complete
+
+    @property
+    def diff_ratio(self) -> float:
+        '''
+        The ratio of pixels that differ between the images
+        '''
+        if self.total_pixels == 0:
+            return 0.0
+
+        return self.differing_pixels / self.total_pixels
+
+    @property
+    def passed(self) -> bool:
+        '''
+        Whether the treatment image is considered to match the baseline image
+        '''
+        return self.same_size and self.differing_pixels <= self.max_differing_pixels
+
+
+def image_to_array(image: Image.Image) -> np.ndarray:
+    '''
+    Converts an image into an array of RGBA pixels
+
+    Args:
+        image: Any Pillow image
+
+    Returns:
+        A (height, width, 4) array of 8-bit channel values
+    '''
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+
+    return np.asarray(image)
+
+
+def _neighbour_matches(
+    source: np.ndarray,
+    other: np.ndarray,
+    start: int,
+    end: int,
+    tolerance: int,
+) -> np.ndarray:
+    '''
+    Finds the pixels in rows ``start:end`` of ``other`` that match at least one of the
+    neighbours of the pixel in the same position of ``source``
+    '''
+    height = source.shape[0]
+    top = max(start - 1, 0)
+    bottom = min(end + 1, height)
+
+    # Pads the band with the neighbouring rows, or with copies of the edges of the image
+    padded = np.pad(
+        source[top:bottom],
+        ((1 - (start - top), 1 - (bottom - end)), (1, 1), (0, 0)),
+        mode='edge',
+    ).astype(np.int16)
+    target = other[start:end].astype(np.int16)
+    rows, columns = target.shape[:2]
+
+    matches = np.zeros((rows, columns), dtype=bool)
+    for row, column in _neighbour_offsets:
+        shifted = padded[row:row + rows, column:column + columns]
+        matches |= (np.abs(shifted - target) <= tolerance).all(axis=2)
+
+    return matches
+
+
+def differing_mask(
+    baseline: np.ndarray,
+    treatment: np.ndarray,
+    start: int,
+    end: int,
+    tolerance: int = 0,
+    anti_aliasing: bool = False,
+) -> np.ndarray:
+    '''
+    Finds the pixels that differ between two images of the same size, for a band of rows
+
+    Args:
+        baseline: The baseline image, as returned by ``image_to_array``
+        treatment: The treatment image, as returned by ``image_to_array``
+        start: The first row of the band
+        end: The row after the last row of the band
+        tolerance: How much any channel of a pixel can change before the pixel is
+            considered to be different
+        anti_aliasing: If True, differences that are explained by the content moving by
+            one pixel, as happens with anti-aliased edges and sub-pixel font rendering,
+            are ignored
+
+    Returns:
+        A (end - start, width) boolean array that is True for every differing pixel
+    '''
+    difference = np.abs(baseline[start:end].astype(np.int16) - treatment[start:end])
+    mask = (difference > tolerance).any(axis=2)
+
+    if anti_aliasing and mask.any():
+        mask &= ~_neighbour_matches(baseline, treatment, start, end, tolerance)
+        mask &= ~_neighbour_matches(treatment, baseline, start, end, tolerance)
+
+    return mask
+
+
+def bands(height: int) -> Tuple[Tuple[int, int], ...]:
+    '''
+    Splits the rows of an image into the bands that are processed at a time
+
+    Args:
+        height: The height of the image
+
+    Returns:
+        (start, end) row ranges that cover the whole image
+    '''
+    return tuple(
+        (start, min(start + _rows_per_band, height))
+        for start in range(0, height, _rows_per_band)
+    )
+
+
+def compare_images(
+    baseline: Image.Image,
+    treatment: Image.Image,
+    tolerance: int = 0,
+    max_diff_ratio: float = 0.0,
+    anti_aliasing: bool = False,
+) -> ImageDiff:
+    '''
+    Compares a treatment image against a baseline image. With the default arguments, the
+    images only match if all of their pixels are identical
+
+    Args:
+        baseline: The baseline image
+        treatment: The treatment image
+        tolerance: How much any channel of a pixel can change before the pixel is
+            considered to be different, between 0 and 255
+        max_diff_ratio: The ratio of pixels that are allowed to differ, between 0 and 1
+        anti_aliasing: Whether to ignore differences caused by anti-aliasing
+
+    Returns:
+        The result of the comparison
+    '''
+    width, height = treatment.size
+    total_pixels = width * height
+
+    if baseline.size != treatment.size:
+        baseline_width, baseline_height = baseline.size
+        total_pixels = max(total_pixels, baseline_width * baseline_height)
+
+        return ImageDiff(total_pixels, total_pixels, 0, same_size=False)
+
+    max_differing_pixels = floor(max_diff_ratio * total_pixels)
+    baseline_pixels = image_to_array(baseline)
+    treatment_pixels = image_to_array(treatment)
+    differing_pixels = 0
+
+    for start, end in bands(height):
+        mask = differing_mask(
+            baseline_pixels,
+            treatment_pixels,
+            start,
+            end,
+            tolerance,
+            anti_aliasing,
+        )
+        differing_pixels += int(np.count_nonzero(mask))
+
+        if differing_pixels > max_differing_pixels:
+            # The comparison has already failed, so there's no need to look any further
+            return ImageDiff(
+                differing_pixels,
+                total_pixels,
+                max_differing_pixels,
+                complete=end == height,
+            )
+
+    return ImageDiff(differing_pixels, total_pixels, max_differing_pixels)
+
+
+def _dim(pixels: np.ndarray) -> np.ndarray:
+    '''
+    Converts RGBA pixels into a faded grayscale version of them
+    '''
+    luminance = pixels[..., :3].astype(np.float32) @ np.array(
+        [0.299, 0.587, 0.114],
+        dtype=np.float32,
+    )
+    dimmed = 255 - (255 - luminance) * _dimmed_contrast
+
+    return np.repeat(dimmed.astype(np.uint8)[..., np.newaxis], 3, axis=2)
+
+
+def delta_image(
+    baseline: Image.Image,
+    treatment: Image.Image,
+    tolerance: int = 0,
+    anti_aliasing: bool = False,
+) -> Image.Image:
+    '''
+    Creates an image that highlights every pixel of the treatment image that differs from
+    the baseline image, drawn over a dimmed copy of the baseline. If the images have
+    different sizes, every pixel outside of the area they share is highlighted
+
+    Args:
+        baseline: The baseline image
+        treatment: The treatment image
+        tolerance: How much any channel of a pixel can change before the pixel is
+            considered to be different, between 0 and 255
+        anti_aliasing: Whether to ignore differences caused by anti-aliasing
+
+    Returns:
+        An RGB image as large as the largest of both images
+    '''
+    baseline_pixels = image_to_array(baseline)
+    treatment_pixels = image_to_array(treatment)
+
+    width = max(baseline.width, treatment.width)
+    height = max(baseline.height, treatment.height)
+    shared_width = min(baseline.width, treatment.width)
+    shared_height = min(baseline.height, treatment.height)
+
+    # Views of the area that both images share, so no pixels are copied
+    baseline_pixels = baseline_pixels[:shared_height, :shared_width]
+    treatment_pixels = treatment_pixels[:shared_height, :shared_width]
+
+    delta = Image.new('RGB', (width, height), _changed_color)
+
+    for start, end in bands(shared_height):
+        band = _dim(baseline_pixels[start:end])
+        mask = differing_mask(
+            baseline_pixels,
+            treatment_pixels,
+            start,
+            end,
+            tolerance,
+            anti_aliasing,
+        )
+        band[mask] = _changed_color
+        delta.paste(Image.fromarray(band, 'RGB'), (0, start))
+
+    return delta
@@ -0,0 +1,109 @@
+'''
+This module contains the logic to encode VisualParity images to PNG only when they are
+actually stored. Encoding a large screenshot is often the most expensive part of a
+VisualParity validation, and most comparisons pass without storing any image.
+
+Images can optionally be encoded on a pool of background threads, so that the encoding
+runs while the validation keeps preparing the rest of its report.
+'''
+
+import threading
+from io import BytesIO
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import Optional
+
+from PIL import Image
+
+
+def encode_png(image: Image.Image) -> bytes:
+    '''
+    Encodes an image as a PNG
+
+    Args:
+        image: Any Pillow image
+
+    Returns:
+        The PNG data of the image
+    '''
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+
+    return buffer.getvalue()
+
+
+class PNGImage:
+    '''
+    An image whose PNG data is only produced the first time it is needed
+
+    Args:
+        image: The image to encode
+        png_bytes: PNG data that already matches the image, such as the original
+            screenshot when nothing has been drawn over it. If given, the image is
+            never encoded
+        executor: An optional executor to encode the image on
+    '''
+    def __init__(
+        self,
+        image: Image.Image,
+        png_bytes: Optional[bytes] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        self.image = image
+        self._png_bytes = png_bytes
+        self._executor = executor
+        self._future: Optional[Future] = None
+
+    def prefetch(self):
+        '''
+        Starts encoding the image in the background if an executor is available, so that
+        the data is ready by the time it is needed
+        '''
+        if self._png_bytes is None and self._future is None and self._executor is not None:
+            self._future = self._executor.submit(encode_png, self.image)
+
+    @property
+    def data(self) -> bytes:
+        '''
+        The PNG data of the image. Blocks until the image is encoded
+        '''
+        if self._png_bytes is None:
+            if self._future is not None:
+                self._png_bytes = self._future.result()
+            else:
+                self._png_bytes = encode_png(self.image)
+
+        return self._png_bytes
+
+
+_encoder_pool: Optional[ThreadPoolExecutor] = None
+_encoder_pool_lock = threading.Lock()
+
+
+def get_encoder_pool(workers: int) -> Optional[ThreadPoolExecutor]:
+    '''
+    Gets the image encoder pool for the current process, creating a new one if necessary.
+    The pool is shared by every context of the process
+
+    Args:
+        workers: The number of encoder threads. The pool is only created with the number of
+            workers requested by the first call
+
+    Returns:
+        The encoder pool, or None if ``workers`` is less than 1
+    '''
+    global _encoder_pool
+
+    if workers < 1:
+        return None
+
+    with _encoder_pool_lock:
+        if _encoder_pool is None:
+            _encoder_pool = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix='quilla-png-encoder',
+            )
+
+        return _encoder_pool
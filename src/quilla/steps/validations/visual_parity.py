@@ -10,6 +10,9 @@ This module is then used by the XPathValidation class to perform the VisualParit
 
 from io import BytesIO
 from typing import (
+    Any,
+    Dict,
+    List,
     Optional,
     Tuple,
 )
@@ -18,8 +21,9 @@ from math import (
     floor,
 )
 
+import numpy as np
 from PIL import Image
-from selenium.webdriver.remote.webelement import WebElement
+from selenium.common.exceptions import NoSuchElementException
 
 from quilla.ctx import Context
 from quilla.reports import (
@@ -33,6 +37,43 @@ from quilla.common.enums import (
 from quilla.common.exceptions import FailedStepException
 
 from quilla.steps.base_steps import BaseStep
+from quilla.steps.validations.image_diff import (
+    ImageDiff,
+    compare_images,
+    delta_image,
+)
+from quilla.steps.validations.baseline_cache import (
+    decode_baseline,
+    get_baseline_cache,
+)
+from quilla.steps.validations.image_encoding import (
+    PNGImage,
+    get_encoder_pool,
+)
+
+
+# Retrieves the bounding rects of the target element and of every excluded element at once.
+# Only the position of the excluded elements relative to the target matters, so rects are
+# relative to the viewport
+_bounding_rects_script = '''
+var getRect = function (element) {
+    var rect = element.getBoundingClientRect();
+    return {x: rect.left, y: rect.top, width: rect.width, height: rect.height};
+};
+
+return {
+    target: getRect(arguments[0]),
+    exclusions: arguments[1].map(function (xpath) {
+        var node = document.evaluate(
+            xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        if (node === null || node.nodeType !== Node.ELEMENT_NODE) {
+            return null;
+        }
+        return getRect(node);
+    })
+};
+'''
 
 
 class VisualParityState(BaseStep):
@@ -75,6 +116,8 @@ class VisualParityState(BaseStep):
         msg: str = '',
         baseline_image_uri: str = '',
         treatment_image_uri: str = '',
+        delta_image_uri: str = '',
+        diff_ratio: Optional[float] = None,
     ) -> VisualParityReport:
         return VisualParityReport(
             success=success,
@@ -83,28 +126,36 @@ class VisualParityState(BaseStep):
             baseline_id=self.baseline_id,
             msg=msg,
             baseline_image_uri=baseline_image_uri,
-            treatment_image_uri=treatment_image_uri
+            treatment_image_uri=treatment_image_uri,
+            delta_image_uri=delta_image_uri,
+            diff_ratio=diff_ratio,
         )
 
-    def _update_baseline(self):
-
-        baseline_bytes = self.element.screenshot_as_png
-        baseline_image = Image.open(BytesIO(baseline_bytes))
-
-        self.perform_exclusions(baseline_image)
+    def _update_baseline(self, baseline_image: Optional[PNGImage] = None):
+        '''
+        Stores a screenshot of the target element as the new baseline image
 
-        baseline_bytes = self._get_image_bytes(baseline_image)
+        Args:
+            baseline_image: The screenshot to store, with the exclusions already performed.
+                If not given, a new screenshot is taken
+        '''
+        if baseline_image is None:
+            baseline_image = self._take_screenshot()
 
         image_uri = self.hook.quilla_store_image(
             ctx=self.ctx,
             baseline_id=self.baseline_id,
-            image_bytes=baseline_bytes,
+            image_bytes=baseline_image.data,
             image_type=VisualParityImageType.BASELINE
         )
 
         if image_uri is None:
             return self._no_storage_mechanism_report
 
+        baseline_cache = get_baseline_cache(self.ctx)
+        if baseline_cache is not None:
+            baseline_cache.discard(self.baseline_id)
+
         if image_uri == '':
             return self._create_report(
                 success=False,
@@ -124,122 +175,205 @@ class VisualParityState(BaseStep):
             msg='No baseline storage mechanism configured',
         )
 
-    def _get_image_bytes(self, image: Image.Image):
-        buffer = BytesIO()
-        image.save(buffer, format='PNG')
-        buffer.seek(0)
+    def _take_screenshot(self) -> PNGImage:
+        '''
+        Takes a screenshot of the target element and performs the exclusions on it.
+        The screenshot is only encoded again if any element was excluded from it, and
+        even then only once its data is needed
+
+        Returns:
+            The screenshot of the target element
+        '''
+        screenshot_bytes = self.element.screenshot_as_png
+        image = Image.open(BytesIO(screenshot_bytes))
+        image.load()  # Make sure the image is actually loaded
+
+        if self.perform_exclusions(image):
+            return PNGImage(image, executor=self._encoder_pool)
 
-        return buffer.getvalue()
+        return PNGImage(image, png_bytes=screenshot_bytes)
 
-    def perform_exclusions(self, image: Image.Image):
+    @property
+    def _encoder_pool(self):
+        return get_encoder_pool(self.ctx.image_encoder_workers)
+
+    def perform_exclusions(self, image: Image.Image) -> bool:
         '''
         Using the 'excludeXPaths' parameter, grabs all the necessary elements
         that should be excluded, and removes them from the screenshot by covering
         the element position with a black box that is of the same size as the
         bounding box of that element.
 
-        This mutates the original image, so nothing is returned
+        The bounding boxes of the target and of every excluded element are retrieved with
+        a single script call, and all of the boxes are covered at once.
+
+        This mutates the original image
 
         Args:
-            image: The image to perform the exclusions on
+            image: The screenshot of the target element to perform the exclusions on
+
+        Returns:
+            True if any element was excluded from the image, False otherwise
+
+        Raises:
+            NoSuchElementException: if an exclusion XPath does not select an element
+            FailedStepException: if an excluded element is not within the bounding box
+                of the target element
         '''
 
         exclusion_xpaths = self._parameters.get('excludeXPaths', [])
 
-        for xpath in exclusion_xpaths:
-            self._exclude_element_from_image(image, xpath)
+        if not exclusion_xpaths:
+            return False
 
-    def _exclude_element_from_image(self, image: Image.Image, exclude_target: str):
-        resolved_exclusion_target = self.ctx.perform_replacements(exclude_target)
-        exclude_element = self.driver.find_element_by_xpath(resolved_exclusion_target)
+        mask = np.zeros((image.height, image.width), dtype=np.uint8)
 
-        if not self._verify_exclude_target_within_bounding_box(exclude_element):
-            raise FailedStepException(
-                'Exclusion target element %s is not within the bounding box of %s' % (
-                    exclude_target, self._target
-                )
-            )
+        for left, top, right, bottom in self._exclusion_boxes(exclusion_xpaths):
+            mask[top:bottom, left:right] = 255
 
-        pos = self._get_element_location(exclude_element)
-        size = self._get_element_size(exclude_element)
+        image.paste(0, mask=Image.fromarray(mask, 'L'))
 
-        censor_image = Image.new(image.mode, size)
+        return True
 
-        image.paste(censor_image, pos)
-
-    def _get_element_bbox(self, element: WebElement) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    def _exclusion_boxes(self, exclusion_xpaths: List[str]) -> List[Tuple[int, int, int, int]]:
         '''
-        Given a web element, calculates its bounding box
+        Finds the bounding boxes of the excluded elements, relative to the target element
 
         Args:
-            element: A web element retrieved by Selenium
+            exclusion_xpaths: The unresolved XPaths of the excluded elements
 
         Returns:
-            A pair of tuples representing the bottom left and top right corners of the bounding box
+            A (left, top, right, bottom) tuple for every excluded element
         '''
-        x, y = self._get_element_location(element)
-        width, height = self._get_element_size(element)
+        resolved_xpaths = [self.ctx.perform_replacements(xpath) for xpath in exclusion_xpaths]
+
+        rects = self.driver.execute_script(_bounding_rects_script, self.element, resolved_xpaths)
+
+        target_left, target_top, target_right, target_bottom = self._get_bbox(rects['target'])
+        boxes = []
+
+        for exclude_target, rect in zip(exclusion_xpaths, rects['exclusions']):
+            if rect is None:
+                raise NoSuchElementException(
+                    'Unable to locate exclusion target element %s' % exclude_target
+                )
+
+            left, top, right, bottom = self._get_bbox(rect)
+
+            # The element must be entirely within the bounding box of the target
+            if not (
+                target_left <= left and target_top <= top and
+                right <= target_right and bottom <= target_bottom
+            ):
+                raise FailedStepException(
+                    'Exclusion target element %s is not within the bounding box of %s' % (
+                        exclude_target, self._target
+                    )
+                )
 
-        top_left = (x, y)
-        bottom_right = (x + width, y + height)
+            boxes.append((
+                left - target_left,
+                top - target_top,
+                right - target_left,
+                bottom - target_top,
+            ))
 
-        return top_left, bottom_right
+        return boxes
 
-    def _get_element_size(self, element: WebElement) -> Tuple[int, int]:
+    def _get_bbox(self, rect: Dict[str, float]) -> Tuple[int, int, int, int]:
         '''
-        Gets the given element integer size
+        Given the bounding rect of an element, calculates its integer bounding box
 
         Args:
-            element: A web element retrieved by Selenium
+            rect: The rect of the element, as returned by the bounding rects script
 
         Returns:
-            A (width, height) integer tuple describing the size of the element
+            A (left, top, right, bottom) integer tuple describing the bounding box
         '''
+        x = floor(rect['x'])
+        y = floor(rect['y'])
 
-        size = element.size
-        width = ceil(size['width'])
-        height = ceil(size['height'])
-
-        return (width, height)
+        return (x, y, x + ceil(rect['width']), y + ceil(rect['height']))
 
-    def _get_element_location(self, element: WebElement) -> Tuple[int, int]:
+    def _comparison_options(self) -> Dict[str, Any]:
         '''
-        Gets the integer location of the given element
-
-        Args:
-            element: A web element retrieved by Selenium
+        Reads the optional 'tolerance', 'maxDiffRatio' and 'antiAliasing' parameters that
+        control how strictly the treatment image is compared against the baseline
 
         Returns:
-            A (x, y) integer tuple describing the location of the element
+            The keyword arguments for ``compare_images``
+
+        Raises:
+            FailedStepException: if any of the parameters is not within its allowed range
         '''
-        loc = element.location
+        parameters = self.parameters
+        tolerance = parameters.get('tolerance', 0)
+        max_diff_ratio = parameters.get('maxDiffRatio', 0)
+        anti_aliasing = parameters.get('antiAliasing', False)
 
-        x = floor(loc['x'])
-        y = floor(loc['y'])
+        if isinstance(tolerance, bool) or not isinstance(tolerance, int) or \
+                not 0 <= tolerance <= 255:
+            raise FailedStepException(
+                f'"tolerance" must be an integer between 0 and 255, got "{tolerance}"'
+            )
 
-        return (x, y)
+        if isinstance(max_diff_ratio, bool) or not isinstance(max_diff_ratio, (int, float)) or \
+                not 0 <= max_diff_ratio <= 1:
+            raise FailedStepException(
+                f'"maxDiffRatio" must be a number between 0 and 1, got "{max_diff_ratio}"'
+            )
 
-    def _verify_exclude_target_within_bounding_box(self, exclude_element: WebElement) -> bool:
-        '''
-        Ensures that the XPath specified is within the actual bounding box of the
-        current element target.
+        if not isinstance(anti_aliasing, bool):
+            raise FailedStepException(
+                f'"antiAliasing" must be true or false, got "{anti_aliasing}"'
+            )
 
-        Note, this will return False if the XPath is only partially within the bounding
-        box of the target.
+        return {
+            'tolerance': tolerance,
+            'max_diff_ratio': max_diff_ratio,
+            'anti_aliasing': anti_aliasing,
+        }
 
-        Args:
-            exclude_target: The web element that should be excluded
+    def _diff_message(self, diff: ImageDiff, treatment_image: Image.Image) -> str:
+        if not diff.same_size:
+            return 'Treatment image size %sx%s does not match the baseline image size' % (
+                treatment_image.size
+            )
+
+        return '%s%.4f%% of the pixels differ from the baseline, but only %.4f%% are allowed' % (
+            '' if diff.complete else 'At least ',
+            diff.diff_ratio * 100,
+            diff.max_differing_pixels / diff.total_pixels * 100,
+        )
+
+    def _store_delta_image(
+        self,
+        baseline_image: Image.Image,
+        treatment_image: Image.Image,
+        comparison_options: Dict[str, Any],
+    ) -> str:
+        '''
+        Creates and stores an image that highlights the pixels of the treatment image that
+        differ from the baseline image
 
         Returns:
-            True if the element is within the target bounding box, False otherwise.
+            The URI of the stored delta image, or the empty string if it was not stored
         '''
-        exclude_left, exclude_right = self._get_element_bbox(exclude_element)
-        target_left, target_right = self._get_element_bbox(self.element)
+        delta = delta_image(
+            baseline_image,
+            treatment_image,
+            tolerance=comparison_options['tolerance'],
+            anti_aliasing=comparison_options['anti_aliasing'],
+        )
 
-        bottom_contained = target_left[0] <= exclude_left[0] and target_left[1] <= exclude_left[1]
-        top_contained = exclude_right[0] <= target_right[0] and exclude_right[1] <= target_right[1]
+        delta_uri = self.hook.quilla_store_image(
+            ctx=self.ctx,
+            baseline_id=self.baseline_id,
+            image_bytes=PNGImage(delta).data,
+            image_type=VisualParityImageType.DELTA,
+        )
 
-        return bottom_contained and top_contained
+        return delta_uri or ''
 
     def perform(self) -> ValidationReport:
         self._verify_parameters('baselineID')
@@ -253,45 +387,58 @@ class VisualParityState(BaseStep):
         if update_baseline:
             return self._update_baseline()
 
-        treatment_image_bytes = self.element.screenshot_as_png
-        treatment_image = Image.open(BytesIO(treatment_image_bytes))
-        treatment_image.load()  # Make sure the image is actually loaded
+        comparison_options = self._comparison_options()
 
-        self.perform_exclusions(treatment_image)
+        treatment = self._take_screenshot()
+        treatment_image = treatment.image
 
-        treatment_image_bytes = self._get_image_bytes(treatment_image)
+        baseline_cache = get_baseline_cache(self.ctx)
+        baseline_image = None
 
-        baseline_image_bytes: Optional[bytes] = self.hook.quilla_get_visualparity_baseline(
-            ctx=self.ctx,
-            baseline_id=baseline_id
-        )
+        if baseline_cache is not None:
+            baseline_image = baseline_cache.get(baseline_id)
 
-        if baseline_image_bytes is None:
-            return self._no_storage_mechanism_report
+        if baseline_image is None:
+            baseline_image_bytes: Optional[bytes] = self.hook.quilla_get_visualparity_baseline(
+                ctx=self.ctx,
+                baseline_id=baseline_id
+            )
 
-        if baseline_image_bytes == b'':
-            if self.ctx.create_baseline_if_none:
-                return self._update_baseline()
+            if baseline_image_bytes is None:
+                return self._no_storage_mechanism_report
 
-            return self._create_report(
-                success=False,
-                msg='No baseline image found'
-            )
+            if baseline_image_bytes == b'':
+                if self.ctx.create_baseline_if_none:
+                    return self._update_baseline(treatment)
+
+                return self._create_report(
+                    success=False,
+                    msg='No baseline image found'
+                )
+
+            baseline_image = decode_baseline(baseline_image_bytes)
 
-        baseline_image = Image.open(BytesIO(baseline_image_bytes))
-        baseline_image.load()  # Make sure the image is actualy loaded
+            if baseline_cache is not None:
+                baseline_cache.put(baseline_id, baseline_image)
 
-        success = baseline_image == treatment_image  # Run the comparison with Pillow
+        diff = compare_images(baseline_image, treatment_image, **comparison_options)
 
-        if success:
+        if diff.passed:
             return self._create_report(
-                success=success,
+                success=True,
+                diff_ratio=diff.diff_ratio,
             )
 
+        # The treatment image is only needed once the comparison fails, so it can be encoded
+        # in the background while the delta image is created
+        treatment.prefetch()
+
+        delta_uri = self._store_delta_image(baseline_image, treatment_image, comparison_options)
+
         treatment_uri = self.hook.quilla_store_image(
             ctx=self.ctx,
             baseline_id=baseline_id,
-            image_bytes=treatment_image_bytes,
+            image_bytes=treatment.data,
             image_type=VisualParityImageType.TREATMENT,
         )
 
@@ -303,6 +450,9 @@ class VisualParityState(BaseStep):
 
         return self._create_report(
             success=False,
+            msg=self._diff_message(diff, treatment_image),
             baseline_image_uri=baseline_uri,
             treatment_image_uri=treatment_uri,
+            delta_image_uri=delta_uri,
+            diff_ratio=diff.diff_ratio,
         )
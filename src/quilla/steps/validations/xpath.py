@@ -1,9 +1,11 @@
 import re
 from typing import (
+    Any,
     Optional,
     Dict,
     Callable,
-    List
+    List,
+    TYPE_CHECKING,
 )
 
 from selenium.webdriver.remote.webdriver import WebDriver
@@ -22,6 +24,12 @@ from quilla.reports import (
 from quilla.steps.base_steps import BaseValidation
 from quilla.steps.validations.visual_parity import VisualParityState
 
+if TYPE_CHECKING:
+    from quilla.steps.validations.dom_snapshot import DOMSnapshot
+
+
+_not_prefetched = object()
+
 
 class XPathValidation(BaseValidation):
     '''
@@ -32,6 +40,13 @@ class XPathValidation(BaseValidation):
         target: The XPath of the element to perform the validation against
         state: The desired state of the target web element
         driver: An optional argument to allow the driver to be bound at object creation.
+
+    Attributes:
+        prefetched: The data collected for the target by an XPathValidationBatch, if the
+            validation is being evaluated as part of a batch. Any value missing from it is
+            retrieved through the driver
+        snapshot: A snapshot of the page to evaluate the validation against instead of the
+            live browser, if one is available for the current state of the page
     '''
     def __init__(
         self,
@@ -67,6 +82,49 @@ class XPathValidation(BaseValidation):
             parameters=parameters,
             driver=driver
         )
+        self.prefetched: Optional[Dict[str, Any]] = None
+        self.snapshot: Optional['DOMSnapshot'] = None
+
+    def clear_cache(self):
+        super().clear_cache()
+        self.prefetched = None
+        self.snapshot = None
+
+    def _snapshot_elements(self) -> Optional[list]:
+        '''
+        Finds the elements matching the target in the snapshot of the page
+
+        Returns:
+            The matching elements, or None if there is no snapshot or the target
+            cannot be evaluated against it
+        '''
+        if self.snapshot is None:
+            return None
+
+        return self.snapshot.find_all(self.target)
+
+    def _prefetched_value(self, key: str, name: Optional[str] = None) -> Any:
+        '''
+        Retrieves a value collected by an XPathValidationBatch
+
+        Args:
+            key: The kind of value, i.e. 'visible', 'attributes' or 'properties'
+            name: The name of the attribute or property, if applicable
+
+        Returns:
+            The collected value, or a sentinel object if the value was not collected
+        '''
+        if self.prefetched is None or not self.prefetched['exists']:
+            # The element is located through the driver so missing elements
+            # produce the same exceptions as they would without batching
+            return _not_prefetched
+
+        value = self.prefetched.get(key, _not_prefetched)
+
+        if name is not None and value is not _not_prefetched:
+            value = value.get(name, _not_prefetched)
+
+        return value
 
     def _find_all(self) -> List[WebElement]:
         '''
@@ -80,28 +138,65 @@ class XPathValidation(BaseValidation):
         '''
         return self.driver.find_elements(By.XPATH, self.target)
 
+    def _element_text(self) -> str:
+        return self.element.text
+
+    def _element_property(self, name: str) -> Any:
+        value = self._prefetched_value('properties', name)
+
+        if value is _not_prefetched:
+            value = self.element.get_property(name)
+
+        return value
+
+    def _element_attribute(self, name: str) -> Optional[str]:
+        value = self._prefetched_value('attributes', name)
+
+        if value is _not_prefetched:
+            snapshot_elements = self._snapshot_elements()
+
+            if snapshot_elements and self.snapshot.has_attribute_value(name):  # type: ignore
+                value = snapshot_elements[0].get(name)
+            else:
+                value = self.element.get_attribute(name)
+
+        return value
+
     def _element_text_matches_pattern(self) -> bool:
         self._verify_parameters('pattern')
-        element_text = self.element.text
+        element_text = self._element_text()
         pattern = self.parameters['pattern']
 
         return re.search(pattern, element_text) is not None
 
     def _element_exists(self) -> bool:
+        if self.prefetched is not None:
+            return self.prefetched['exists']
+
+        snapshot_elements = self._snapshot_elements()
+
+        if snapshot_elements is not None:
+            return len(snapshot_elements) > 0
+
         return len(self._find_all()) > 0
 
     def _element_visible(self) -> bool:
-        return self.element.is_displayed()
+        visible = self._prefetched_value('visible')
+
+        if visible is _not_prefetched:
+            visible = self.element.is_displayed()
+
+        return visible
 
     def _element_has_property(self) -> bool:
         self._verify_parameters('name')
 
-        return self.element.get_property(self.parameters['name']) is not None
+        return self._element_property(self.parameters['name']) is not None
 
     def _element_has_attribute(self) -> bool:
         self._verify_parameters('name')
 
-        return self.element.get_attribute(self.parameters['name']) is not None
+        return self._element_attribute(self.parameters['name']) is not None
 
     def _element_check_value(self, value_fetch_fn: Callable[[str], Optional[str]]) -> bool:
         self._verify_parameters('name', 'value')
@@ -111,10 +206,10 @@ class XPathValidation(BaseValidation):
         return element_value == self.parameters['value']
 
     def _element_property_has_value(self) -> bool:
-        return self._element_check_value(self.element.get_property)
+        return self._element_check_value(self._element_property)
 
     def _element_attribute_has_value(self) -> bool:
-        return self._element_check_value(self.element.get_attribute)
+        return self._element_check_value(self._element_attribute)
 
     def _check_exists(self) -> ValidationReport:
         return self._create_report(
@@ -123,7 +218,7 @@ class XPathValidation(BaseValidation):
 
     def _check_not_exists(self) -> ValidationReport:
         return self._create_report(
-            not self._element_exists
+            not self._element_exists()
         )
 
     def _check_visible(self) -> ValidationReport:
@@ -133,7 +228,7 @@ class XPathValidation(BaseValidation):
 
     def _check_not_visible(self) -> ValidationReport:
         return self._create_report(
-            not self._element_visible
+            not self._element_visible()
         )
 
     def _check_text_matches(self) -> ValidationReport:
@@ -142,7 +237,7 @@ class XPathValidation(BaseValidation):
 
         if not text_matches:
             msg = (
-                f'Element text "{self.element.text}" '
+                f'Element text "{self._element_text()}" '
                 f'does not match pattern "{self._parameters["pattern"]}"'
             )
         return self._create_report(
@@ -156,7 +251,7 @@ class XPathValidation(BaseValidation):
 
         if text_matches:
             msg = (
-                f'Element text "{self.element.text}" '
+                f'Element text "{self._element_text()}" '
                 f'matches pattern "{self._parameters["pattern"]}"'
             )
         return self._create_report(
@@ -201,7 +296,7 @@ class XPathValidation(BaseValidation):
 
     def _check_not_attribute_has_value(self) -> ValidationReport:
         return self._create_report(
-            not self._element_attribute_has_value
+            not self._element_attribute_has_value()
         )
 
     def _check_visual_parity(self) -> ValidationReport:
@@ -0,0 +1,206 @@
+'''
+This module contains the logic to evaluate a group of consecutive XPath validations with
+a single script call. Validations never change the state of the page, so the data that
+all of them need (existence, visibility, attribute and property values) can be collected
+at once with ``document.evaluate`` instead of with one or more WebDriver round trips per
+validation.
+
+Element text is not collected by the script. The browser drivers compute it natively and
+Selenium does not ship the atom they use, so the text is always retrieved through the
+driver to keep batched and unbatched validations in agreement.
+
+The collected data is handed to each XPathValidation, which then produces its report as
+usual. Any value that could not be collected is retrieved through the driver instead.
+'''
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Set,
+)
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import (
+    getAttribute_js,
+    isDisplayed_js,
+)
+
+from quilla.ctx import Context
+from quilla.common.enums import XPathValidationStates
+from quilla.steps.base_steps import BaseStep
+from quilla.steps.validations.xpath import XPathValidation
+
+
+# Uses the same atoms as selenium, so that visibility and attributes are evaluated
+# exactly like WebElement.is_displayed and WebElement.get_attribute would
+_batch_script = '''
+var getAttribute = (%s);
+var isDisplayed = (%s);
+var isPrimitive = function (value) {
+    return value === null || ['string', 'number', 'boolean'].indexOf(typeof value) !== -1;
+};
+
+return arguments[0].map(function (query) {
+    var node;
+    try {
+        node = document.evaluate(
+            query.xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+    } catch (e) {
+        return null;
+    }
+
+    if (node === null) {
+        return {exists: false};
+    }
+    if (node.nodeType !== Node.ELEMENT_NODE) {
+        return null;
+    }
+
+    var result = {exists: true, attributes: {}, properties: {}};
+    if (query.visible) {
+        result.visible = isDisplayed(node);
+    }
+    query.attributes.forEach(function (name) {
+        result.attributes[name] = getAttribute(node, name);
+    });
+    query.properties.forEach(function (name) {
+        var value = node[name];
+        if (value === undefined) {
+            result.properties[name] = null;
+        } else if (isPrimitive(value)) {
+            result.properties[name] = value;
+        }
+    });
+    return result;
+});
+''' % (getAttribute_js, isDisplayed_js)
+
+
+class XPathValidationBatch:
+    '''
+    A group of consecutive XPath validations that are evaluated with a single script call
+
+    Args:
+        ctx: The runtime context for the application
+        driver: The driver used to run the script
+        validations: The XPath validations to evaluate together
+
+    Attributes:
+        validations: The XPath validations to evaluate together
+    '''
+    batchable_states = {
+        XPathValidationStates.EXISTS,
+        XPathValidationStates.NOT_EXISTS,
+        XPathValidationStates.VISIBLE,
+        XPathValidationStates.NOT_VISIBLE,
+        XPathValidationStates.TEXT_MATCHES,
+        XPathValidationStates.NOT_TEXT_MATCHES,
+        XPathValidationStates.HAS_PROPERTY,
+        XPathValidationStates.NOT_HAS_PROPERTY,
+        XPathValidationStates.PROPERTY_HAS_VALUE,
+        XPathValidationStates.NOT_PROPERTY_HAS_VALUE,
+        XPathValidationStates.HAS_ATTRIBUTE,
+        XPathValidationStates.NOT_HAS_ATTRIBUTE,
+        XPathValidationStates.ATTRIBUTE_HAS_VALUE,
+        XPathValidationStates.NOT_ATTRIBUTE_HAS_VALUE,
+    }
+    visibility_states = {
+        XPathValidationStates.VISIBLE,
+        XPathValidationStates.NOT_VISIBLE,
+    }
+    attribute_states = {
+        XPathValidationStates.HAS_ATTRIBUTE,
+        XPathValidationStates.NOT_HAS_ATTRIBUTE,
+        XPathValidationStates.ATTRIBUTE_HAS_VALUE,
+        XPathValidationStates.NOT_ATTRIBUTE_HAS_VALUE,
+    }
+    property_states = {
+        XPathValidationStates.HAS_PROPERTY,
+        XPathValidationStates.NOT_HAS_PROPERTY,
+        XPathValidationStates.PROPERTY_HAS_VALUE,
+        XPathValidationStates.NOT_PROPERTY_HAS_VALUE,
+    }
+
+    def __init__(self, ctx: Context, driver: WebDriver, validations: List[XPathValidation]):
+        self._ctx = ctx
+        self._driver = driver
+        self.validations = validations
+
+    @classmethod
+    def can_batch(cls, step: BaseStep) -> bool:
+        '''
+        Determines if a step can be evaluated as part of a batch
+
+        Args:
+            step: Any step
+
+        Returns:
+            True if the step is an XPath validation with a state supported by batches
+        '''
+        return isinstance(step, XPathValidation) and step._state in cls.batchable_states
+
+    def _build_queries(self) -> Dict[str, Dict[str, Any]]:
+        '''
+        Groups the data needed by every validation by the XPath it targets
+        '''
+        queries: Dict[str, Dict[str, Any]] = {}
+        attributes: Dict[str, Set[str]] = {}
+        properties: Dict[str, Set[str]] = {}
+
+        for validation in self.validations:
+            xpath = validation.target
+            state = validation._state
+            query = queries.setdefault(xpath, {'xpath': xpath, 'visible': False})
+            parameters = validation.parameters or {}
+
+            query['visible'] = query['visible'] or state in self.visibility_states
+
+            if state in self.attribute_states and 'name' in parameters:
+                attributes.setdefault(xpath, set()).add(parameters['name'])
+            if state in self.property_states and 'name' in parameters:
+                properties.setdefault(xpath, set()).add(parameters['name'])
+
+        for xpath, query in queries.items():
+            query['attributes'] = sorted(attributes.get(xpath, []))
+            query['properties'] = sorted(properties.get(xpath, []))
+
+        return queries
+
+    def prefetch(self):
+        '''
+        Runs the script that collects the data for every validation in the batch, and hands
+        each validation the data for its target. If the script fails, the validations are
+        left to retrieve their data through the driver
+        '''
+        try:
+            queries = self._build_queries()
+            xpaths = list(queries.keys())
+
+            self._ctx.logger.debug(
+                'Evaluating %s XPath validations with %s targets in a single script',
+                len(self.validations),
+                len(xpaths),
+            )
+
+            results = self._driver.execute_script(
+                _batch_script,
+                [queries[xpath] for xpath in xpaths]
+            )
+        except Exception as e:
+            # Any error, such as an invalid context expression in one of the validations,
+            # will be reported by the validation that causes it when it is performed
+            self._ctx.logger.debug(
+                'Could not evaluate XPath validations in a batch due to %s',
+                e,
+                exc_info=True,
+            )
+            return
+
+        prefetched = dict(zip(xpaths, results))
+
+        for validation in self.validations:
+            # Targets the script could not evaluate, e.g. XPaths that do not select an
+            # element, are null and are therefore evaluated through the driver
+            validation.prefetched = prefetched.get(validation.target)
@@ -0,0 +1,106 @@
+'''
+Module containing the event-driven wait engine. Instead of asking the browser whether an
+element exists (or is visible) every few hundred milliseconds, a single asynchronous script
+is installed in the page, which watches the DOM with a MutationObserver and returns as soon
+as the condition is met.
+'''
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import isDisplayed_js
+
+
+# Visibility can also change without any DOM mutation (i.e. once a stylesheet loads),
+# so the condition is also checked periodically, which is cheap since it runs in the page
+_observer_script = '''
+var xpath = arguments[0];
+var visible = arguments[1];
+var timeout = arguments[2];
+var done = arguments[arguments.length - 1];
+var isDisplayed = (%s);
+
+var check = function () {
+    var node = document.evaluate(
+        xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    return node !== null && (!visible || isDisplayed(node));
+};
+
+if (check()) {
+    done(true);
+    return;
+}
+
+var finished = false;
+var observer, interval, timer;
+var finish = function (result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    done(result);
+};
+var recheck = function () {
+    try {
+        if (check()) {
+            finish(true);
+        }
+    } catch (e) {
+        finish(false);
+    }
+};
+
+observer = new MutationObserver(recheck);
+observer.observe(document, {
+    childList: true, subtree: true, attributes: true, characterData: true
+});
+interval = setInterval(recheck, 100);
+timer = setTimeout(function () { finish(false); }, timeout);
+''' % isDisplayed_js
+
+# Long waits are split into slices that each finish well within the default script timeout
+# of WebDriver sessions (30 seconds), so the timeout of the session never has to be changed
+_max_slice_seconds = 10
+
+
+def wait_for_xpath(driver: WebDriver, xpath: str, visible: bool, timeout: float):
+    '''
+    Waits until an element matching the XPath exists, and optionally until it is visible.
+    The script timeout of the session is left unchanged, so the wait is split into slices
+    that are each shorter than the default script timeout
+
+    Args:
+        driver: The driver of the browser to wait on
+        xpath: The resolved XPath of the element
+        visible: Whether the element also needs to be visible
+        timeout: The maximum amount of seconds to wait for
+
+    Raises:
+        TimeoutException: if the condition is not met before the timeout
+        WebDriverException: if the script could not run, i.e. because the XPath is invalid
+            or because the page navigated away while waiting
+    '''
+    remaining = timeout
+
+    while True:
+        slice_seconds = min(remaining, _max_slice_seconds)
+        condition_met = driver.execute_async_script(
+            _observer_script,
+            xpath,
+            visible,
+            slice_seconds * 1000,
+        )
+        remaining -= slice_seconds
+
+        if condition_met:
+            return
+        if remaining <= 0:
+            break
+
+    raise TimeoutException(
+        f'Element "{xpath}" was not {"visible" if visible else "found"} '
+        f'after {timeout} seconds'
+    )
@@ -1,9 +1,11 @@
 from typing import (
     List,
+    Optional,
     Type,
     Dict
 )
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 from quilla.ctx import Context
 from quilla.common.enums import (
@@ -16,10 +18,12 @@ from quilla.common.enums import (
     OutputSources
 )
 from quilla.steps.steps_aggregator import StepsAggregator
+from quilla.steps.step_plan import StepPlan
 from quilla.browser.browser_validations import BrowserValidations
 from quilla.reports import (
     BaseReport,
     ReportSummary,
+    StepTiming,
 )
 from quilla.common.utils import EnumResolver
 
@@ -30,7 +34,9 @@ class QuillaTest(EnumResolver):
     A class to convert data into a valid QuillaTest instance, which is able to resolve
     raw text data into the appropriate enums to be used by the internal classes.
 
-    Creates shallow copies of all the steps to ensure independence
+    Creates shallow copies of all the steps to ensure independence. If the context
+    allows more than one browser worker, each browser will also receive its own
+    forked context so that the browsers can be validated concurrently
 
     Args:
         ctx: The runtime context for the application
@@ -136,28 +142,88 @@ class QuillaTest(EnumResolver):
         setup_steps: list,
     ):
         self.ctx = ctx
-        self._steps = steps = StepsAggregator(ctx, setup_steps)
+        # The plan is shared by every browser, which only creates its own step objects
+        self._plan = plan = StepPlan.compile(ctx, setup_steps)
+        self._template_steps: Optional[StepsAggregator] = None
+        self._concurrent = ctx.browser_workers > 1 and len(browsers) > 1
 
         self.browsers: List[BrowserValidations] = []
 
         for browser_target in browsers:
+            browser_ctx = ctx.fork() if self._concurrent else ctx
             self.browsers.append(
                 BrowserValidations(
-                    ctx,
+                    browser_ctx,
                     browser_target,
                     root,
-                    steps.copy(),
+                    StepsAggregator(browser_ctx, plan),
                 )
             )
 
+    @property
+    def plan(self) -> StepPlan:
+        '''
+        The step plan shared by every browser of the test
+        '''
+        return self._plan
+
+    @property
+    def _steps(self) -> StepsAggregator:
+        '''
+        A steps aggregator created from the plan, kept so that plugins written before step
+        plans existed can still inspect the steps of the test in ``quilla_prevalidate``.
+        Like before, changing these steps does not affect the steps of the browsers. New
+        code should use ``plan`` instead
+        '''
+        if self._template_steps is None:
+            self._template_steps = StepsAggregator(self.ctx, self._plan)
+
+        return self._template_steps
+
     def validate_all(self) -> ReportSummary:
         '''
         Performs all the setup test steps required for each test case
         and executes the validations, producing a set of validation
         reports.
+
+        When running concurrently, the reports are still collected in the
+        same order in which the browsers were specified.
         '''
+        if self._concurrent:
+            browser_reports = self._validate_concurrently()
+        else:
+            browser_reports = [browser.validate() for browser in self.browsers]
+
         validation_reports: List[BaseReport] = []
+        step_timings: List[StepTiming] = []
+        for browser, reports in zip(self.browsers, browser_reports):
+            validation_reports.extend(reports)
+            step_timings.extend(browser.step_timings)
+
+        return ReportSummary(
+            self.ctx.run_id,
+            self.ctx.outputs,
+            validation_reports,
+            step_timings,
+        )
+
+    def _validate_concurrently(self) -> List[List[BaseReport]]:
+        '''
+        Validates every browser on a pool of worker threads, and merges the data
+        stores of each browser context back into the shared context
+
+        Returns:
+            A list with the reports of each browser, in the order the browsers were specified
+        '''
+        self.ctx.logger.debug(
+            'Validating %s browsers with %s workers',
+            len(self.browsers),
+            self.ctx.browser_workers,
+        )
+        with ThreadPoolExecutor(max_workers=self.ctx.browser_workers) as executor:
+            browser_reports = list(executor.map(lambda x: x.validate(), self.browsers))
+
         for browser in self.browsers:
-            validation_reports.extend(browser.validate())
+            self.ctx.merge_forked(browser.ctx)
 
-        return ReportSummary(self.ctx.run_id, self.ctx.outputs, validation_reports)
+        return browser_reports
@@ -0,0 +1,98 @@
+from unittest.mock import Mock
+
+import pytest
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from quilla import make_parser
+from quilla.ctx import Context
+from quilla.browser.browser_validations import BrowserValidations
+from quilla.browser.drivers import FirefoxBrowser
+from quilla.browser.session_pool import SessionPool
+from quilla.common.enums import BrowserTargets
+from quilla.steps.steps_aggregator import StepsAggregator
+
+
+def make_driver() -> Mock:
+    driver = Mock(spec=WebDriver)
+    driver.get_window_size.return_value = {'width': 800, 'height': 600}
+    driver.window_handles = ['main']
+
+    return driver
+
+
+@pytest.mark.browser
+@pytest.mark.unit
+class SessionPoolTests:
+    def test_reuses_reset_sessions(self):
+        pool = SessionPool(size=1)
+        first = pool.checkout('Firefox', make_driver)
+        pool.checkin('Firefox', first)
+
+        second = pool.checkout('Firefox', make_driver)
+
+        assert second is first
+        first.delete_all_cookies.assert_called_once()
+        first.get.assert_called_with('about:blank')
+
+    def test_keys_are_isolated(self):
+        pool = SessionPool(size=1)
+        firefox = pool.checkout('Firefox', make_driver)
+        pool.checkin('Firefox', firefox)
+
+        assert pool.checkout('Chrome', make_driver) is not firefox
+
+    def test_replaces_unhealthy_sessions(self):
+        pool = SessionPool(size=1)
+        crashed = pool.checkout('Firefox', make_driver)
+        pool.checkin('Firefox', crashed)
+        type(crashed).window_handles = property(Mock(side_effect=Exception('crashed')))
+
+        replacement = pool.checkout('Firefox', make_driver)
+
+        assert replacement is not crashed
+        crashed.quit.assert_called_once()
+
+    def test_recycles_sessions_after_max_reuse(self):
+        pool = SessionPool(size=1, max_reuse=2)
+        driver = pool.checkout('Firefox', make_driver)
+        pool.checkin('Firefox', driver)
+
+        assert pool.checkout('Firefox', make_driver) is driver
+        pool.checkin('Firefox', driver)
+
+        driver.quit.assert_called_once()
+        assert pool.checkout('Firefox', make_driver) is not driver
+
+    def test_closes_sessions_that_do_not_fit(self):
+        pool = SessionPool(size=1)
+        first = pool.checkout('Firefox', make_driver)
+        second = pool.checkout('Firefox', make_driver)
+
+        pool.checkin('Firefox', first)
+        pool.checkin('Firefox', second)
+        pool.close()
+
+        second.quit.assert_called_once()
+        first.quit.assert_called_once()
+
+
+@pytest.mark.browser
+@pytest.mark.unit
+class SessionKeyTests:
+    def test_key_includes_driver_class(self, ctx: Context):
+        steps = StepsAggregator(ctx, [])
+        validation = BrowserValidations(ctx, BrowserTargets.FIREFOX, 'about:blank', steps)
+        key = validation.session_key
+
+        class CustomFirefox(FirefoxBrowser):
+            pass
+
+        custom = BrowserValidations(ctx, BrowserTargets.FIREFOX, 'about:blank', steps)
+        custom.driver_selector = {BrowserTargets.FIREFOX: CustomFirefox}
+
+        assert custom.session_key != key
+
+    def test_context_and_cli_share_max_reuse_default(self, ctx: Context):
+        parsed_args = make_parser().parse_args(['-r', '{}'])
+
+        assert ctx.session_max_reuse == parsed_args.session_max_reuse
@@ -0,0 +1,289 @@
+from datetime import (
+    date,
+    datetime,
+    timedelta,
+)
+import os
+from itertools import count
+from hashlib import (
+    md5,
+    sha256,
+)
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceNotFoundError,
+    ResourceNotModifiedError,
+)
+
+from quilla.ctx import Context
+from quilla.common.enums import VisualParityImageType
+from quilla.plugins import blob_storage
+from quilla.plugins.blob_storage import BlobStorage
+from quilla.plugins.disk_cache import BaselineDiskCache
+from quilla.reports import ReportSummary
+
+
+class FakeBlobClient:
+    '''
+    An in-memory stand-in for the BlobClient, supporting the operations used by BlobStorage
+    '''
+    def __init__(self, container: 'FakeContainerClient', name: str):
+        self.container = container
+        self.name = name
+        self.url = f'https://account.blob.core.windows.net/quilla/{name}'
+
+    def exists(self) -> bool:
+        self.container.calls.append(('exists', self.name))
+        return self.name in self.container.blobs
+
+    def get_blob_properties(self):
+        self.container.calls.append(('get_blob_properties', self.name))
+        if self.name not in self.container.blobs:
+            raise ResourceNotFoundError('The specified blob does not exist')
+
+        return self.container.blobs[self.name]
+
+    def upload_blob(self, data: bytes, overwrite: bool = False, content_settings=None):
+        self.container.calls.append(('upload_blob', self.name))
+        if self.name in self.container.blobs and not overwrite:
+            raise ResourceExistsError('The specified blob already exists')
+
+        content_md5 = content_settings.content_md5 if content_settings else None
+        self.container.store(self.name, data, content_md5)
+
+        return {'etag': self.container.blobs[self.name].etag}
+
+    def download_blob(self, etag=None, match_condition=None):
+        self.container.calls.append(('download_blob', self.name))
+        if self.name not in self.container.blobs:
+            raise ResourceNotFoundError('The specified blob does not exist')
+
+        blob = self.container.blobs[self.name]
+        if match_condition == MatchConditions.IfModified and etag == blob.etag:
+            raise ResourceNotModifiedError('The condition specified was not met')
+
+        self.container.downloaded.append(self.name)
+        return SimpleNamespace(readall=lambda: blob.data, properties=blob)
+
+    def start_copy_from_url(self, source_url: str):
+        self.container.calls.append(('start_copy_from_url', self.name))
+        source = self.container.blobs[source_url.rsplit('/quilla/', 1)[1]]
+        self.container.store(self.name, source.data, source.content_settings.content_md5)
+
+
+class FakeContainerClient:
+    '''
+    An in-memory stand-in for the ContainerClient that records every blob operation
+    '''
+    def __init__(self):
+        self.blobs: Dict[str, SimpleNamespace] = {}
+        self.calls: list = []
+        self.downloaded: list = []
+        self._etags = count()
+
+    def store(self, name: str, data: bytes, content_md5=None):
+        self.blobs[name] = SimpleNamespace(
+            name=name,
+            data=data,
+            creation_time=datetime.now(),
+            etag=f'"{next(self._etags)}"',
+            content_settings=SimpleNamespace(content_md5=content_md5),
+        )
+
+    def get_blob_client(self, blob) -> FakeBlobClient:
+        return FakeBlobClient(self, getattr(blob, 'name', blob))
+
+    def list_blobs(self, name_starts_with: str = ''):
+        self.calls.append(('list_blobs', name_starts_with))
+        return [
+            blob
+            for name, blob in sorted(self.blobs.items())
+            if name.startswith(name_starts_with)
+        ]
+
+    def walk_blobs(self, name_starts_with: str = '', delimiter: str = '/'):
+        self.calls.append(('walk_blobs', name_starts_with))
+        names = set()
+        for name in self.blobs:
+            if name.startswith(name_starts_with):
+                rest = name[len(name_starts_with):]
+                names.add(name_starts_with + rest.split(delimiter, 1)[0] + (
+                    delimiter if delimiter in rest else ''
+                ))
+
+        return [SimpleNamespace(name=name) for name in sorted(names)]
+
+    def delete_blobs(self, *names: str, raise_on_any_failure: bool = True):
+        self.calls.append(('delete_blobs', names))
+        for name in names:
+            self.blobs.pop(name, None)
+
+    def operations(self, operation: str) -> list:
+        return [name for called, name in self.calls if called == operation]
+
+
+@pytest.fixture()
+def container() -> FakeContainerClient:
+    return FakeContainerClient()
+
+
+@pytest.fixture()
+def storage(container: FakeContainerClient) -> BlobStorage:
+    storage = BlobStorage()
+    storage._container_client = container  # type: ignore
+    storage.max_retention_days = 30
+
+    return storage
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class BlobStorageTests:
+    def test_baseline_uri_copies_baseline_on_server(
+        self,
+        storage: BlobStorage,
+        container: FakeContainerClient
+    ):
+        storage.store_baseline_image('first', 'Header', b'baseline')
+        container.calls.clear()
+
+        uri = storage.make_baseline_uri('second', 'Header')
+        storage.make_baseline_uri('second', 'Header')
+
+        run_blob = f'runs/{date.today().isoformat()}/second/Header.png'
+        assert uri.endswith(run_blob)
+        assert container.blobs[run_blob].data == b'baseline'
+        assert container.operations('start_copy_from_url') == [run_blob]
+        assert container.operations('download_blob') == []
+        assert container.operations('upload_blob') == []
+
+    def test_missing_baseline_has_no_uri(self, storage: BlobStorage):
+        assert storage.make_baseline_uri('run', 'Header') == ''
+
+    def test_unchanged_baseline_is_not_uploaded_again(
+        self,
+        storage: BlobStorage,
+        container: FakeContainerClient
+    ):
+        storage.store_baseline_image('first', 'Header', b'baseline')
+        storage.store_baseline_image('second', 'Header', b'baseline')
+        storage.store_baseline_image('third', 'Header', b'changed')
+
+        assert container.operations('upload_blob') == [
+            'baselines/Header.png',
+            'baselines/Header.png',
+        ]
+        assert container.operations('start_copy_from_url') == [
+            'baselines/snapshots/first/Header.png',
+            'baselines/snapshots/second/Header.png',
+            'baselines/snapshots/third/Header.png',
+        ]
+        assert bytes(
+            container.blobs['baselines/Header.png'].content_settings.content_md5
+        ) == md5(b'changed').digest()
+
+    def test_cleanup_drops_expired_days_once_per_run(
+        self,
+        ctx: Context,
+        storage: BlobStorage,
+        container: FakeContainerClient,
+        monkeypatch
+    ):
+        monkeypatch.setattr(blob_storage, '_delete_batch_size', 2)
+        expired = (date.today() - timedelta(days=31)).isoformat()
+        retained = (date.today() - timedelta(days=30)).isoformat()
+        for name in ('a.png', 'b.png', 'c.png'):
+            container.store(f'runs/{expired}/old/{name}', b'')
+        container.store(f'runs/{retained}/recent/a.png', b'')
+        container.store('runs/legacy/a.png', b'')
+        container.blobs['runs/legacy/a.png'].creation_time = datetime.now() - timedelta(days=40)
+        container.store('baselines/Header.png', b'')
+
+        storage.quilla_postvalidate(ctx, ReportSummary(ctx.run_id, {}))
+        storage.quilla_postvalidate(ctx, ReportSummary(ctx.run_id, {}))
+
+        assert sorted(container.blobs) == [
+            'baselines/Header.png',
+            f'runs/{retained}/recent/a.png',
+        ]
+        assert len(container.operations('walk_blobs')) == 1
+        assert f'runs/{retained}/' not in container.operations('list_blobs')
+        assert [len(names) for names in container.operations('delete_blobs')] == [2, 2]
+
+    def test_workers_leave_cleanup_to_main_process(
+        self,
+        ctx: Context,
+        storage: BlobStorage,
+        container: FakeContainerClient
+    ):
+        ctx.is_worker = True
+        storage.quilla_postvalidate(ctx, ReportSummary(ctx.run_id, {}))
+
+        assert container.operations('walk_blobs') == []
+
+        ctx.is_worker = False
+        storage.cleanup_run(ctx)
+
+        assert container.operations('walk_blobs') == ['runs/']
+
+    def test_run_prefix_uses_run_date(self, ctx: Context, storage: BlobStorage):
+        '''
+        Ensures that images are stored under the date the run started, which worker
+        processes receive from the main process, instead of the date they are stored on
+        '''
+        ctx.run_date = '2020-01-01'
+        storage.quilla_prevalidate(SimpleNamespace(ctx=ctx))  # type: ignore
+
+        blob_name = storage.image_blob_name(ctx.run_id, 'Header', VisualParityImageType.DELTA)
+
+        assert blob_name == f'runs/2020-01-01/{ctx.run_id}/Header_delta.png'
+
+    def test_disk_cache_revalidates_with_etag(
+        self,
+        storage: BlobStorage,
+        container: FakeContainerClient,
+        tmp_path: Path
+    ):
+        storage._disk_cache = BaselineDiskCache(tmp_path)
+        container.store('baselines/Header.png', b'baseline')
+
+        assert storage.find_image_by_baseline('Header') == b'baseline'
+        assert storage.find_image_by_baseline('Header') == b'baseline'
+        assert container.downloaded == ['baselines/Header.png']
+
+        container.store('baselines/Header.png', b'changed')
+
+        assert storage.find_image_by_baseline('Header') == b'changed'
+        assert len(container.downloaded) == 2
+        assert storage.find_image_by_baseline('Missing') == b''
+
+    def test_disk_cache_skips_requests_while_fresh(
+        self,
+        storage: BlobStorage,
+        container: FakeContainerClient,
+        tmp_path: Path
+    ):
+        storage._disk_cache = BaselineDiskCache(tmp_path, max_age=60)
+        storage.store_baseline_image('run', 'Header', b'baseline')
+        container.calls.clear()
+
+        assert storage.find_image_by_baseline('Header') == b'baseline'
+        assert container.operations('download_blob') == []
+
+    def test_disk_cache_evicts_least_recently_used(self, tmp_path: Path):
+        disk_cache = BaselineDiskCache(tmp_path, max_bytes=10)
+        disk_cache.store('first', b'12345', 'a')
+        disk_cache.store('second', b'67890', 'b')
+        os.utime(tmp_path / 'objects' / f'{sha256(b"67890").hexdigest()}.png', (0, 0))
+
+        disk_cache.store('third', b'abcde', 'c')
+
+        assert disk_cache.lookup('first')[0] == b'12345'
+        assert disk_cache.lookup('second')[0] is None
+        assert disk_cache.lookup('third')[0] == b'abcde'
@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import pytest
+
+from quilla.ctx import Context
+from quilla.common.enums import VisualParityImageType
+from quilla.plugins.local_storage import LocalStorage
+from quilla.reports import (
+    ReportSummary,
+    VisualParityReport,
+)
+
+
+@pytest.fixture()
+def storage(tmp_path: Path) -> LocalStorage:
+    return LocalStorage(str(tmp_path))
+
+
+def store_treatment(ctx: Context, storage: LocalStorage) -> str:
+    return storage.quilla_store_image(
+        ctx,
+        'Header',
+        b'treatment',
+        VisualParityImageType.TREATMENT,
+    )
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class StorageUploadTests:
+    def test_queued_images_are_stored_before_postvalidate_returns(
+        self,
+        ctx: Context,
+        storage: LocalStorage,
+        tmp_path: Path
+    ):
+        ctx.image_upload_workers = 2
+
+        uri = store_treatment(ctx, storage)
+        storage.quilla_postvalidate(ctx, ReportSummary(ctx.run_id, {}))
+
+        image_path = tmp_path / 'runs' / ctx.run_id / 'Header_treatment.png'
+        assert uri == image_path.absolute().as_uri()
+        assert image_path.read_bytes() == b'treatment'
+
+    def test_failed_uploads_fail_their_report(self, ctx: Context, storage: LocalStorage):
+        ctx.image_upload_workers = 1
+        storage.store_treatment_image = None  # type: ignore
+
+        uri = store_treatment(ctx, storage)
+        report = VisualParityReport(
+            '//div',
+            'Firefox',
+            True,
+            'Header',
+            treatment_image_uri=uri,
+        )
+        reports = ReportSummary(ctx.run_id, {}, [report])
+
+        storage.quilla_postvalidate(ctx, reports)
+
+        assert not report.success
+        assert report.treatment_image_uri == ''
+        assert uri in report.msg
+        assert (reports.successes, reports.fails) == (0, 1)
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class LocalStorageLayoutTests:
+    def test_identical_images_share_one_object(self, storage: LocalStorage, tmp_path: Path):
+        storage.store_baseline_image('first', 'Header', b'baseline')
+        storage.store_baseline_image('second', 'Header', b'baseline')
+        uri = storage.make_baseline_uri('third', 'Header')
+
+        snapshot_path = tmp_path / 'baselines' / 'snapshots' / 'Header_first.png'
+        run_path = tmp_path / 'runs' / 'third' / 'Header.png'
+        assert uri == run_path.absolute().as_uri()
+        assert run_path.samefile(snapshot_path)
+        assert not run_path.samefile(tmp_path / 'baselines' / 'Header.png')
+        assert len(list((tmp_path / 'objects').glob('*/*.png'))) == 1
+
+    def test_updating_baseline_keeps_snapshots(self, storage: LocalStorage, tmp_path: Path):
+        storage.store_baseline_image('first', 'Header', b'baseline')
+        storage.store_baseline_image('second', 'Header', b'changed')
+
+        snapshots = tmp_path / 'baselines' / 'snapshots'
+        assert (snapshots / 'Header_first.png').read_bytes() == b'baseline'
+        assert (snapshots / 'Header_second.png').read_bytes() == b'changed'
+        assert (tmp_path / 'baselines' / 'Header.png').read_bytes() == b'changed'
+
+    def test_editing_baselines_keeps_stored_images(self, storage: LocalStorage, tmp_path: Path):
+        '''
+        Ensures that baselines managed by the users are never linked into the object
+        store, so editing one in place does not change any image stored by a run
+        '''
+        baseline_path = tmp_path / 'baselines' / 'Header.png'
+        baseline_path.write_bytes(b'baseline')
+
+        storage.make_baseline_uri('first', 'Header')
+        with open(baseline_path, 'r+b') as fp:
+            fp.write(b'edited!!')
+        storage.make_baseline_uri('second', 'Header')
+
+        assert (tmp_path / 'runs' / 'first' / 'Header.png').read_bytes() == b'baseline'
+        assert (tmp_path / 'runs' / 'second' / 'Header.png').read_bytes() == b'edited!!'
+        assert storage.make_baseline_uri('first', 'Missing') == ''
+
+    def test_corrupted_objects_are_not_reused(self, storage: LocalStorage, tmp_path: Path):
+        object_path = storage.store_object(b'treatment')
+        object_path.chmod(0o644)
+        object_path.write_bytes(b'corrupted')
+
+        store_path = storage.store_object(b'treatment')
+
+        assert store_path == object_path
+        assert store_path.read_bytes() == b'treatment'
+        assert store_path.stat().st_mode & 0o222 == 0
@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from quilla.ctx import Context
+from quilla.common.enums import TimingKind
+from quilla.common.timing import percentile
+from quilla.plugins.timing_history import TimingHistory
+from quilla.sharding import load_timings
+
+
+@pytest.fixture()
+def history(tmp_path: Path) -> TimingHistory:
+    return TimingHistory(str(tmp_path / 'timings.db'))
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class TimingHistoryTests:
+    @pytest.mark.parametrize('q,expected', [
+        (0, 1.0),
+        (50, 2.5),
+        (100, 4.0),
+    ])
+    def test_percentile_interpolates_between_ranks(self, q: float, expected: float):
+        assert percentile([4.0, 1.0, 3.0, 2.0], q) == expected
+
+    def test_percentile_of_no_values(self):
+        assert percentile([], 50) is None
+
+    def test_disabled_recorder_keeps_no_timings(self, ctx: Context):
+        ctx.timings.record(TimingKind.TEST, ctx.test_hash, time.perf_counter())
+
+        assert ctx.timings.drain() == []
+
+    def test_postvalidate_stores_recorded_timings(self, ctx: Context, history: TimingHistory):
+        '''
+        Ensures that the timings recorded on the context are written to the history
+        and that forked contexts record into the same recorder
+        '''
+        ctx.json = '{"path": "https://example.com"}'
+        ctx.timings.enabled = True
+        forked = ctx.fork()
+
+        for i in range(3):
+            ctx.timings.record(TimingKind.TEST, ctx.test_hash, time.perf_counter() - i)
+            forked.timings.record(
+                TimingKind.STEP,
+                forked.test_hash,
+                time.perf_counter(),
+                browser='Firefox',
+                step_index=1,
+                action='Click',
+            )
+
+        history.quilla_postvalidate(ctx, None)  # type: ignore
+
+        assert ctx.timings.drain() == []
+        assert len(history.durations(TimingKind.STEP, browser='Firefox', step_index=1)) == 3
+        assert history.percentile(TimingKind.TEST, 50, test_hash=ctx.test_hash) == \
+            pytest.approx(1.0, abs=0.1)
+        assert load_timings(str(history.db_path)) == pytest.approx(
+            {ctx.test_hash: history.percentile(TimingKind.TEST, 50)}
+        )
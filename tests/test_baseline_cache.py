@@ -0,0 +1,94 @@
+import threading
+from io import BytesIO
+from unittest.mock import Mock
+
+import pytest
+from PIL import Image
+
+from quilla.ctx import Context
+from quilla.plugins.baseline_prefetch import BaselinePrefetch
+from quilla.steps.validations.baseline_cache import BaselineCache
+from quilla.ui_validation import QuillaTest
+
+
+def make_png(color=(255, 255, 255)) -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', (10, 10), color).save(buffer, format='PNG')
+
+    return buffer.getvalue()
+
+
+def visual_parity_step(baseline_id: str) -> dict:
+    return {
+        'action': 'Validate',
+        'type': 'XPath',
+        'target': '//div',
+        'state': 'VisualParity',
+        'parameters': {'baselineID': baseline_id},
+    }
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class BaselineCacheTests:
+    def test_least_recently_used_images_are_evicted(self):
+        cache = BaselineCache('run', max_bytes=2 * 10 * 10 * 4)
+        for baseline_id in ('first', 'second'):
+            cache.put(baseline_id, Image.new('RGBA', (10, 10)))
+
+        cache.get('first')
+        cache.put('third', Image.new('RGBA', (10, 10)))
+
+        assert cache.get('first') is not None
+        assert cache.get('second') is None
+        assert cache.get('third') is not None
+
+    def test_prefetch_decodes_existing_baselines(self, ctx: Context):
+        ctx.pm.hook.quilla_get_visualparity_baseline = Mock(
+            side_effect=lambda ctx, baseline_id: make_png() if baseline_id == 'found' else b''
+        )
+        cache = BaselineCache(ctx.run_id, max_bytes=1024 * 1024)
+
+        cache.prefetch(ctx, ['found', 'missing'])
+
+        assert cache.get('found').mode == 'RGBA'
+        assert cache.get('missing') is None
+        assert ctx.pm.hook.quilla_get_visualparity_baseline.call_count == 2
+
+    def test_discarded_baselines_are_not_restored_by_prefetch(self, ctx: Context):
+        '''
+        Ensures that a prefetch that started before a baseline was updated does not add
+        the old baseline back to the cache
+        '''
+        fetching = threading.Event()
+        release = threading.Event()
+
+        def get_baseline(ctx, baseline_id):
+            fetching.set()
+            release.wait()
+            return make_png()
+
+        ctx.pm.hook.quilla_get_visualparity_baseline = Mock(side_effect=get_baseline)
+        cache = BaselineCache(ctx.run_id, max_bytes=1024 * 1024)
+
+        cache.prefetch(ctx, ['updated'])
+        fetching.wait()
+        cache.discard('updated')
+        release.set()
+
+        assert cache.get('updated') is None
+
+    def test_prefetch_finds_compared_baselines(self, ctx: Context):
+        ctx.update_baseline = ['Updated']
+        validation = QuillaTest.from_dict(ctx, {
+            'path': 'https://example.com',
+            'targetBrowsers': ['Firefox'],
+            'steps': [
+                visual_parity_step('Header'),
+                visual_parity_step('Updated'),
+                visual_parity_step('${{ Validation.my.baseline }}'),
+                visual_parity_step('Header'),
+            ],
+        })
+
+        assert BaselinePrefetch().baseline_ids(validation) == ['Header']
@@ -0,0 +1,111 @@
+from argparse import ArgumentTypeError
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+import quilla
+from quilla import batch
+from quilla.batch import (
+    collect_test_files,
+    parse_workers,
+)
+from quilla.ctx import Context
+from quilla.reports import (
+    ReportSummary,
+    StepFailureReport,
+    ValidationReport,
+)
+
+
+@pytest.mark.smoke
+@pytest.mark.batch
+class BatchTests:
+    @pytest.mark.unit
+    def test_collects_files_directories_and_globs(self, tmp_path: Path):
+        '''
+        Ensures that files, directories and glob patterns all resolve to a sorted,
+        deduplicated list of test files
+        '''
+        (tmp_path / 'nested').mkdir()
+        for name in ['b.json', 'a.json', 'nested/c.json', 'nested/notes.txt']:
+            (tmp_path / name).write_text('{}')
+
+        test_files = collect_test_files([
+            str(tmp_path / 'a.json'),
+            str(tmp_path / '*.json'),
+            str(tmp_path / 'nested'),
+        ])
+
+        assert test_files == [
+            str(tmp_path / 'a.json'),
+            str(tmp_path / 'b.json'),
+            str(tmp_path / 'nested' / 'c.json'),
+        ]
+
+    @pytest.mark.unit
+    def test_parse_workers(self):
+        assert parse_workers('3') == 3
+        assert parse_workers('auto') >= 1
+
+        with pytest.raises(ArgumentTypeError):
+            parse_workers('0')
+
+        with pytest.raises(ArgumentTypeError):
+            parse_workers('many')
+
+    @pytest.mark.unit
+    def test_merged_summary_keeps_report_order(self):
+        '''
+        Ensures that merging summaries keeps the reports in order and recomputes the counts
+        '''
+        first = ReportSummary('run', {'a': '1'}, [
+            ValidationReport('XPath', '//a', 'Exists', 'Firefox', True),
+        ])
+        second = ReportSummary('run', {'b': '2'}, [
+            ValidationReport('XPath', '//b', 'Exists', 'Firefox', False),
+        ])
+
+        merged = ReportSummary.merge('run', [first, second])
+
+        assert [report.target for report in merged.reports] == ['//a', '//b']
+        assert merged.successes == 1
+        assert merged.fails == 1
+        assert merged.outputs == {'a': '1', 'b': '2'}
+
+    @pytest.mark.unit
+    def test_workers_reuse_resolved_args(self, tmp_path: Path, pytestconfig, monkeypatch):
+        '''
+        Ensures that worker processes set up their context from the args resolved by the
+        main process instead of parsing, globbing and sharding the CLI args again
+        '''
+        for name in ['a.json', 'b.json']:
+            (tmp_path / name).write_text('{}')
+        monkeypatch.setattr(Context, 'default_context', None)
+        monkeypatch.setattr(batch, '_worker_ctx', None)
+        ctx = quilla.setup_context(
+            ['-f', str(tmp_path / '*.json')],
+            str(pytestconfig.rootpath),
+            recreate_context=True,
+        )
+        monkeypatch.setattr(quilla, 'setup_context', Mock(side_effect=AssertionError))
+        monkeypatch.setattr(batch, 'collect_test_files', Mock(side_effect=AssertionError))
+
+        batch._init_worker(ctx.args, 'run', '2020-01-01')
+
+        assert batch._worker_ctx.run_id == 'run'
+        assert batch._worker_ctx.run_date == '2020-01-01'
+        assert batch._worker_ctx.is_worker
+        assert batch._worker_ctx.is_file
+
+    @pytest.mark.unit
+    def test_worker_errors_fail_only_their_file(self, ctx: Context, monkeypatch):
+        monkeypatch.setattr(batch, '_worker_ctx', ctx)
+        monkeypatch.setattr(batch, 'execute_file', Mock(side_effect=ValueError('Invalid')))
+
+        summary = batch._execute_in_worker('broken.json')
+
+        assert summary.run_id == ctx.run_id
+        assert summary.critical_failures == 1
+        assert isinstance(summary.reports[0], StepFailureReport)
+        assert 'broken.json' in summary.reports[0].msg
@@ -135,3 +135,89 @@ class ContextTests:
         ctx.create_output('some_output', 'some_output')
         with pytest.raises(InvalidOutputName):
             ctx.create_output('some_output.%s' % nested_output_name, 'some_output')
+
+    @pytest.mark.unit
+    def test_forked_context_has_isolated_state(self, ctx: Context):
+        '''
+        Ensures that a forked context shares definitions but does not share
+        the driver or the Validation/Outputs data stores with its parent
+        '''
+        ctx.load_definitions({'some': {'definition': 'value'}})
+        ctx.create_output('shared_output', 'parent_value')
+
+        forked = ctx.fork()
+        forked.driver = ctx.driver
+        forked.create_output('shared_output', 'forked_value')
+
+        assert forked._driver is ctx._driver
+        assert ctx.perform_replacements('${{ Validation.shared_output }}') == 'parent_value'
+        assert forked.perform_replacements('${{ Validation.shared_output }}') == 'forked_value'
+        assert forked.perform_replacements('${{ Definitions.some.definition }}') == 'value'
+        assert ctx.fork()._driver is None
+
+    @pytest.mark.unit
+    def test_merge_forked_context_outputs(self, ctx: Context):
+        '''
+        Ensures that merging a forked context brings its outputs back into the parent
+        '''
+        forked = ctx.fork()
+        forked.driver = ctx.driver
+        forked.create_output('my.output', 'some_value')
+
+        assert ctx.outputs == {}
+
+        ctx.merge_forked(forked)
+
+        assert ctx.outputs == {'my': {'output': 'some_value'}}
+
+    @pytest.mark.unit
+    def test_cached_replacement_updates_with_outputs(self, ctx: Context):
+        '''
+        Ensures that cached replacements are refreshed when the data stores change
+        '''
+        expression = 'value: ${{ Validation.my_output }}'
+        ctx.create_output('my_output', 'first')
+
+        assert ctx.perform_replacements(expression) == 'value: first'
+
+        ctx.create_output('my_output', 'second')
+
+        assert ctx.perform_replacements(expression) == 'value: second'
+
+    @pytest.mark.unit
+    def test_replacement_resolves_nested_definitions(self, ctx: Context):
+        '''
+        Ensures that definitions referring to other definitions are resolved, and that
+        the resolved values are not searched for further context objects
+        '''
+        ctx.load_definitions({
+            'host': 'https://www.bing.com',
+            'page': '${{ Definitions.host }}/search',
+        })
+
+        assert ctx.perform_replacements('${{ Definitions.page }}') == 'https://www.bing.com/search'
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('expression,expected', [
+        ('${{ Validation.first }}-${{ Validation.second }}', 'one-two'),
+        ('${{ Validation.${{ Validation.name }} }}', 'two'),
+        ('${{ Validation.first } and ${{ Validation.second }}', '${{ Validation.first } and two'),
+        ('${{ Validation.first', '${{ Validation.first'),
+        ('}} ${{Validation.first}}', '}} one'),
+    ])
+    def test_replacement_parses_multiple_and_nested_expressions(
+        self,
+        ctx: Context,
+        expression: str,
+        expected: str,
+    ):
+        '''
+        Ensures that every expression in a text is resolved on its own, that nested
+        expressions are resolved before the expression containing them, and that
+        unterminated expressions are left as they are
+        '''
+        ctx.create_output('first', 'one')
+        ctx.create_output('second', 'two')
+        ctx.create_output('name', 'second')
+
+        assert ctx.perform_replacements(expression) == expected
@@ -0,0 +1,81 @@
+import pytest
+from PIL import Image
+
+from quilla.steps.validations import image_diff
+from quilla.steps.validations.image_diff import (
+    compare_images,
+    delta_image,
+)
+
+
+def make_image(size=(20, 20), color=(255, 255, 255)) -> Image.Image:
+    return Image.new('RGB', size, color)
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class ImageDiffTests:
+    def test_identical_images_pass(self):
+        diff = compare_images(make_image(), make_image().convert('RGBA'))
+
+        assert diff.passed
+        assert diff.diff_ratio == 0
+
+    def test_tolerance_ignores_small_changes(self):
+        treatment = make_image(color=(250, 255, 255))
+
+        assert not compare_images(make_image(), treatment).passed
+        assert compare_images(make_image(), treatment, tolerance=5).passed
+
+    def test_max_diff_ratio(self):
+        treatment = make_image()
+        treatment.paste((0, 0, 0), (0, 0, 4, 5))  # 20 of 400 pixels
+
+        diff = compare_images(make_image(), treatment, max_diff_ratio=0.05)
+
+        assert diff.passed
+        assert diff.diff_ratio == 0.05
+        assert not compare_images(make_image(), treatment, max_diff_ratio=0.04).passed
+
+    def test_comparison_stops_once_failed(self, monkeypatch):
+        monkeypatch.setattr(image_diff, '_rows_per_band', 5)
+        treatment = make_image(color=(0, 0, 0))
+
+        diff = compare_images(make_image(), treatment)
+
+        assert not diff.passed
+        assert not diff.complete
+        assert diff.differing_pixels == 100
+
+    def test_anti_aliasing_ignores_shifted_edges(self):
+        baseline = make_image()
+        baseline.paste((0, 0, 0), (5, 5, 10, 10))
+        treatment = make_image()
+        treatment.paste((0, 0, 0), (6, 5, 11, 10))
+
+        assert not compare_images(baseline, treatment).passed
+        assert compare_images(baseline, treatment, anti_aliasing=True).passed
+
+    def test_different_sizes_fail(self):
+        diff = compare_images(make_image(), make_image((20, 21)))
+
+        assert not diff.passed
+        assert not diff.same_size
+
+    def test_delta_highlights_changed_pixels(self, monkeypatch):
+        monkeypatch.setattr(image_diff, '_rows_per_band', 3)
+        treatment = make_image()
+        treatment.paste((0, 0, 0), (2, 2, 4, 4))
+
+        delta = delta_image(make_image(), treatment)
+
+        assert delta.getpixel((2, 2)) == (255, 0, 0)
+        assert delta.getpixel((3, 3)) == (255, 0, 0)
+        assert delta.getpixel((10, 10)) == (255, 255, 255)
+
+    def test_delta_highlights_area_outside_smaller_image(self):
+        delta = delta_image(make_image(), make_image((20, 25)))
+
+        assert delta.size == (20, 25)
+        assert delta.getpixel((0, 19)) == (255, 255, 255)
+        assert delta.getpixel((0, 20)) == (255, 0, 0)
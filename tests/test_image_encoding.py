@@ -0,0 +1,49 @@
+from io import BytesIO
+from unittest.mock import Mock
+
+import pytest
+from PIL import Image
+
+from quilla.steps.validations import image_encoding
+from quilla.steps.validations.image_encoding import (
+    PNGImage,
+    get_encoder_pool,
+)
+
+
+def make_image(color=(255, 255, 255)) -> Image.Image:
+    return Image.new('RGB', (10, 10), color)
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class PNGImageTests:
+    def test_existing_bytes_are_not_encoded_again(self, monkeypatch):
+        monkeypatch.setattr(image_encoding, 'encode_png', None)
+
+        assert PNGImage(make_image(), png_bytes=b'screenshot').data == b'screenshot'
+
+    def test_image_is_encoded_once_when_needed(self, monkeypatch):
+        encode = Mock(wraps=image_encoding.encode_png)
+        monkeypatch.setattr(image_encoding, 'encode_png', encode)
+        image = PNGImage(make_image((0, 0, 0)))
+
+        assert encode.call_count == 0
+
+        data = image.data
+
+        assert image.data is data
+        assert encode.call_count == 1
+        assert Image.open(BytesIO(data)).getpixel((0, 0)) == (0, 0, 0)
+
+    def test_prefetch_encodes_on_executor(self, monkeypatch):
+        monkeypatch.setattr(image_encoding, '_encoder_pool', None)
+        pool = get_encoder_pool(1)
+        image = PNGImage(make_image(), executor=pool)
+
+        image.prefetch()
+
+        assert image._future is not None
+        assert image.data == image._future.result()
+        assert get_encoder_pool(4) is pool
+        assert get_encoder_pool(0) is None
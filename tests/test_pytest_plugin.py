@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+
+pytest_plugins = ['pytester']
+
+
+_fake_runtest = '''
+from pytest_quilla.pytest_classes import QuillaItem
+from quilla.reports.report_summary import ReportSummary
+from quilla.reports.validation_report import ValidationReport
+
+
+def runtest(self):
+    report = ValidationReport('XPath', self.name, 'Exists', 'Firefox', True)
+    self.results = ReportSummary(self.quilla_run_id, {self.name: self.quilla_run_id}, [report])
+
+
+QuillaItem.runtest = runtest
+'''
+
+
+@pytest.mark.integration
+class PytestPluginTests:
+    def test_shard_report_merges_xdist_workers(self, pytester):
+        '''
+        Ensures that the shard report contains the reports of every pytest-xdist worker,
+        all with the run ID of the controller
+        '''
+        pytester.makeini('[pytest]\nuse-quilla = true\n')
+        pytester.makeconftest(_fake_runtest)
+        for name in ['quilla_first', 'quilla_second', 'quilla_third', 'quilla_fourth']:
+            pytester.makefile('.json', **{name: '{}'})
+
+        result = pytester.runpytest_subprocess(
+            '-n', '2',
+            '-p', 'no:cacheprovider',
+            '--quilla-shard-report', 'report.json',
+        )
+        result.assert_outcomes(passed=4)
+
+        report_data = json.loads((pytester.path / 'report.json').read_text())
+        targets = sorted(
+            report['validationReport']['target']
+            for report in report_data['reportSummary']['reports']
+        )
+        run_ids = set(report_data['outputs'].values()) | {report_data['run_id']}
+
+        assert targets == ['quilla_first', 'quilla_fourth', 'quilla_second', 'quilla_third']
+        assert len(run_ids) == 1
@@ -0,0 +1,72 @@
+from unittest.mock import Mock
+
+import pytest
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from quilla.common.enums import UITestActions
+from quilla.browser.command_counter import (
+    command_count,
+    count_commands,
+)
+from quilla.reports import (
+    ReportSummary,
+    StepFailureReport,
+    StepTiming,
+    ValidationReport,
+)
+
+
+def make_timing(step_index: int, duration: float) -> StepTiming:
+    return StepTiming('Firefox', UITestActions.CLICK, step_index, 10.0, 10.0 + duration, 3)
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class ReportTimingTests:
+    def test_reports_keep_their_timing_through_serialization(self):
+        validation_report = ValidationReport('XPath', '//div', 'Exists', 'Firefox', True)
+        validation_report.timing = make_timing(1, 0.5)
+        failure_report = StepFailureReport('Failed', 'Firefox', UITestActions.CLICK, 2)
+        failure_report.timing = make_timing(2, 1.5)
+
+        summary = ReportSummary.from_json(
+            ReportSummary('run', {}, [validation_report, failure_report]).to_json()
+        )
+        timings = [report.timing for report in summary.reports]
+
+        assert [timing.duration for timing in timings] == [0.5, 1.5]
+        assert [timing.webdriver_commands for timing in timings] == [3, 3]
+
+    def test_summary_lists_the_slowest_steps(self):
+        '''
+        Ensures that the slowest steps include steps without reports, and that merged
+        summaries list the slowest steps across all of them
+        '''
+        summaries = [
+            ReportSummary('run', {}, [], [make_timing(i, i * 2.0) for i in range(8)]),
+            ReportSummary('run', {}, [], [make_timing(i, i * 2.0 + 1) for i in range(8)]),
+        ]
+        reloaded = [ReportSummary.from_json(summary.to_json()) for summary in summaries]
+
+        merged = ReportSummary.merge('run', reloaded).to_dict()
+        slowest_steps = merged['reportSummary']['slowestSteps']
+
+        assert [step['duration'] for step in slowest_steps] == [15, 14, 13, 12, 11, 10, 9, 8, 7, 6]
+
+    def test_driver_commands_are_counted_once(self):
+        driver = Mock(spec=WebDriver)
+        driver.command_executor = Mock()
+
+        count_commands(driver)
+        count_commands(driver)
+        driver.command_executor.execute('getTitle', {})
+        driver.command_executor.execute('getCurrentUrl', {})
+
+        assert command_count(driver) == 2
+
+    def test_drivers_without_executor_count_no_commands(self):
+        '''
+        Ensures that steps can be timed with drivers that have no command executor, such as
+        the mock drivers used by the step tests
+        '''
+        assert command_count(Mock(spec=WebDriver)) == 0
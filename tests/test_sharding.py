@@ -0,0 +1,69 @@
+from argparse import ArgumentTypeError
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from quilla.sharding import (
+    parse_shard,
+    select_shard,
+)
+
+
+@pytest.fixture()
+def test_files(tmp_path: Path) -> List[str]:
+    paths = []
+    for i in range(20):
+        path = tmp_path / f'test_{i:02}.json'
+        path.write_text('{"path": "https://example.com/%s"}' % i)
+        paths.append(str(path))
+
+    return paths
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+@pytest.mark.sharding
+class ShardingTests:
+    @pytest.mark.parametrize('shard,expected', [
+        ('1/1', (1, 1)),
+        ('3/10', (3, 10)),
+    ])
+    def test_parse_shard(self, shard: str, expected):
+        assert parse_shard(shard) == expected
+
+    @pytest.mark.parametrize('shard', ['0/2', '3/2', '1', 'a/b', '1/0'])
+    def test_parse_shard_rejects_invalid(self, shard: str):
+        with pytest.raises(ArgumentTypeError):
+            parse_shard(shard)
+
+    @pytest.mark.parametrize('total', [1, 3, 7])
+    def test_shards_partition_the_test_files(self, test_files: List[str], total: int):
+        '''
+        Ensures that every test file belongs to exactly one shard
+        '''
+        shards = [select_shard(test_files, index, total) for index in range(1, total + 1)]
+
+        assert sorted(sum(shards, [])) == test_files
+
+    def test_hash_shards_do_not_depend_on_file_order(self, test_files: List[str]):
+        shard = select_shard(test_files, 1, 3)
+
+        assert shard == select_shard(list(reversed(test_files)), 1, 3)[::-1]
+
+    def test_timings_balance_the_shards(self, test_files: List[str]):
+        '''
+        Ensures that the shards are balanced by duration when a timing history is given,
+        and that tests without any history use the average duration
+        '''
+        timings = {test_file: float(i) for i, test_file in enumerate(test_files[:-1])}
+        loads = []
+
+        for index in range(1, 5):
+            shard = select_shard(test_files, index, 4, timings)
+            loads.append(sum(timings.get(test_file, 9.0) for test_file in shard))
+
+        assert max(loads) - min(loads) <= max(timings.values())
+        assert sorted(sum(
+            [select_shard(test_files, index, 4, timings) for index in range(1, 5)], []
+        )) == test_files
@@ -0,0 +1,441 @@
+from unittest.mock import (
+    Mock,
+    patch,
+)
+
+import pytest
+from selenium.common.exceptions import (
+    JavascriptException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+from quilla.ctx import Context
+from quilla.common.enums import (
+    OutputSources,
+    UITestActions,
+    ValidationTypes,
+    XPathValidationStates,
+)
+from quilla.reports import StepFailureReport
+from quilla.steps.steps import TestStep
+from quilla.steps.steps_aggregator import StepsAggregator
+from quilla.steps.waits import wait_for_xpath
+from quilla.steps.step_plan import StepPlan
+from quilla.steps.validations import DOMSnapshot
+from quilla.ui_validation import QuillaTest
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class ElementCacheTests:
+    def test_element_is_located_once(self, ctx: Context):
+        step = TestStep(ctx, UITestActions.CLICK, '//button', driver=ctx.driver)
+
+        assert step.element is step.element
+        ctx.driver.find_element.assert_called_once_with('xpath', '//button')
+
+    def test_element_is_located_again_when_target_changes(self, ctx: Context):
+        step = TestStep(ctx, UITestActions.CLICK, '//button', driver=ctx.driver)
+        step.element
+        step.target = '//input'
+        step.element
+
+        assert ctx.driver.find_element.call_count == 2
+
+    def test_stale_elements_are_located_again(self, ctx: Context):
+        '''
+        Ensures that a read-only step is retried once with a fresh element if the cached
+        element becomes stale, and that the cache is cleared after the step
+        '''
+        stale_element = Mock()
+        type(stale_element).text = property(Mock(side_effect=StaleElementReferenceException()))
+        ctx.driver.find_element.side_effect = [stale_element, Mock(text='Fresh')]
+        ctx.suppress_exceptions = False
+
+        aggregator = StepsAggregator(ctx, [{
+            'action': UITestActions.OUTPUT_VALUE,
+            'target': '//p',
+            'parameters': {'source': OutputSources.XPATH_TEXT, 'outputName': 'text'},
+        }])
+        aggregator.driver = ctx.driver
+        aggregator.run_steps()
+
+        assert ctx.driver.find_element.call_count == 2
+        assert ctx.perform_replacements('${{ Validation.text }}') == 'Fresh'
+        assert aggregator._steps[0]._element_cache == {}
+
+    def test_stale_elements_do_not_repeat_interactions(self, ctx: Context):
+        '''
+        Ensures that steps that interact with the page are not performed again when their
+        element becomes stale, since the interaction could have partially happened
+        '''
+        stale_element = Mock()
+        stale_element.send_keys.side_effect = StaleElementReferenceException()
+        ctx.driver.find_element.return_value = stale_element
+        ctx.suppress_exceptions = False
+
+        aggregator = StepsAggregator(ctx, [{
+            'action': UITestActions.SEND_KEYS,
+            'target': '//input',
+            'parameters': {'data': 'text'},
+        }])
+        aggregator.driver = ctx.driver
+
+        with pytest.raises(StaleElementReferenceException):
+            aggregator.run_steps()
+
+        stale_element.send_keys.assert_called_once()
+        assert aggregator._steps[0]._element_cache == {}
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class StepParametersTests:
+    def test_parameters_resolve_nested_values(self, ctx: Context):
+        '''
+        Ensures that strings inside of nested dictionaries and lists are resolved without
+        modifying the parameters the step was created with
+        '''
+        ctx.create_output('cookie_value', 'some_value')
+        raw_parameters = {
+            'cookieJar': {'name': 'cookie', 'value': '${{ Validation.cookie_value }}'},
+            'data': ['${{ Validation.cookie_value }}', 3],
+        }
+        step = TestStep(ctx, UITestActions.ADD_COOKIES, parameters=raw_parameters)
+
+        assert step.parameters == {
+            'cookieJar': {'name': 'cookie', 'value': 'some_value'},
+            'data': ['some_value', 3],
+        }
+        assert raw_parameters['cookieJar']['value'] == '${{ Validation.cookie_value }}'
+
+    def test_parameters_are_resolved_once(self, ctx: Context):
+        ctx.create_output('some_output', 'first')
+        parameters = {'data': '${{ Validation.some_output }}'}
+        step = TestStep(ctx, UITestActions.SEND_KEYS, '//input', parameters)
+
+        with patch.object(ctx, 'perform_replacements', wraps=ctx.perform_replacements) as replace:
+            assert step.parameters['data'] == step.parameters['data'] == 'first'
+            assert replace.call_count == 1
+
+        ctx.create_output('some_output', 'second')
+
+        assert step.parameters['data'] == 'second'
+
+    def test_resolved_parameters_cannot_be_corrupted(self, ctx: Context):
+        step = TestStep(ctx, UITestActions.ADD_COOKIES, parameters={
+            'cookieJar': {'name': 'cookie', 'value': 'value'},
+        })
+
+        step.parameters['cookieJar']['value'] = 'changed'
+        step.clear_parameters()
+
+        assert step.parameters['cookieJar']['value'] == 'value'
+
+    def test_parameters_are_resolved_on_every_perform(self, ctx: Context, monkeypatch):
+        '''
+        Ensures that parameters that depend on values the context data does not track,
+        such as environment variables, are resolved again every time the step is
+        performed
+        '''
+        step = TestStep(
+            ctx,
+            UITestActions.REMOVE_COOKIE,
+            parameters={'cookieName': '${{ Environment.QUILLA_TEST_COOKIE }}'},
+            driver=ctx.driver,
+        )
+        aggregator = StepsAggregator(ctx, driver=ctx.driver)
+
+        monkeypatch.setenv('QUILLA_TEST_COOKIE', 'stale')
+        step.parameters
+        monkeypatch.setenv('QUILLA_TEST_COOKIE', 'first')
+        aggregator._perform(step)
+        monkeypatch.setenv('QUILLA_TEST_COOKIE', 'second')
+        aggregator._perform(step)
+
+        assert [call.args[0] for call in ctx.driver.delete_cookie.call_args_list] == [
+            'first',
+            'second',
+        ]
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class StepPlanTests:
+    def test_plan_is_shared_by_aggregators(self, ctx: Context):
+        '''
+        Ensures that the factory selector hook runs once per plan, and that every
+        aggregator created from the plan has its own step objects
+        '''
+        steps = [{'action': UITestActions.CLICK, 'target': '//a'}]
+
+        with patch.object(ctx.pm.hook, 'quilla_step_factory_selector') as hook:
+            plan = StepPlan.compile(ctx, steps)
+            first, second = StepsAggregator(ctx, plan), StepsAggregator(ctx.fork(), plan)
+
+        hook.assert_called_once()
+        assert first._steps[0] is not second._steps[0]
+        assert second._steps[0].ctx is second.ctx
+
+        with pytest.raises(AttributeError):
+            plan._steps = ()
+        with pytest.raises(TypeError):
+            next(iter(plan)).definition['target'] = '//b'
+
+    def test_plan_freezes_nested_definitions(self, ctx: Context):
+        '''
+        Ensures that the nested parameters of a planned step cannot be changed, neither
+        through the plan nor through the definitions it was compiled from, and that every
+        step created from the plan gets its own parameters
+        '''
+        parameters = {'cookieJar': {'name': 'cookie', 'value': 'value'}, 'data': ['a']}
+        plan = StepPlan.compile(ctx, [
+            {'action': UITestActions.ADD_COOKIES, 'parameters': parameters},
+        ])
+        planned_step = next(iter(plan))
+        parameters['cookieJar']['value'] = 'changed'
+
+        with pytest.raises(TypeError):
+            planned_step.definition['parameters']['cookieJar']['value'] = 'changed'
+        with pytest.raises(AttributeError):
+            planned_step.definition['parameters']['data'].append('b')
+
+        first, second = plan.create_steps(ctx), plan.create_steps(ctx)
+        first[0]._parameters['cookieJar']['value'] = 'first'
+
+        assert second[0].parameters['cookieJar']['value'] == 'value'
+        assert second[0].parameters['data'] == ['a']
+
+    def test_quilla_test_keeps_template_steps(self, ctx: Context):
+        test = QuillaTest(ctx, [], 'https://example.com', [
+            {'action': UITestActions.CLICK, 'target': '//a'},
+        ])
+
+        assert test._steps is test._steps
+        assert [step.action for step in test._steps._steps] == [UITestActions.CLICK]
+
+    def test_plan_warns_about_missing_definitions(self, ctx: Context):
+        '''
+        Ensures that missing definitions are only logged when the plan is compiled, and
+        are still reported as a failure of the step that uses them
+        '''
+        ctx.load_definitions({'HomePage': {'Button': '//button'}})
+
+        with patch.object(ctx.logger, 'warning') as warning:
+            plan = StepPlan.compile(ctx, [
+                {'action': UITestActions.CLICK, 'target': '${{ Definitions.HomePage.Button }}'},
+                {'action': UITestActions.CLICK, 'target': '${{ Definitions.HomePage.Missing }}'},
+            ])
+
+        warning.assert_called_once()
+
+        aggregator = StepsAggregator(ctx, plan)
+        aggregator.driver = ctx.driver
+        reports = aggregator.run_steps()
+
+        assert [type(report) for report in reports] == [StepFailureReport]
+        assert reports[0].index == 1
+
+
+def make_aggregator(ctx: Context, *validations: tuple) -> StepsAggregator:
+    steps = [
+        {
+            'action': UITestActions.VALIDATE,
+            'type': ValidationTypes.XPATH,
+            'target': target,
+            'state': state,
+            'parameters': parameters,
+        }
+        for target, state, parameters in validations
+    ]
+    aggregator = StepsAggregator(ctx, steps)
+    aggregator.driver = ctx.driver
+
+    return aggregator
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class XPathValidationBatchTests:
+    def test_consecutive_validations_use_one_script(self, ctx: Context):
+        ctx.batch_validations = True
+        ctx.driver.execute_script.return_value = [
+            {'exists': True, 'visible': True, 'attributes': {'id': 'main'}, 'properties': {}},
+            {'exists': False},
+        ]
+        aggregator = make_aggregator(
+            ctx,
+            ('//div', XPathValidationStates.VISIBLE, None),
+            ('//div', XPathValidationStates.ATTRIBUTE_HAS_VALUE, {'name': 'id', 'value': 'main'}),
+            ('//span', XPathValidationStates.NOT_EXISTS, None),
+        )
+
+        reports = aggregator.run_steps()
+
+        assert [report.success for report in reports] == [True, True, True]
+        ctx.driver.execute_script.assert_called_once()
+        ctx.driver.find_element.assert_not_called()
+        ctx.driver.find_elements.assert_not_called()
+
+    def test_validations_fall_back_to_driver(self, ctx: Context):
+        '''
+        Ensures that targets the script could not evaluate are validated through the driver
+        '''
+        ctx.batch_validations = True
+        ctx.driver.execute_script.return_value = [None, {'exists': True}]
+        ctx.driver.find_elements.return_value = []
+        aggregator = make_aggregator(
+            ctx,
+            ('//div/text()', XPathValidationStates.NOT_EXISTS, None),
+            ('//span', XPathValidationStates.EXISTS, None),
+        )
+
+        reports = aggregator.run_steps()
+
+        assert [report.success for report in reports] == [True, True]
+        ctx.driver.find_elements.assert_called_once_with('xpath', '//div/text()')
+
+    def test_text_is_retrieved_through_driver(self, ctx: Context):
+        '''
+        Ensures that batched validations see the same element text as unbatched ones
+        '''
+        ctx.batch_validations = True
+        ctx.driver.execute_script.return_value = [
+            {'exists': True, 'attributes': {}, 'properties': {}},
+            {'exists': False},
+        ]
+        ctx.driver.find_element.return_value.text = 'Hello world'
+        aggregator = make_aggregator(
+            ctx,
+            ('//div', XPathValidationStates.TEXT_MATCHES, {'pattern': '^Hello world$'}),
+            ('//span', XPathValidationStates.NOT_EXISTS, None),
+        )
+
+        reports = aggregator.run_steps()
+
+        assert [report.success for report in reports] == [True, True]
+        assert all('text' not in query for query in ctx.driver.execute_script.call_args.args[1])
+        ctx.driver.find_element.assert_called_once_with('xpath', '//div')
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class DOMSnapshotTests:
+    page_source = '''
+    <html><body>
+        <div id="main" class="content">Hello
+            <span>world</span>
+        </div>
+    </body></html>
+    '''
+
+    def test_validations_use_one_snapshot(self, ctx: Context):
+        ctx.snapshot_validations = True
+        ctx.driver.page_source = self.page_source
+        aggregator = make_aggregator(
+            ctx,
+            ('//div', XPathValidationStates.HAS_ATTRIBUTE, {'name': 'class'}),
+            ('//div', XPathValidationStates.ATTRIBUTE_HAS_VALUE, {'name': 'id', 'value': 'main'}),
+            ('//p', XPathValidationStates.NOT_EXISTS, None),
+            ('//div/text()', XPathValidationStates.EXISTS, None),
+        )
+        ctx.driver.find_elements.return_value = [Mock()]
+
+        reports = aggregator.run_steps()
+
+        assert [report.success for report in reports] == [True, True, True, True]
+        ctx.driver.find_element.assert_not_called()
+        ctx.driver.find_elements.assert_called_once_with('xpath', '//div/text()')
+
+    def test_live_values_are_retrieved_through_driver(self, ctx: Context):
+        '''
+        Ensures that element text and attributes that reflect the live state of the element
+        are not read from the page source
+        '''
+        ctx.snapshot_validations = True
+        ctx.driver.page_source = (
+            '<html><body><input value="typed"><script>hidden()</script>Shown</body></html>'
+        )
+        element = ctx.driver.find_element.return_value
+        element.get_attribute.return_value = 'changed'
+        element.text = 'Shown'
+        aggregator = make_aggregator(
+            ctx,
+            ('//input', XPathValidationStates.ATTRIBUTE_HAS_VALUE,
+             {'name': 'value', 'value': 'changed'}),
+            ('//body', XPathValidationStates.TEXT_MATCHES, {'pattern': '^Shown$'}),
+        )
+
+        reports = aggregator.run_steps()
+
+        assert [report.success for report in reports] == [True, True]
+        element.get_attribute.assert_called_once_with('value')
+
+    def test_page_changing_steps_invalidate_the_snapshot(self, ctx: Context):
+        ctx.snapshot_validations = True
+        ctx.driver.page_source = self.page_source
+        aggregator = StepsAggregator(ctx, [
+            {'action': UITestActions.VALIDATE, 'type': ValidationTypes.XPATH,
+             'target': '//div', 'state': XPathValidationStates.EXISTS},
+            {'action': UITestActions.REFRESH},
+            {'action': UITestActions.VALIDATE, 'type': ValidationTypes.XPATH,
+             'target': '//div', 'state': XPathValidationStates.EXISTS},
+        ])
+        aggregator.driver = ctx.driver
+        snapshot = Mock(wraps=DOMSnapshot.from_driver)
+
+        with patch.object(DOMSnapshot, 'from_driver', snapshot):
+            aggregator.run_steps()
+
+        assert snapshot.call_count == 2
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class ObserverWaitTests:
+    def make_step(self, ctx: Context) -> TestStep:
+        ctx.wait_engine = 'observer'
+        return TestStep(
+            ctx,
+            UITestActions.WAIT_FOR_EXISTENCE,
+            '//div',
+            {'timeoutInSeconds': 1},
+            driver=ctx.driver,
+        )
+
+    def test_observer_finishes_without_polling(self, ctx: Context):
+        ctx.driver.execute_async_script.return_value = True
+
+        self.make_step(ctx).perform()
+
+        ctx.driver.find_element.assert_not_called()
+
+    def test_observer_times_out(self, ctx: Context):
+        ctx.driver.execute_async_script.return_value = False
+
+        with pytest.raises(TimeoutException):
+            self.make_step(ctx).perform()
+
+    def test_observer_keeps_the_session_script_timeout(self, ctx: Context):
+        '''
+        Ensures that long waits are split into slices shorter than the default script
+        timeout instead of changing the script timeout of the session
+        '''
+        ctx.driver.execute_async_script.return_value = False
+
+        with pytest.raises(TimeoutException):
+            wait_for_xpath(ctx.driver, '//div', False, 25)
+
+        slices = [call.args[3] for call in ctx.driver.execute_async_script.call_args_list]
+
+        ctx.driver.set_script_timeout.assert_not_called()
+        assert slices[:2] == [10000, 10000]
+        assert slices[2] == pytest.approx(5000, abs=100)
+
+    def test_observer_falls_back_to_polling(self, ctx: Context):
+        ctx.driver.execute_async_script.side_effect = JavascriptException()
+
+        self.make_step(ctx).perform()
+
+        ctx.driver.find_element.assert_called_once_with('xpath', '//div')
@@ -12,6 +12,7 @@ from quilla.common.exceptions import (
     EnumValueNotFoundException
 )
 from quilla.common import enums
+from quilla.plugins import _load_hooks_from_module
 
 
 @pytest.mark.smoke
@@ -62,3 +63,29 @@ class UtilTests:
 
         with pytest.raises(EnumValueNotFoundException):
             resolver._name_to_enum('', enum_type)
+
+    def test_enumresolver_remembers_plugin_names(self, ctx):
+        '''
+        Ensures that names resolved by plugins are only resolved once, until the
+        plugins that implement the hook change
+        '''
+        class EnumPlugin:
+            calls = 0
+
+            def quilla_resolve_enum_from_name(self, name, enum):
+                EnumPlugin.calls += 1
+                if name == 'Tap':
+                    return enums.UITestActions.CLICK
+
+        resolver = EnumResolver()
+        _load_hooks_from_module(ctx.pm, EnumPlugin, ctx.logger)
+
+        for _ in range(2):
+            resolved = resolver._name_to_enum('Tap', enums.UITestActions, ctx)
+            assert resolved is enums.UITestActions.CLICK
+        assert EnumPlugin.calls == 1
+
+        _load_hooks_from_module(ctx.pm, EnumPlugin, ctx.logger)
+        resolver._name_to_enum('Tap', enums.UITestActions, ctx)
+
+        assert EnumPlugin.calls == 2
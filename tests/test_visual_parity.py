@@ -0,0 +1,59 @@
+from io import BytesIO
+from unittest.mock import Mock
+
+import pytest
+from PIL import Image
+
+from quilla.common.exceptions import FailedStepException
+from quilla.steps.validations.visual_parity import VisualParityState
+
+
+def make_screenshot(size=(30, 30)) -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', size, (255, 255, 255)).save(buffer, format='PNG')
+
+    return buffer.getvalue()
+
+
+def rect(x, y, width, height):
+    return {'x': x, 'y': y, 'width': width, 'height': height}
+
+
+@pytest.fixture()
+def state(ctx):
+    element = Mock()
+    element.screenshot_as_png = make_screenshot()
+    ctx.driver.find_element.return_value = element
+
+    return VisualParityState(
+        ctx,
+        '//div',
+        {'baselineID': 'Container', 'excludeXPaths': ['//div/span']},
+    )
+
+
+@pytest.mark.smoke
+@pytest.mark.unit
+class VisualParityExclusionTests:
+    def test_exclusions_are_relative_to_target(self, ctx, state):
+        ctx.driver.execute_script.return_value = {
+            'target': rect(100.5, 50, 29.5, 30),
+            'exclusions': [rect(105, 55, 4.2, 5)],
+        }
+
+        image = state._take_screenshot().image
+
+        assert ctx.driver.execute_script.call_count == 1
+        assert image.getpixel((5, 5)) == (0, 0, 0)
+        assert image.getpixel((9, 9)) == (0, 0, 0)
+        assert image.getpixel((10, 10)) == (255, 255, 255)
+        assert image.getpixel((4, 4)) == (255, 255, 255)
+
+    def test_exclusion_outside_target_fails(self, ctx, state):
+        ctx.driver.execute_script.return_value = {
+            'target': rect(100, 50, 30, 30),
+            'exclusions': [rect(95, 55, 10, 10)],
+        }
+
+        with pytest.raises(FailedStepException):
+            state._take_screenshot()